@@ -0,0 +1,4 @@
+"""
+배터리 CT 결함 분석 프로그램 벤치마크 모음
+(체크포인트/GPU/Ollama 없이 CPU에서 오프라인으로 실행)
+"""
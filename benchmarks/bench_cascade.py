@@ -0,0 +1,103 @@
+"""
+계단식(coarse-to-fine) 세그멘테이션 벤치마크
+
+합성 CT 이미지에서 원본 해상도 전체 타일 예측과 계단식 예측(저해상도 전체 + 결함 후보 타일만
+원본 해상도 재예측)의 지연 시간, 재예측 픽셀 비율, 레이블 일치율을 비교합니다.
+
+무작위 초기화 모델은 결함 클래스를 임의 비율로 예측하므로, 저해상도 예측에서 결함 후보가
+--defect-fraction 비율이 되도록 분류 헤드의 결함 클래스 bias 를 보정합니다 (--checkpoint 지정 시 생략).
+
+사용 예:
+    python -m benchmarks.bench_cascade --sizes 1024,2048 --defect-fraction 0.05
+"""
+
+import argparse
+import json
+import sys
+from typing import Dict, List, Optional
+
+import numpy as np
+import torch
+
+from src.battery_analyzer.cascade import CascadeSegmenter
+from src.battery_analyzer.config import CASCADE_CONFIG, MODEL_CONFIG
+from src.battery_analyzer.vision_model import VisionModel
+
+from .common import environment_info, make_random_vision_model, make_synthetic_ct, measure, set_reproducible
+
+
+def calibrate_defect_fraction(vision_model: VisionModel, image: np.ndarray, fraction: float):
+    """저해상도 예측의 결함 클래스 비율이 fraction 이 되도록 분류 헤드 bias 조정"""
+    defect_classes = CASCADE_CONFIG["defect_classes"]
+    _, logits = vision_model._predict_logits(image)
+    logits = logits[0]
+    normal_classes = [c for c in range(vision_model.num_classes) if c not in defect_classes]
+    margin = logits[defect_classes].max(dim=0).values - logits[normal_classes].max(dim=0).values
+    shift = torch.quantile(margin.flatten(), 1.0 - fraction)
+
+    # 분류 헤드 이후 업샘플링은 선형이므로 bias 이동이 로짓에 그대로 반영됨
+    head = vision_model.model.segmentation_head[0]
+    with torch.no_grad():
+        head.bias[defect_classes] -= shift
+
+
+def run(vision_model: VisionModel, sizes: List[int], iterations: int, batch_size: int) -> List[Dict]:
+    segmenter = CascadeSegmenter(vision_model, {"batch_size": batch_size})
+    results = []
+    for size in sizes:
+        image = make_synthetic_ct(size)[:, :, ::-1].copy()  # RGB
+        full = measure(lambda: segmenter.segment_full(image), iterations)
+        cascade = measure(lambda: segmenter.segment(image), iterations)
+
+        full_labels = segmenter.segment_full(image)
+        _, cascade_labels, report = segmenter.segment(image)
+        row = {
+            "size": size,
+            "full": full,
+            "cascade": cascade,
+            "speedup": full["p50_ms"] / max(cascade["p50_ms"], 1e-9),
+            "refined_fraction": report["refined_fraction"],
+            "candidate_fraction": report["candidate_fraction"],
+            "tiles_refined": report["tiles_refined"],
+            "tiles_total": report["tiles_total"],
+            "label_agreement": float((full_labels == cascade_labels).mean()),
+        }
+        results.append(row)
+        print(f"{size:>7}{full['p50_ms']:>11.1f}{cascade['p50_ms']:>13.1f}{row['speedup']:>9.2f}x"
+              f"{row['refined_fraction']:>10.1%}{row['tiles_refined']:>7}/{row['tiles_total']:<5}"
+              f"{row['label_agreement']:>10.2%}")
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="계단식 세그멘테이션 벤치마크")
+    parser.add_argument("--sizes", default="1024,2048", help="합성 이미지 해상도 목록")
+    parser.add_argument("--iterations", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=4, help="타일 배치 크기")
+    parser.add_argument("--defect-fraction", type=float, default=0.05, help="무작위 모델의 결함 후보 비율")
+    parser.add_argument("--checkpoint", default=None, help="실제 체크포인트 경로 (미지정 시 무작위 모델)")
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--output", default=None, help="결과 JSON 경로")
+    args = parser.parse_args(argv)
+
+    set_reproducible(0, args.threads)
+    if args.checkpoint:
+        vision_model = VisionModel(args.checkpoint, MODEL_CONFIG["num_classes"], MODEL_CONFIG["backbone"])
+        if not vision_model.load_model():
+            return 1
+    else:
+        vision_model = make_random_vision_model()
+        calibrate_defect_fraction(vision_model, make_synthetic_ct(1024)[:, :, ::-1].copy(), args.defect_fraction)
+
+    print(f"{'size':>7}{'full p50':>11}{'cascade p50':>13}{'speedup':>10}{'refined':>10}{'tiles':>13}{'agree':>10}")
+    results = run(vision_model, [int(s) for s in args.sizes.split(",") if s], args.iterations, args.batch_size)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"environment": environment_info(), "config": vars(args), "results": results},
+                      f, indent=2, ensure_ascii=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+"""
+근사 중복 색인 벤치마크
+
+1) 색인 규모별(기본 10만/50만 항목) 구축 시간, 검색 지연 시간(p50/p95), 전수 popcount 비교 대비 속도,
+   전수 비교와의 결과 일치(재현율) 확인
+2) 합성 CT 이미지 변형(노이즈, 블러, 밝기, 1픽셀 이동, 다른 셀)에 대한 dHash 해밍 거리
+
+사용 예:
+    python -m benchmarks.bench_dedup --sizes 100000,500000 --distances 0,3,6 --queries 200
+"""
+
+import argparse
+import json
+import sys
+import time
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+
+from src.battery_analyzer.dedup_index import NearDuplicateIndex, _popcount
+
+from .common import environment_info, make_synthetic_ct, summarize_latencies
+
+
+def _flip_bits(phash: int, count: int, rng: np.random.Generator) -> int:
+    for bit in rng.choice(64, count, replace=False):
+        phash ^= 1 << int(bit)
+    return phash
+
+
+def bench_index(sizes: List[int], distances: List[int], queries: int, seed: int) -> List[Dict]:
+    """색인 구축/검색 시간과 전수 비교 대비 정확도"""
+    rng = np.random.default_rng(seed)
+    results = []
+    for size in sizes:
+        hashes = rng.integers(0, np.iinfo(np.uint64).max, size=size, dtype=np.uint64, endpoint=True)
+        index = NearDuplicateIndex(max_distance=max(distances))
+        start = time.perf_counter()
+        index.add_many(np.arange(1, size + 1), hashes)
+        build_s = time.perf_counter() - start
+
+        for distance in distances:
+            latencies, brute_latencies, exact = [], [], 0
+            for q in range(queries):
+                query = _flip_bits(int(hashes[rng.integers(size)]), distance, rng)
+                start = time.perf_counter()
+                index.query(query, distance)
+                latencies.append(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                brute = np.nonzero(_popcount(hashes ^ np.uint64(query)) <= distance)[0] + 1
+                brute_latencies.append(time.perf_counter() - start)
+                found = index.query(query, distance, limit=size)
+                exact += set(result_id for result_id, _ in found) == set(brute.tolist())
+
+            row = {
+                "entries": size,
+                "distance": distance,
+                "build_s": build_s,
+                "index": summarize_latencies(latencies),
+                "brute_force": summarize_latencies(brute_latencies),
+                "exact_fraction": exact / queries,
+            }
+            row["speedup"] = row["brute_force"]["p50_ms"] / max(row["index"]["p50_ms"], 1e-9)
+            results.append(row)
+            print(f"{size:>9}{distance:>6}{build_s:>9.2f}{row['index']['p50_ms']:>10.3f}{row['index']['p95_ms']:>10.3f}"
+                  f"{row['brute_force']['p50_ms']:>10.3f}{row['speedup']:>9.1f}x{row['exact_fraction']:>8.0%}")
+    return results
+
+
+def bench_hash(size: int) -> Dict[str, int]:
+    """합성 CT 이미지 변형별 원본과의 dHash 해밍 거리"""
+    image = make_synthetic_ct(size)
+    rng = np.random.default_rng(1)
+    variants = {
+        "noise": np.clip(image.astype(np.int16) + rng.integers(-6, 7, image.shape), 0, 255).astype(np.uint8),
+        "blur": cv2.GaussianBlur(image, (5, 5), 0),
+        "brightness+10": cv2.add(image, np.full_like(image, 10)),
+        "shift_1px": np.roll(image, 1, axis=1),
+        "jpeg_q80": cv2.imdecode(cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, 80])[1], cv2.IMREAD_COLOR),
+        "other_cell": make_synthetic_ct(size, seed=7),
+    }
+    base = NearDuplicateIndex.dhash(image[:, :, ::-1].copy())
+    distances = {}
+    for name, variant in variants.items():
+        distances[name] = NearDuplicateIndex.distance(base, NearDuplicateIndex.dhash(variant[:, :, ::-1].copy()))
+        print(f"{name:<16}{distances[name]:>4}/64")
+    return distances
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="근사 중복 색인 벤치마크")
+    parser.add_argument("--sizes", default="100000,500000", help="색인 항목 수 목록")
+    parser.add_argument("--distances", default="0,3,6", help="검색 해밍 거리 목록")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--image-size", type=int, default=1024, help="dHash 변형 비교용 합성 이미지 해상도")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="결과 JSON 경로")
+    args = parser.parse_args(argv)
+
+    print(f"{'entries':>9}{'dist':>6}{'build s':>9}{'p50 ms':>10}{'p95 ms':>10}{'brute ms':>10}{'speedup':>10}{'exact':>8}")
+    index_results = bench_index([int(s) for s in args.sizes.split(",") if s],
+                                [int(d) for d in args.distances.split(",") if d], args.queries, args.seed)
+    print()
+    print(f"{'variant':<16}{'distance':>7}")
+    hash_results = bench_hash(args.image_size)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"environment": environment_info(), "config": vars(args), "index": index_results,
+                       "hash_distances": hash_results}, f, indent=2, ensure_ascii=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""
+전처리 경로 비교 벤치마크
+
+기존 경로(전체 해상도 디코딩 → RGB 변환 → 리사이즈 → float 변환/정규화 → permute)와
+고속 경로(축소 디코딩 → uint8 리사이즈 → 조회 테이블 정규화를 재사용 버퍼에 기록)의
+지연 시간과 메모리 할당량을 해상도/포맷별로 비교합니다. 두 경로의 입력 텐서 차이와
+무작위 초기화 모델 기준 마스크 일치율도 함께 보고합니다.
+
+사용 예:
+    python -m benchmarks.bench_preprocess --sizes 1024,2048,4096 --formats png,jpg
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+from typing import Dict, List, Optional
+
+import cv2
+import torch
+
+from .common import environment_info, make_random_vision_model, make_synthetic_ct, measure, set_reproducible
+
+
+def write_image(out_dir: str, size: int, fmt: str) -> str:
+    """합성 CT 이미지를 지정 포맷으로 저장"""
+    path = os.path.join(out_dir, f"synthetic_ct_{size}.{fmt}")
+    cv2.imwrite(path, make_synthetic_ct(size))
+    return path
+
+
+def compare_outputs(vision_model, path: str) -> Dict[str, float]:
+    """두 경로의 입력 텐서 차이 및 예측 마스크 일치율"""
+    _, reference = vision_model.preprocess_reference(path)
+    _, fast = vision_model.preprocess_fast(path)
+    difference = (reference - fast).abs()
+    with torch.no_grad():
+        reference_mask = torch.argmax(vision_model.model(reference), dim=1)
+        fast_mask = torch.argmax(vision_model.model(fast), dim=1)
+    return {
+        "input_mean_abs_diff": float(difference.mean()),
+        "input_max_abs_diff": float(difference.max()),
+        "mask_agreement": float((reference_mask == fast_mask).float().mean()),
+    }
+
+
+def run(sizes: List[int], formats: List[str], iterations: int) -> List[Dict]:
+    vision_model = make_random_vision_model()
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for fmt in formats:
+            for size in sizes:
+                path = write_image(tmp, size, fmt)
+                row = {"format": fmt, "size": size, "file_kb": os.path.getsize(path) / 1024}
+                for name, fn in (("reference", vision_model.preprocess_reference),
+                                 ("fast", vision_model.preprocess_fast)):
+                    row[name] = measure(lambda: fn(path), iterations)
+                row.update(compare_outputs(vision_model, path))
+                row["speedup"] = row["reference"]["p50_ms"] / max(row["fast"]["p50_ms"], 1e-9)
+                results.append(row)
+                print(f"{fmt:>5}{size:>7}"
+                      f"{row['reference']['p50_ms']:>11.1f}{row['fast']['p50_ms']:>9.1f}{row['speedup']:>8.2f}x"
+                      f"{row['reference']['peak_traced_mb']:>11.1f}{row['fast']['peak_traced_mb']:>9.1f}"
+                      f"{row['reference']['peak_rss_delta_mb']:>11.1f}{row['fast']['peak_rss_delta_mb']:>9.1f}"
+                      f"{row['input_max_abs_diff']:>9.2f}{row['mask_agreement']:>11.2%}")
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="전처리 경로 지연 시간 / 메모리 할당 비교")
+    parser.add_argument("--sizes", default="1024,2048,4096", help="합성 이미지 해상도 목록")
+    parser.add_argument("--formats", default="png,jpg", help="이미지 포맷 목록")
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--output", default=None, help="결과 JSON 경로")
+    args = parser.parse_args(argv)
+
+    set_reproducible(0, args.threads)
+    print(f"{'fmt':>5}{'size':>7}{'ref p50':>11}{'fast p50':>9}{'speedup':>9}"
+          f"{'ref MB':>11}{'fast MB':>9}{'ref RSS':>11}{'fast RSS':>9}{'max diff':>9}{'mask agree':>11}")
+    results = run([int(s) for s in args.sizes.split(",") if s],
+                  [f for f in args.formats.split(",") if f], args.iterations)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"environment": environment_info(), "config": vars(args), "results": results},
+                      f, indent=2, ensure_ascii=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+"""
+로컬 HTTP 추론 서비스 처리량 테스트
+
+무작위 초기화 모델로 서비스를 같은 프로세스에서 띄우고, 동시 클라이언트 수를 바꿔가며
+/predict 처리량과 지연 시간을 측정합니다. 응답 형식(json/png/raw)의 정합성도 확인합니다.
+
+사용 예:
+    python -m benchmarks.bench_server --concurrency 1,2,4,8 --requests 40
+"""
+
+import argparse
+import asyncio
+import http.client
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from src.battery_analyzer.server import InferenceService
+
+from .common import make_random_vision_model, make_synthetic_ct, set_reproducible, summarize_latencies
+
+
+def start_service(max_concurrency: int) -> Tuple[InferenceService, asyncio.AbstractEventLoop]:
+    """백그라운드 스레드에서 서비스 시작 (임의 포트)"""
+    service = InferenceService(make_random_vision_model(), None, {"max_concurrency": max_concurrency,
+                                                                   "max_pending": 1024})
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+
+    def run():
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(service.start("127.0.0.1", 0))
+        started.set()
+        loop.run_forever()
+
+    threading.Thread(target=run, daemon=True).start()
+    started.wait()
+    return service, loop
+
+
+def stop_service(service: InferenceService, loop: asyncio.AbstractEventLoop):
+    asyncio.run_coroutine_threadsafe(service.stop(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+
+
+def request(port: int, method: str, path: str, body: Optional[bytes] = None,
+            conn: Optional[http.client.HTTPConnection] = None):
+    """요청 전송 후 (status, headers, body) 반환"""
+    conn = conn or http.client.HTTPConnection("127.0.0.1", port, timeout=120)
+    conn.request(method, path, body=body, headers={"Content-Type": "application/octet-stream"})
+    response = conn.getresponse()
+    return response.status, dict(response.getheaders()), response.read()
+
+
+def check_responses(port: int, image_bytes: bytes):
+    """응답 형식 정합성 확인"""
+    status, _, body = request(port, "GET", "/readyz")
+    assert status == 200 and json.loads(body)["ready"], "서비스가 준비되지 않았습니다."
+
+    status, _, body = request(port, "POST", "/predict?format=json", image_bytes)
+    assert status == 200, body
+    summary = json.loads(body)
+
+    status, headers, raw = request(port, "POST", "/predict?format=raw", image_bytes)
+    height, width = int(headers["X-Mask-Height"]), int(headers["X-Mask-Width"])
+    raw_mask = np.frombuffer(raw, dtype=np.uint8).reshape(height, width)
+
+    status, _, png = request(port, "POST", "/predict?format=png", image_bytes)
+    png_mask = cv2.imdecode(np.frombuffer(png, dtype=np.uint8), cv2.IMREAD_UNCHANGED)
+    assert np.array_equal(raw_mask, png_mask), "PNG / raw 마스크가 다릅니다."
+    assert summary["mask_size"] == [width, height]
+
+    status, _, _ = request(port, "POST", "/predict", b"not an image")
+    assert status == 400, "잘못된 이미지에 400을 반환해야 합니다."
+    print("✅ 응답 형식 확인 완료 (json / raw / png / 오류 처리)")
+
+
+def run_load(port: int, image_bytes: bytes, concurrency: int, total_requests: int,
+             output_format: str) -> Dict[str, float]:
+    """동시 클라이언트 concurrency 개로 total_requests 건 전송"""
+    per_client = max(total_requests // concurrency, 1)
+    latencies: List[float] = []
+    errors = 0
+    lock = threading.Lock()
+
+    def client():
+        nonlocal errors
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=300)  # keep-alive 재사용
+        for _ in range(per_client):
+            start = time.perf_counter()
+            status, _, _ = request(port, "POST", f"/predict?format={output_format}", image_bytes, conn)
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                errors += status != 200
+        conn.close()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in [pool.submit(client) for _ in range(concurrency)]:
+            future.result()
+    wall = time.perf_counter() - start
+
+    result = summarize_latencies(latencies)
+    result["throughput_per_s"] = len(latencies) / wall
+    result["errors"] = errors
+    result["concurrency"] = concurrency
+    return result
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="로컬 HTTP 추론 서비스 처리량 테스트")
+    parser.add_argument("--concurrency", default="1,2,4,8", help="동시 클라이언트 수 목록")
+    parser.add_argument("--requests", type=int, default=32, help="단계별 총 요청 수")
+    parser.add_argument("--size", type=int, default=1024, help="합성 이미지 해상도")
+    parser.add_argument("--format", default="raw", choices=["json", "png", "raw"])
+    parser.add_argument("--max-concurrency", type=int, default=2, help="서비스 동시 세그멘테이션 수")
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--output", default=None, help="결과 JSON 경로")
+    args = parser.parse_args(argv)
+
+    set_reproducible(0, args.threads)
+    ok, encoded = cv2.imencode(".png", make_synthetic_ct(args.size))
+    image_bytes = encoded.tobytes()
+
+    service, loop = start_service(args.max_concurrency)
+    results = []
+    try:
+        check_responses(service.port, image_bytes)
+        run_load(service.port, image_bytes, 1, 2, args.format)  # 워밍업
+        print(f"{'clients':>8}{'p50(ms)':>10}{'p95(ms)':>10}{'p99(ms)':>10}{'req/s':>10}{'errors':>8}")
+        for concurrency in [int(c) for c in args.concurrency.split(",") if c]:
+            r = run_load(service.port, image_bytes, concurrency, args.requests, args.format)
+            results.append(r)
+            print(f"{concurrency:>8}{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}{r['p99_ms']:>10.1f}"
+                  f"{r['throughput_per_s']:>10.2f}{r['errors']:>8}")
+    finally:
+        stop_service(service, loop)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2, ensure_ascii=False)
+    return 1 if any(r["errors"] for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+"""
+테스트 시 증강(TTA) 벤치마크
+
+변환 목록별로 단일 예측, 배치 TTA(모든 뷰를 한 번의 forward 로 예측), 뷰 수만큼 순차 예측한 뒤
+평균하는 단순 TTA 의 지연 시간을 비교하고, TTA 마스크와 단일 예측 마스크의 일치율,
+작은 평행 이동에 대한 마스크 안정성(이동 전후 일치율)을 측정합니다.
+
+무작위 초기화 모델은 한 클래스만 예측하기 쉬우므로, 결함 클래스 비율이 --defect-fraction 이 되도록
+분류 헤드 bias 를 보정합니다 (--checkpoint 지정 시 생략).
+
+사용 예:
+    python -m benchmarks.bench_tta --size 1024 --transform-sets "identity,hflip;identity,hflip,vflip,rot90"
+"""
+
+import argparse
+import json
+import sys
+from typing import Dict, List, Optional
+
+import numpy as np
+import torch
+
+from src.battery_analyzer.config import MODEL_CONFIG
+from src.battery_analyzer.vision_model import _TTA_TRANSFORMS, VisionModel
+
+from .bench_cascade import calibrate_defect_fraction
+from .common import environment_info, make_random_vision_model, make_synthetic_ct, measure, set_reproducible
+
+# 입력 이미지(H, W, C)에 적용하는 변환 (텐서 변환과 같은 방향)
+_IMAGE_TRANSFORMS = {
+    "identity": lambda x: x,
+    "hflip": lambda x: x[:, ::-1],
+    "vflip": lambda x: x[::-1],
+    "rot90": lambda x: np.rot90(x, 1),
+    "rot180": lambda x: np.rot90(x, 2),
+    "rot270": lambda x: np.rot90(x, 3),
+}
+
+
+def sequential_tta(vision_model: VisionModel, image: np.ndarray, transforms: List[str]) -> np.ndarray:
+    """단순 TTA: 뷰마다 전처리 + 예측을 따로 실행한 뒤 로짓 평균"""
+    total = None
+    for name in transforms:
+        view = np.ascontiguousarray(_IMAGE_TRANSFORMS[name](image))
+        _, logits = vision_model._predict_logits(view)
+        restored = _TTA_TRANSFORMS[name][1](logits)
+        total = restored.clone() if total is None else total + restored
+    return torch.argmax(total, dim=1).cpu().numpy().squeeze()
+
+
+def shift_stability(vision_model: VisionModel, image: np.ndarray, shift: int) -> float:
+    """입력을 shift 픽셀 평행 이동했을 때 (가장자리 제외) 마스크가 유지되는 비율"""
+    _, mask = vision_model.predict(image)
+    _, shifted = vision_model.predict(np.ascontiguousarray(np.roll(image, (shift, shift), axis=(0, 1))))
+    # 입력 해상도 기준 이동량을 마스크 해상도로 환산
+    scale = mask.shape[0] / image.shape[0]
+    offset = max(int(round(shift * scale)), 1)
+    restored = np.roll(shifted, (-offset, -offset), axis=(0, 1))
+    margin = 2 * offset
+    return float((mask[margin:-margin, margin:-margin] == restored[margin:-margin, margin:-margin]).mean())
+
+
+def run(vision_model: VisionModel, image: np.ndarray, transform_sets: List[List[str]], iterations: int,
+        shift: int) -> List[Dict]:
+    vision_model.set_tta([])
+    single = measure(lambda: vision_model.predict(image), iterations)
+    _, single_mask = vision_model.predict(image)
+    single_stability = shift_stability(vision_model, image, shift)
+    print(f"{'single':<40}{single['p50_ms']:>10.1f}{'':>12}{'':>9}{'':>10}{single_stability:>11.2%}")
+
+    results = []
+    for transforms in transform_sets:
+        vision_model.set_tta([])
+        sequential = measure(lambda: sequential_tta(vision_model, image, transforms), iterations)
+        sequential_mask = sequential_tta(vision_model, image, transforms)
+
+        vision_model.set_tta(transforms)
+        batched = measure(lambda: vision_model.predict(image), iterations)
+        _, tta_mask = vision_model.predict(image)
+        stability = shift_stability(vision_model, image, shift)
+
+        row = {
+            "transforms": transforms,
+            "single": single,
+            "batched": batched,
+            "sequential": sequential,
+            "cost_vs_single": batched["p50_ms"] / max(single["p50_ms"], 1e-9),
+            "speedup_vs_sequential": sequential["p50_ms"] / max(batched["p50_ms"], 1e-9),
+            "agreement_with_single": float((tta_mask == single_mask).mean()),
+            "agreement_with_sequential": float((tta_mask == sequential_mask).mean()),
+            "shift_stability_single": single_stability,
+            "shift_stability_tta": stability,
+        }
+        results.append(row)
+        print(f"{','.join(transforms):<40}{batched['p50_ms']:>10.1f}{sequential['p50_ms']:>12.1f}"
+              f"{row['cost_vs_single']:>8.2f}x{row['agreement_with_single']:>10.2%}{stability:>11.2%}")
+
+    vision_model.set_tta([])
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="테스트 시 증강(TTA) 벤치마크")
+    parser.add_argument("--size", type=int, default=1024, help="합성 이미지 해상도")
+    parser.add_argument("--transform-sets", default="identity,hflip;identity,hflip,vflip;"
+                        "identity,hflip,vflip,rot90;identity,hflip,vflip,rot90,rot180,rot270",
+                        help="세미콜론으로 구분한 변환 목록들")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--shift", type=int, default=4, help="안정성 측정용 평행 이동량 (입력 픽셀)")
+    parser.add_argument("--defect-fraction", type=float, default=0.05, help="무작위 모델의 결함 예측 비율")
+    parser.add_argument("--checkpoint", default=None, help="실제 체크포인트 경로 (미지정 시 무작위 모델)")
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--output", default=None, help="결과 JSON 경로")
+    args = parser.parse_args(argv)
+
+    set_reproducible(0, args.threads)
+    if args.checkpoint:
+        vision_model = VisionModel(args.checkpoint, MODEL_CONFIG["num_classes"], MODEL_CONFIG["backbone"])
+        if not vision_model.load_model():
+            return 1
+    else:
+        vision_model = make_random_vision_model()
+
+    image = make_synthetic_ct(args.size)[:, :, ::-1].copy()  # RGB
+    if not args.checkpoint:
+        calibrate_defect_fraction(vision_model, image, args.defect_fraction)
+    transform_sets = [[name for name in group.split(",") if name] for group in args.transform_sets.split(";")]
+
+    print(f"{'transforms':<40}{'tta p50':>10}{'seq p50':>12}{'cost':>9}{'agree':>10}{'shift-stab':>11}")
+    results = run(vision_model, image, transform_sets, args.iterations, args.shift)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"environment": environment_info(), "config": vars(args), "results": results},
+                      f, indent=2, ensure_ascii=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
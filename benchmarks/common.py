@@ -0,0 +1,231 @@
+"""
+벤치마크 공통 유틸리티
+- 합성 CT 이미지 생성
+- 무작위 초기화 비전 모델 생성
+- Ollama 스텁
+- 지연 시간/메모리 측정 및 통계
+"""
+
+import base64
+import os
+import platform
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+import cv2
+import numpy as np
+import torch
+
+from src.battery_analyzer import ai_analyzer
+from src.battery_analyzer.config import MODEL_CONFIG
+from src.battery_analyzer.vision_model import VisionModel
+
+
+# =============================================================================
+# 합성 데이터
+# =============================================================================
+
+def make_synthetic_ct(size: int, seed: int = 0) -> np.ndarray:
+    """CT와 유사한 합성 배터리 셀 이미지 생성 (BGR uint8)"""
+    rng = np.random.default_rng(seed + size)
+    h = w = size
+    image = np.full((h, w), 30, dtype=np.uint8)
+
+    # 셀 외곽 (타원) 과 권취 구조 (동심 타원 링)
+    center = (w // 2, h // 2)
+    axes = (int(w * 0.40), int(h * 0.30))
+    cv2.ellipse(image, center, axes, 0, 0, 360, 150, -1)
+    ring_step = max(size // 64, 2)
+    for r in range(ring_step, min(axes), ring_step * 2):
+        cv2.ellipse(image, center, (axes[0] - r, axes[1] - r), 0, 0, 360, 110, max(size // 512, 1))
+
+    # 스웰링 (외곽 팽창), 기공 (어두운 점), 레진 오버플로우 (밝은 띠)
+    cv2.ellipse(image, (center[0] + axes[0], center[1]), (size // 16, size // 10), 0, 0, 360, 140, -1)
+    for _ in range(12):
+        x = int(rng.integers(center[0] - axes[0] // 2, center[0] + axes[0] // 2))
+        y = int(rng.integers(center[1] - axes[1] // 2, center[1] + axes[1] // 2))
+        cv2.circle(image, (x, y), max(size // 128, 1), 10, -1)
+    cv2.rectangle(image, (center[0] - axes[0] // 2, center[1] - axes[1] - size // 40),
+                  (center[0] + axes[0] // 2, center[1] - axes[1]), 220, -1)
+
+    # 검출기 노이즈
+    noise = rng.normal(0, 8, size=(h, w))
+    image = np.clip(image.astype(np.float32) + noise, 0, 255).astype(np.uint8)
+    return cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+
+
+def write_synthetic_images(out_dir: str, sizes: List[int], seed: int = 0) -> Dict[int, str]:
+    """해상도별 합성 이미지를 PNG로 저장하고 경로 반환"""
+    os.makedirs(out_dir, exist_ok=True)
+    paths = {}
+    for size in sizes:
+        path = os.path.join(out_dir, f"synthetic_ct_{size}.png")
+        cv2.imwrite(path, make_synthetic_ct(size, seed))
+        paths[size] = path
+    return paths
+
+
+def make_random_vision_model(seed: int = 0) -> VisionModel:
+    """MODEL_CONFIG 구조의 무작위 초기화 비전 모델 생성"""
+    vision_model = VisionModel(
+        MODEL_CONFIG["path"],
+        num_classes=MODEL_CONFIG["num_classes"],
+        backbone=MODEL_CONFIG["backbone"],
+    )
+    vision_model.init_random_model(seed)
+    return vision_model
+
+
+# =============================================================================
+# Ollama 스텁
+# =============================================================================
+
+class StubOllama:
+    """ollama 모듈 대체 스텁 (이미지 인코딩 비용 + 고정 지연 시간)"""
+
+    def __init__(self, latency: float = 0.0, response: str = "스텁 분석 결과입니다."):
+        self.latency = latency
+        self.response = response
+        self.calls = 0
+
+    def chat(self, model: str, messages: List[Dict], **kwargs) -> Dict:
+        self.calls += 1
+        # 실제 클라이언트처럼 이미지를 읽어 base64로 인코딩
+        for message in messages:
+            for image in message.get("images", []):
+                with open(image, "rb") as f:
+                    base64.b64encode(f.read())
+        if self.latency > 0:
+            time.sleep(self.latency)
+        return {"message": {"role": "assistant", "content": self.response}}
+
+
+@contextmanager
+def stub_ollama(latency: float = 0.0):
+    """AIAnalyzer가 사용하는 ollama 모듈을 스텁으로 임시 교체"""
+    original = ai_analyzer.ollama
+    stub = StubOllama(latency)
+    ai_analyzer.ollama = stub
+    try:
+        yield stub
+    finally:
+        ai_analyzer.ollama = original
+
+
+# =============================================================================
+# 측정
+# =============================================================================
+
+def _current_rss_bytes() -> int:
+    """현재 프로세스 RSS (바이트)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class RSSSampler:
+    """백그라운드 스레드로 RSS 최고치 샘플링"""
+
+    def __init__(self, interval: float = 0.002):
+        self.interval = interval
+        self.baseline = 0
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.baseline = self.peak = _current_rss_bytes()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, _current_rss_bytes())
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, _current_rss_bytes())
+            time.sleep(self.interval)
+
+    @property
+    def peak_delta(self) -> int:
+        return max(self.peak - self.baseline, 0)
+
+
+def summarize_latencies(latencies: List[float]) -> Dict[str, float]:
+    """지연 시간 목록(초)을 밀리초 백분위수/처리량으로 요약"""
+    values = np.asarray(latencies, dtype=np.float64) * 1000.0
+    total = float(values.sum()) / 1000.0
+    return {
+        "count": int(values.size),
+        "mean_ms": float(values.mean()),
+        "min_ms": float(values.min()),
+        "p50_ms": float(np.percentile(values, 50)),
+        "p90_ms": float(np.percentile(values, 90)),
+        "p95_ms": float(np.percentile(values, 95)),
+        "p99_ms": float(np.percentile(values, 99)),
+        "max_ms": float(values.max()),
+        "throughput_per_s": float(values.size / total) if total > 0 else 0.0,
+    }
+
+
+def measure(fn: Callable[[], object], iterations: int, warmup: int = 1) -> Dict[str, float]:
+    """함수의 지연 시간 분포와 최고 메모리 사용량 측정"""
+    for _ in range(warmup):
+        fn()
+
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - start)
+    result = summarize_latencies(latencies)
+
+    # 메모리는 지연 시간 측정과 분리하여 한 번 더 실행 (tracemalloc 오버헤드 배제)
+    if torch.cuda.is_available():
+        torch.cuda.reset_peak_memory_stats()
+    tracemalloc.start()
+    try:
+        with RSSSampler() as sampler:
+            fn()
+        _, traced_peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    result["peak_traced_mb"] = traced_peak / 1024 ** 2
+    result["peak_rss_delta_mb"] = sampler.peak_delta / 1024 ** 2
+    if torch.cuda.is_available():
+        result["peak_cuda_mb"] = torch.cuda.max_memory_allocated() / 1024 ** 2
+    return result
+
+
+def environment_info() -> Dict[str, object]:
+    """재현성을 위한 실행 환경 정보"""
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "torch": torch.__version__,
+        "torch_threads": torch.get_num_threads(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+        "cuda": torch.cuda.is_available(),
+    }
+
+
+def set_reproducible(seed: int = 0, threads: Optional[int] = None):
+    """난수 시드와 스레드 수 고정"""
+    np.random.seed(seed)
+    torch.manual_seed(seed)
+    cv2.setRNGSeed(seed)
+    if threads:
+        torch.set_num_threads(threads)
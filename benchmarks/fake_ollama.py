@@ -0,0 +1,199 @@
+"""
+부하 테스트용 가짜 Ollama 서버
+
+/api/chat 요청에 대해 설정한 지연 시간(프롬프트/이미지 처리)과 토큰 생성 속도를 흉내 내어 응답합니다.
+실제 Ollama처럼 동시에 처리하는 요청 수(--parallel)를 제한하고 나머지는 대기시킵니다.
+stream=true 요청은 토큰 단위 NDJSON 청크로 응답합니다.
+
+사용 예:
+    python -m benchmarks.fake_ollama --port 11435 --latency 2.0 --tokens-per-s 25 --tokens 300
+    OLLAMA_HOST=127.0.0.1:11435 streamlit run app.py
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+# 응답 본문 생성용 토큰 (한 토큰 ≈ 한 어절)
+_TOKENS = ["배터리", "셀의", "외곽은", "비교적", "균일하며,", "마스크", "영역에서", "관찰된", "결함은",
+           "성능에", "영향을", "줄", "수", "있습니다.", "추가", "검사를", "권장합니다."]
+
+
+class FakeOllamaServer:
+    """지연 시간 / 토큰 속도 / 동시 처리 수를 설정할 수 있는 가짜 Ollama HTTP 서버"""
+
+    def __init__(self, latency: float = 1.0, tokens_per_s: float = 30.0, tokens: int = 200,
+                 parallel: int = 1, host: str = "127.0.0.1", port: int = 0):
+        self.latency = latency
+        self.tokens_per_s = tokens_per_s
+        self.tokens = tokens
+        self.parallel = parallel
+        self._slots = threading.Semaphore(parallel)
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "in_flight": 0, "peak_in_flight": 0, "waiting": 0, "peak_waiting": 0,
+                      "bytes_received": 0}
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def host(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"{host}:{port}"
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}"
+
+    def start(self) -> "FakeOllamaServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        print(f"🦙 가짜 Ollama 서버 시작: {self.url} (지연 {self.latency}s, {self.tokens_per_s} tok/s, "
+              f"{self.tokens} 토큰, 동시 {self.parallel})")
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeOllamaServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _count(self, key: str, delta: int):
+        with self._lock:
+            self.stats[key] += delta
+            peak = "peak_" + key
+            if peak in self.stats:
+                self.stats[peak] = max(self.stats[peak], self.stats[key])
+
+    def generate(self, payload: Dict):
+        """응답 토큰을 생성 속도에 맞춰 순서대로 반환 (첫 토큰 전 지연 포함)"""
+        self._count("waiting", 1)
+        self._slots.acquire()
+        self._count("waiting", -1)
+        self._count("in_flight", 1)
+        try:
+            time.sleep(self.latency)
+            interval = 1.0 / self.tokens_per_s if self.tokens_per_s > 0 else 0.0
+            next_time = time.perf_counter()
+            for index in range(self.tokens):
+                next_time += interval
+                delay = next_time - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                yield _TOKENS[index % len(_TOKENS)] + " "
+        finally:
+            self._count("in_flight", -1)
+            self._slots.release()
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, status: int, payload: Dict):
+                body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _write_chunk(self, payload: Dict):
+                data = (json.dumps(payload, ensure_ascii=False) + "\n").encode("utf-8")
+                self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+                self.wfile.flush()
+
+            def do_GET(self):
+                if self.path == "/":
+                    body = b"Ollama is running"
+                    self.send_response(200)
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                elif self.path == "/api/version":
+                    self._send_json(200, {"version": "0.0.0-fake"})
+                elif self.path == "/api/tags":
+                    self._send_json(200, {"models": [{"name": "llava:7b", "model": "llava:7b"}]})
+                else:
+                    self._send_json(404, {"error": "not found"})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = self.rfile.read(length)
+                server._count("bytes_received", length)
+                if self.path != "/api/chat":
+                    self._send_json(404, {"error": "not found"})
+                    return
+                try:
+                    payload = json.loads(body)
+                except json.JSONDecodeError:
+                    self._send_json(400, {"error": "invalid json"})
+                    return
+                server._count("requests", 1)
+
+                start = time.perf_counter()
+                model = payload.get("model", "llava:7b")
+                if payload.get("stream", False):
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/x-ndjson")
+                    self.send_header("Transfer-Encoding", "chunked")
+                    self.end_headers()
+                    for token in server.generate(payload):
+                        self._write_chunk({"model": model, "created_at": _now(),
+                                           "message": {"role": "assistant", "content": token}, "done": False})
+                    self._write_chunk({"model": model, "created_at": _now(), "done": True, "done_reason": "stop",
+                                       "message": {"role": "assistant", "content": ""},
+                                       "total_duration": int((time.perf_counter() - start) * 1e9),
+                                       "eval_count": server.tokens})
+                    self.wfile.write(b"0\r\n\r\n")
+                else:
+                    content = "".join(server.generate(payload)).strip()
+                    self._send_json(200, {"model": model, "created_at": _now(), "done": True, "done_reason": "stop",
+                                          "message": {"role": "assistant", "content": content},
+                                          "total_duration": int((time.perf_counter() - start) * 1e9),
+                                          "eval_count": server.tokens})
+
+        return Handler
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="부하 테스트용 가짜 Ollama 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--latency", type=float, default=1.0, help="첫 토큰 전 지연 시간 (초)")
+    parser.add_argument("--tokens-per-s", type=float, default=30.0, help="토큰 생성 속도")
+    parser.add_argument("--tokens", type=int, default=200, help="응답 토큰 수")
+    parser.add_argument("--parallel", type=int, default=1, help="동시 처리 요청 수 (OLLAMA_NUM_PARALLEL)")
+    args = parser.parse_args(argv)
+
+    server = FakeOllamaServer(args.latency, args.tokens_per_s, args.tokens, args.parallel, args.host, args.port)
+    server.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
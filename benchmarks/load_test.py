@@ -0,0 +1,509 @@
+"""
+분석 파이프라인 동시 세션 부하 테스트
+
+Streamlit 서버 없이 BatteryDefectAnalyzer 자체를 실행합니다. main_app 의 st 를 헤드리스 대역으로 바꿔
+세션 상태는 세션(스레드)별로 두고, 업로드 / 버튼 클릭 / 채팅 입력은 스크립트로 넣으며 나머지 화면 출력은
+bare 모드 Streamlit 에 맡깁니다. 한 세션은 실제 사용자처럼 스크립트를 여러 번 재실행합니다
+(업로드 → "AI 분석 시작" → 추가 질문 N회 → "대화 종료 및 보고서 생성").
+따라서 모델 레지스트리 대여/반납, 업로드 해시(_track_upload), 세션별 결과 저장소 SQLite 연결과 기록,
+근사 중복 검색/추가(--dedup), LLaVA 선행 분석(--speculative), 트리아지(--triage)가 모두 측정에 포함됩니다.
+
+동시 세션 수를 단계적으로 늘리며 단계별 지연 시간 백분위수, 처리량, 오류율, 시간에 따른 RSS 변화를 측정해
+포화 지점과 메모리 누수를 찾습니다. LLaVA 호출은 로컬 가짜 Ollama 서버(benchmarks.fake_ollama)로 보내고,
+비전 모델은 무작위 초기화 모델, 결과 저장소는 임시 디렉토리를 사용합니다.
+
+사용 예:
+    python -m benchmarks.load_test --concurrency 1,2,4,8 --sessions-per-client 3 \\
+        --ollama-latency 2.0 --ollama-tokens-per-s 25 --chat-turns 2 --dedup --output load_results.json
+"""
+
+import argparse
+import contextlib
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+import ollama
+import streamlit
+
+from src.battery_analyzer import ai_analyzer, main_app
+from src.battery_analyzer.ai_analyzer import AIAnalyzer
+from src.battery_analyzer.config import DEDUP_CONFIG, MODEL_CONFIG, SPECULATIVE_CONFIG, TRIAGE_CONFIG
+from src.battery_analyzer.dedup_index import NearDuplicateIndex
+from src.battery_analyzer.model_registry import ModelRegistry
+from src.battery_analyzer.results_store import ResultsStore
+from src.battery_analyzer.speculative import SpeculativeAnalyzer
+
+from .common import (_current_rss_bytes, environment_info, make_random_vision_model, make_synthetic_ct,
+                     set_reproducible, summarize_latencies)
+from .fake_ollama import FakeOllamaServer
+
+# rerun: 스크립트 한 번 실행 전체 / 나머지: 해당 동작이 일어난 실행에서의 BatteryDefectAnalyzer 메서드 시간
+STAGES = ["rerun", "segmentation", "render", "analysis", "chat", "pdf"]
+
+# AIAnalyzer 가 오류 시 예외 대신 반환하는 문구
+_ERROR_OUTPUTS = {"분석 중 오류가 발생했습니다.", "답변 생성 중 오류가 발생했습니다."}
+
+_QUESTIONS = ["결함의 원인은 무엇인가요?", "이 셀을 계속 사용해도 되나요?", "추가로 확인할 부분이 있나요?"]
+
+
+class _Upload:
+    """st.file_uploader 결과를 흉내 내는 업로드 객체"""
+
+    def __init__(self, name: str, data: bytes):
+        self.name = name
+        self.size = len(data)
+        self._data = data
+
+    def getbuffer(self) -> memoryview:
+        return memoryview(self._data)
+
+
+class _SessionState(dict):
+    """st.session_state 처럼 속성 / 키로 접근하는 세션 상태"""
+
+    def __getattr__(self, key):
+        try:
+            return self[key]
+        except KeyError:
+            raise AttributeError(key)
+
+    def __setattr__(self, key, value):
+        self[key] = value
+
+    def __delattr__(self, key):
+        del self[key]
+
+
+class HeadlessStreamlit:
+    """main_app 의 st 대역 (세션 상태와 사용자 입력은 스레드별, 나머지는 bare 모드 Streamlit 에 위임)"""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def begin_run(self, state: _SessionState, upload: _Upload, clicks=(), chat_input: Optional[str] = None):
+        """이번 스크립트 실행의 세션 상태와 사용자 입력 지정"""
+        local = self._local
+        local.state, local.upload, local.clicks, local.chat_input = state, upload, set(clicks), chat_input
+        local.errors, local.downloads = [], 0
+
+    @property
+    def run_errors(self) -> List[str]:
+        return self._local.errors
+
+    @property
+    def run_downloads(self) -> int:
+        return self._local.downloads
+
+    @property
+    def session_state(self) -> _SessionState:
+        return self._local.state
+
+    def file_uploader(self, label, *args, **kwargs):
+        return self._local.upload if "이미지" in label else None
+
+    def button(self, label, *args, **kwargs) -> bool:
+        return label in self._local.clicks
+
+    def chat_input(self, *args, **kwargs) -> Optional[str]:
+        return self._local.chat_input
+
+    def download_button(self, *args, **kwargs) -> bool:
+        self._local.downloads += 1
+        return False
+
+    def error(self, body, *args, **kwargs):
+        self._local.errors.append(str(body))
+
+    def rerun(self):
+        raise RuntimeError("헤드리스 실행에서는 st.rerun 을 사용할 수 없습니다.")
+
+    def __getattr__(self, name):
+        return getattr(streamlit, name)
+
+
+class _TimedAnalyzer(main_app.BatteryDefectAnalyzer):
+    """단계 메서드 시간을 기록하는 BatteryDefectAnalyzer (기록할 단계는 실행마다 지정)"""
+
+    def __init__(self, record: set, font_path: Optional[str]):
+        super().__init__()
+        if font_path:
+            self.pdf_generator.font_path = font_path
+        self.record = record
+        self.timings: Dict[str, float] = {}
+        self.image_path: Optional[str] = None
+
+    def _timed(self, stage: str, method, *args):
+        start = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            if stage in self.record:
+                self.timings[stage] = time.perf_counter() - start
+
+    def _process_uploaded_image(self, uploaded_file):
+        self.image_path = self._timed("segmentation", super()._process_uploaded_image, uploaded_file)
+        return self.image_path
+
+    def _display_results(self, image_path):
+        return self._timed("render", super()._display_results, image_path)
+
+    def _handle_ai_analysis(self, image_path, mask_path):
+        return self._timed("analysis", super()._handle_ai_analysis, image_path, mask_path)
+
+    def _handle_chat(self, image_path, mask_path):
+        return self._timed("chat", super()._handle_chat, image_path, mask_path)
+
+    def _handle_pdf_generation(self, image_path, mask_path):
+        return self._timed("pdf", super()._handle_pdf_generation, image_path, mask_path)
+
+
+class _HarnessResources:
+    """main_app 의 공유 자원(모델 레지스트리, 선행 분석기, 근사 중복 색인)과 결과 저장소 경로를 부하 테스트용으로 교체"""
+
+    def __init__(self, results_dir: str):
+        store_dir = results_dir
+
+        class _Store(ResultsStore):
+            def __init__(self, root_dir: str = store_dir, **kwargs):
+                super().__init__(root_dir, **kwargs)
+
+        spec = {"name": "load-test", "path": MODEL_CONFIG["path"], "backbone": MODEL_CONFIG["backbone"],
+                "num_classes": MODEL_CONFIG["num_classes"]}
+        self.registry = ModelRegistry(models=[spec], loader=lambda spec: make_random_vision_model())
+        self.speculative = SpeculativeAnalyzer(AIAnalyzer())
+        self.dedup_index = NearDuplicateIndex(_Store())
+        self.store_class = _Store
+        self.st = HeadlessStreamlit()
+        self._originals = {}
+
+    def __enter__(self) -> "_HarnessResources":
+        replacements = {
+            "st": self.st,
+            "ResultsStore": self.store_class,
+            "_shared_model_registry": lambda: self.registry,
+            "_shared_speculative_analyzer": lambda: self.speculative,
+            "_shared_dedup_index": lambda: self.dedup_index,
+        }
+        for name, value in replacements.items():
+            self._originals[name] = getattr(main_app, name)
+            setattr(main_app, name, value)
+        return self
+
+    def __exit__(self, *exc):
+        for name, value in self._originals.items():
+            setattr(main_app, name, value)
+        self.speculative.shutdown()
+        self.dedup_index.results_store.close()
+
+
+@contextlib.contextmanager
+def use_fake_ollama(server: FakeOllamaServer):
+    """AIAnalyzer 의 ollama 호출을 가짜 서버로 연결 (하위 프로세스용 OLLAMA_HOST 도 설정)"""
+    original_module, original_host = ai_analyzer.ollama, os.environ.get("OLLAMA_HOST")
+    os.environ["OLLAMA_HOST"] = server.host
+    ai_analyzer.ollama = ollama.Client(host=server.url)
+    try:
+        yield
+    finally:
+        ai_analyzer.ollama = original_module
+        if original_host is None:
+            os.environ.pop("OLLAMA_HOST", None)
+        else:
+            os.environ["OLLAMA_HOST"] = original_host
+
+
+class RSSTimeline:
+    """일정 간격으로 (경과 시간, RSS, 완료 세션 수) 기록"""
+
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self.samples: List[Dict] = []
+        self.completed = 0
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> "RSSTimeline":
+        self._start = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.sample()
+
+    def mark_completed(self):
+        with self._lock:
+            self.completed += 1
+
+    def sample(self):
+        self.samples.append({"t": time.perf_counter() - self._start,
+                             "rss_mb": _current_rss_bytes() / 1024 ** 2,
+                             "sessions": self.completed})
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.sample()
+            self._stop.wait(self.interval)
+
+    def growth_per_100_sessions(self) -> Optional[float]:
+        """완료 세션 수 대비 RSS 증가 기울기 (MB / 100 세션, 최소제곱)"""
+        points = [(s["sessions"], s["rss_mb"]) for s in self.samples]
+        sessions = np.array([p[0] for p in points], dtype=np.float64)
+        if len(points) < 3 or np.ptp(sessions) == 0:
+            return None
+        slope = np.polyfit(sessions, [p[1] for p in points], 1)[0]
+        return float(slope * 100)
+
+
+class SessionDriver:
+    """한 검사자 세션을 BatteryDefectAnalyzer 스크립트 재실행으로 헤드리스 실행하는 클래스"""
+
+    def __init__(self, resources: _HarnessResources, image: np.ndarray, chat_turns: int,
+                 font_path: Optional[str]):
+        self.resources = resources
+        self.image = image
+        self.chat_turns = chat_turns
+        self.font_path = font_path
+        self.pdf_enabled = os.path.exists(font_path or main_app.PDFGenerator().font_path)
+        self.file_manager = main_app.FileManager()
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.latencies: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+        self.errors: Dict[str, int] = {stage: 0 for stage in STAGES}
+        self.sessions = {"completed": 0, "failed": 0}
+
+    def _upload(self, index: int) -> _Upload:
+        """세션마다 조금씩 다른 이미지 (같은 셀 재촬영처럼 근사 중복이지만 바이트는 다름)"""
+        rng = np.random.default_rng(index + 1)
+        noisy = np.clip(self.image.astype(np.int16) + rng.integers(-2, 3, self.image.shape), 0, 255)
+        ok, encoded = cv2.imencode(".png", noisy.astype(np.uint8))
+        return _Upload(f"cell_{index}.png", encoded.tobytes())
+
+    def _rerun(self, state: _SessionState, upload: _Upload, action: str, clicks=(),
+               chat_input: Optional[str] = None) -> _TimedAnalyzer:
+        """스크립트 한 번 실행 (action 단계 시간 기록, 예외 / 화면 오류는 action 단계 오류로 집계)"""
+        st = self.resources.st
+        st.begin_run(state, upload, clicks, chat_input)
+        start = time.perf_counter()
+        try:
+            app = _TimedAnalyzer({action} | ({"render"} if action == "segmentation" else set()), self.font_path)
+            app.run()
+            if st.run_errors:
+                raise RuntimeError(st.run_errors[0])
+        except Exception:
+            with self._lock:
+                self.errors[action] += 1
+            raise
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.latencies["rerun"].append(elapsed)
+            for stage, value in app.timings.items():
+                self.latencies[stage].append(value)
+        return app
+
+    def _fail(self, stage: str, message: str):
+        with self._lock:
+            self.errors[stage] += 1
+        raise RuntimeError(message)
+
+    def run_session(self, index: int) -> bool:
+        """업로드부터 PDF 보고서까지 한 세션 실행 (성공 여부 반환)"""
+        state, upload = _SessionState(), self._upload(index)
+        image_paths = []
+        try:
+            app = self._rerun(state, upload, "segmentation")
+            image_paths.append(app.image_path)
+            if state.get("generated_mask") is None:
+                self._fail("segmentation", "결함 탐지 실패")
+
+            app = self._rerun(state, upload, "analysis", clicks={"AI 분석 시작"})
+            image_paths.append(app.image_path)
+            if state.get("llava_output") in _ERROR_OUTPUTS or not state.get("llava_output"):
+                self._fail("analysis", "LLaVA 분석 실패")
+
+            for turn in range(self.chat_turns):
+                app = self._rerun(state, upload, "chat", chat_input=_QUESTIONS[turn % len(_QUESTIONS)])
+                image_paths.append(app.image_path)
+                if len(state.chat_history) != turn + 1 or state.chat_history[-1]["answer"] in _ERROR_OUTPUTS:
+                    self._fail("chat", "질의응답 실패")
+
+            if self.pdf_enabled and self.chat_turns:
+                app = self._rerun(state, upload, "pdf", clicks={"대화 종료 및 보고서 생성"})
+                image_paths.append(app.image_path)
+                if self.resources.st.run_downloads == 0:
+                    self._fail("pdf", "PDF 생성 실패")
+
+            with self._lock:
+                self.sessions["completed"] += 1
+            return True
+        except Exception:
+            with self._lock:
+                self.sessions["failed"] += 1
+            return False
+        finally:
+            # 앱은 재실행마다 업로드를 새 임시 파일로 저장하므로 세션 종료 시 함께 정리
+            self.file_manager.cleanup_temp_files(state.get("uploaded_files", []) + [p for p in image_paths if p])
+
+
+def run_step(driver: SessionDriver, timeline: RSSTimeline, concurrency: int, sessions: int,
+             first_index: int) -> Dict:
+    """동시 세션 concurrency 개로 sessions 건 실행하고 결과 요약"""
+    driver.reset()
+    rss_start = _current_rss_bytes() / 1024 ** 2
+    step_start = time.perf_counter()
+
+    def session(index: int):
+        driver.run_session(index)
+        timeline.mark_completed()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(session, range(first_index, first_index + sessions)))
+    wall = time.perf_counter() - step_start
+
+    total = driver.sessions["completed"] + driver.sessions["failed"]
+    return {
+        "concurrency": concurrency,
+        "sessions": total,
+        "wall_s": wall,
+        "throughput_sessions_per_min": driver.sessions["completed"] / wall * 60 if wall > 0 else 0.0,
+        "error_rate": driver.sessions["failed"] / total if total else 0.0,
+        "stage_errors": dict(driver.errors),
+        "stages": {stage: summarize_latencies(values) for stage, values in driver.latencies.items() if values},
+        "rss_start_mb": rss_start,
+        "rss_end_mb": _current_rss_bytes() / 1024 ** 2,
+    }
+
+
+def find_saturation(steps: List[Dict], min_gain: float = 0.10) -> Optional[int]:
+    """처리량 증가율이 min_gain 미만이 되는 첫 동시 세션 수"""
+    for previous, current in zip(steps, steps[1:]):
+        base = previous["throughput_sessions_per_min"]
+        if base <= 0 or current["throughput_sessions_per_min"] < base * (1 + min_gain):
+            return current["concurrency"]
+    return None
+
+
+def print_step(step: Dict):
+    print(f"\n👥 동시 세션 {step['concurrency']}: {step['sessions']}건, "
+          f"{step['throughput_sessions_per_min']:.2f} 세션/분, 오류율 {step['error_rate']:.1%}, "
+          f"RSS {step['rss_start_mb']:.0f} → {step['rss_end_mb']:.0f}MB")
+    print(f"   {'stage':<14}{'p50(ms)':>10}{'p95(ms)':>10}{'p99(ms)':>10}{'errors':>8}")
+    for stage in STAGES:
+        r = step["stages"].get(stage)
+        if r is None:
+            continue
+        print(f"   {stage:<14}{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}{r['p99_ms']:>10.1f}"
+              f"{step['stage_errors'][stage]:>8}")
+
+
+@contextlib.contextmanager
+def _pipeline_logs(verbose: bool):
+    """파이프라인 모듈의 진행 로그 출력 여부 (기본은 숨기고 요약만 출력)"""
+    if verbose:
+        yield
+        return
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def _quiet_streamlit():
+    """bare 모드 Streamlit 의 ScriptRunContext 없음 경고 숨김"""
+    streamlit.config.set_option("logger.level", "error")
+    streamlit.logger.set_log_level(logging.ERROR)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="분석 파이프라인 동시 세션 부하 테스트")
+    parser.add_argument("--concurrency", default="1,2,4,8", help="동시 세션 수 목록 (단계별로 증가)")
+    parser.add_argument("--sessions-per-client", type=int, default=3, help="단계별 동시 세션당 실행 세션 수")
+    parser.add_argument("--chat-turns", type=int, default=2, help="세션당 추가 질문 수")
+    parser.add_argument("--size", type=int, default=1024, help="합성 CT 이미지 해상도")
+    parser.add_argument("--ollama-latency", type=float, default=1.0, help="가짜 Ollama 첫 토큰 지연 (초)")
+    parser.add_argument("--ollama-tokens-per-s", type=float, default=30.0, help="가짜 Ollama 토큰 생성 속도")
+    parser.add_argument("--ollama-tokens", type=int, default=200, help="가짜 Ollama 응답 토큰 수")
+    parser.add_argument("--ollama-parallel", type=int, default=1, help="가짜 Ollama 동시 처리 수")
+    parser.add_argument("--triage", action="store_true", help="고신뢰 정상 셀은 LLaVA 분석 생략")
+    parser.add_argument("--speculative", action="store_true", help="세그멘테이션 직후 LLaVA 분석 선행 시작")
+    parser.add_argument("--dedup", action="store_true", help="근사 중복 검색/색인 추가")
+    parser.add_argument("--font", default=None, help="PDF 보고서용 TTF 폰트 경로 (없으면 PDF 단계 생략)")
+    parser.add_argument("--rss-interval", type=float, default=0.5, help="RSS 샘플링 간격 (초)")
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--verbose", action="store_true", help="파이프라인 로그 출력")
+    parser.add_argument("--output", default=None, help="결과 JSON 경로")
+    args = parser.parse_args(argv)
+
+    set_reproducible(0, args.threads)
+    _quiet_streamlit()
+    TRIAGE_CONFIG["enabled"] = args.triage
+    SPECULATIVE_CONFIG["enabled"] = args.speculative
+    DEDUP_CONFIG["enabled"] = args.dedup
+
+    results_dir = tempfile.mkdtemp(prefix="load_test_results_")
+    resources = _HarnessResources(results_dir)
+    driver = SessionDriver(resources, make_synthetic_ct(args.size), args.chat_turns, args.font)
+    if not driver.pdf_enabled:
+        print(f"⚠️ 한국어 폰트가 없어 PDF 단계를 생략합니다: {args.font or main_app.PDFGenerator().font_path} "
+              f"(--font 로 지정)")
+
+    server = FakeOllamaServer(args.ollama_latency, args.ollama_tokens_per_s, args.ollama_tokens,
+                              args.ollama_parallel).start()
+    timeline = RSSTimeline(args.rss_interval)
+    steps = []
+    try:
+        with use_fake_ollama(server), resources:
+            with _pipeline_logs(args.verbose):
+                driver.run_session(-1)  # 워밍업 (모델/폰트 캐시, RSS 기록 전)
+            timeline.start()
+            index = 0
+            for concurrency in [int(c) for c in args.concurrency.split(",") if c]:
+                sessions = concurrency * args.sessions_per_client
+                with _pipeline_logs(args.verbose):
+                    step = run_step(driver, timeline, concurrency, sessions, index)
+                index += sessions
+                steps.append(step)
+                print_step(step)
+    finally:
+        timeline.stop()
+        server.stop()
+        stored = ResultsStore(results_dir)
+        stored_results = stored.count()
+        stored.close()
+        shutil.rmtree(results_dir, ignore_errors=True)
+
+    saturation = find_saturation(steps)
+    growth = timeline.growth_per_100_sessions()
+    rss_values = [s["rss_mb"] for s in timeline.samples]
+    print(f"\n📈 포화 지점: {'동시 세션 ' + str(saturation) if saturation else '측정 범위 내 없음'}")
+    print(f"🧠 RSS: 시작 {rss_values[0]:.0f}MB, 최고 {max(rss_values):.0f}MB, 종료 {rss_values[-1]:.0f}MB, "
+          f"증가율 {'-' if growth is None else f'{growth:.2f}MB / 100세션'}")
+    print(f"🦙 가짜 Ollama: 요청 {server.stats['requests']}건, 최대 대기 {server.stats['peak_waiting']}건")
+    print(f"📚 결과 저장소: {stored_results}건 기록, 근사 중복 색인 {len(resources.dedup_index)}건")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"environment": environment_info(), "config": vars(args), "steps": steps,
+                       "saturation_concurrency": saturation, "rss_growth_mb_per_100_sessions": growth,
+                       "rss_timeline": timeline.samples, "ollama": server.stats,
+                       "stored_results": stored_results, "dedup_index_entries": len(resources.dedup_index)},
+                      f, indent=2, ensure_ascii=False)
+        print(f"💾 결과 저장: {args.output}")
+    return 1 if any(step["error_rate"] > 0 for step in steps) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,221 @@
+"""
+세그멘테이션 / 렌더링 / 분석 / 보고서 경로 벤치마크
+
+사용 예:
+    python -m benchmarks.run_benchmarks --sizes 512,1024,2048 --output bench_results.json
+    python -m benchmarks.run_benchmarks --baseline benchmarks/baseline.json
+    python -m benchmarks.run_benchmarks --save-baseline --output bench_results.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+import cv2
+
+from src.battery_analyzer.ai_analyzer import AIAnalyzer
+from src.battery_analyzer.config import COLORS_AND_LABELS
+from src.battery_analyzer.image_processor import ImageProcessor
+from src.battery_analyzer.pdf_generator import PDFGenerator
+from src.battery_analyzer.ui_components import UIComponents
+
+from .common import (environment_info, make_random_vision_model, measure, set_reproducible,
+                     stub_ollama, write_synthetic_images)
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+STAGES = ["segmentation", "render", "analyzer", "report"]
+
+
+# =============================================================================
+# 단계별 작업
+# =============================================================================
+
+def _render(image_path: str, mask, mask_path: str, overlay_path: Optional[str] = None):
+    """_display_results 와 동일한 렌더링 경로"""
+    img = cv2.imread(image_path, cv2.IMREAD_COLOR)
+    img_display = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    colored_mask = ImageProcessor.create_colored_mask(mask)
+    colored_mask_resized = cv2.resize(colored_mask, (img.shape[1], img.shape[0]))
+    overlay = ImageProcessor.create_overlay(img_display, colored_mask_resized)
+    UIComponents.make_legend_img(COLORS_AND_LABELS)
+    cv2.imwrite(mask_path, colored_mask_resized)
+    if overlay_path:
+        cv2.imwrite(overlay_path, overlay)
+
+
+def _report(pdf_generator: PDFGenerator, image_path: str, mask_path: str, overlay_path: str):
+    """PDF 보고서 생성 (실패 시 예외)"""
+    chat_history = [{"question": "결함의 원인은?", "answer": "스텁 답변입니다."}] * 3
+    tmp_file = pdf_generator.create_report(
+        image_path, mask_path, overlay_path, "스텁 분석 결과입니다. " * 40, chat_history
+    )
+    if tmp_file is None:
+        raise RuntimeError("PDF 생성 실패")
+    os.remove(tmp_file)
+
+
+def run_benchmarks(sizes: List[int], stages: List[str], iterations: int, warmup: int,
+                   work_dir: str, font_path: Optional[str] = None,
+                   ollama_latency: float = 0.0) -> Dict[str, Dict]:
+    """모든 단계 벤치마크 실행"""
+    os.makedirs("./temp", exist_ok=True)  # PDFGenerator 범례 임시 파일 위치
+    image_paths = write_synthetic_images(os.path.join(work_dir, "images"), sizes)
+    vision_model = make_random_vision_model()
+    analyzer = AIAnalyzer()
+    pdf_generator = PDFGenerator()
+    if font_path:
+        pdf_generator.font_path = font_path
+    # 한글 폰트가 없으면 PDF 생성이 항상 실패하므로 보고서 단계는 오류가 아니라 생략으로 기록
+    skip_report = "report" in stages and not os.path.exists(pdf_generator.font_path)
+    if skip_report:
+        print(f"⏭️  report 단계 생략: 폰트 없음 ({pdf_generator.font_path}), --font 로 지정")
+
+    results = {}
+    for size, image_path in image_paths.items():
+        _, mask = vision_model.predict(image_path)
+        mask_path = os.path.join(work_dir, f"mask_{size}.png")
+        overlay_path = os.path.join(work_dir, f"overlay_{size}.png")
+        _render(image_path, mask, mask_path, overlay_path)
+
+        jobs = {
+            "segmentation": lambda: vision_model.predict(image_path),
+            "render": lambda: _render(image_path, mask, mask_path),
+            "analyzer": lambda: analyzer.analyze_image(
+                image_path, mask_path, "Detected defects: Swelling", "defect_analysis"
+            ),
+            "report": lambda: _report(pdf_generator, image_path, mask_path, overlay_path),
+        }
+        for stage in stages:
+            name = f"{stage}@{size}"
+            if stage == "report" and skip_report:
+                results[name] = {"skipped": "no --font"}
+                continue
+            print(f"⏱️  {name} 측정 중...")
+            try:
+                with stub_ollama(ollama_latency):
+                    results[name] = measure(jobs[stage], iterations, warmup)
+            except Exception as e:
+                print(f"❌ {name} 실패: {e}")
+                results[name] = {"error": str(e)}
+    return results
+
+
+# =============================================================================
+# 기준선 비교
+# =============================================================================
+
+def compare_with_baseline(results: Dict[str, Dict], baseline: Dict[str, Dict],
+                          latency_threshold: float, memory_threshold: float,
+                          min_latency_ms: float = 1.0, min_memory_mb: float = 1.0) -> List[str]:
+    """기준선 대비 회귀 항목 목록 반환 (임계값은 상대 비율)"""
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if not base or any(key in entry for entry in (base, current) for key in ("error", "skipped")):
+            continue
+        checks = [
+            ("p50_ms", latency_threshold, min_latency_ms),
+            ("p95_ms", latency_threshold, min_latency_ms),
+            ("peak_traced_mb", memory_threshold, min_memory_mb),
+        ]
+        for metric, threshold, min_delta in checks:
+            if metric not in base or metric not in current:
+                continue
+            delta = current[metric] - base[metric]
+            if delta > min_delta and base[metric] > 0 and delta / base[metric] > threshold:
+                regressions.append(
+                    f"{name} {metric}: {base[metric]:.2f} → {current[metric]:.2f} "
+                    f"(+{delta / base[metric] * 100:.1f}%, 허용 {threshold * 100:.0f}%)"
+                )
+    return regressions
+
+
+def print_table(results: Dict[str, Dict]):
+    """결과 요약 표 출력"""
+    print(f"{'stage':<22}{'p50(ms)':>10}{'p95(ms)':>10}{'p99(ms)':>10}{'ops/s':>10}{'peak(MB)':>10}")
+    for name, r in results.items():
+        if "skipped" in r:
+            print(f"{name:<22}  skipped ({r['skipped']})")
+            continue
+        if "error" in r:
+            print(f"{name:<22}  ERROR: {r['error']}")
+            continue
+        print(f"{name:<22}{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}{r['p99_ms']:>10.2f}"
+              f"{r['throughput_per_s']:>10.2f}{r['peak_traced_mb']:>10.2f}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="배터리 결함 분석 파이프라인 벤치마크")
+    parser.add_argument("--sizes", default="512,1024,2048", help="합성 이미지 해상도 목록")
+    parser.add_argument("--stages", default=",".join(STAGES), help="측정할 단계 목록")
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=None, help="torch 스레드 수 고정")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--font", default=None, help="PDF 보고서용 TTF 폰트 경로")
+    parser.add_argument("--ollama-latency", type=float, default=0.0, help="Ollama 스텁 응답 지연(초)")
+    parser.add_argument("--output", default=None, help="결과 JSON 경로 (기본 bench_results.json)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="비교할 기준선 JSON 경로")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="결과를 기준선으로 저장 (비교 생략, --output 도 지정하면 두 곳 모두 저장)")
+    parser.add_argument("--latency-threshold", type=float, default=0.15, help="허용 지연 증가 비율")
+    parser.add_argument("--memory-threshold", type=float, default=0.20, help="허용 메모리 증가 비율")
+    args = parser.parse_args(argv)
+
+    set_reproducible(args.seed, args.threads)
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    stages = [s for s in args.stages.split(",") if s]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"알 수 없는 단계: {', '.join(sorted(unknown))}")
+
+    with tempfile.TemporaryDirectory(prefix="battery_bench_") as work_dir:
+        results = run_benchmarks(sizes, stages, args.iterations, args.warmup, work_dir,
+                                 args.font, args.ollama_latency)
+
+    print_table(results)
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "environment": environment_info(),
+        "config": {"sizes": sizes, "iterations": args.iterations, "warmup": args.warmup,
+                   "seed": args.seed, "ollama_latency": args.ollama_latency},
+        "results": results,
+    }
+    outputs = [args.baseline] if args.save_baseline else []
+    if args.output or not args.save_baseline:
+        outputs.append(args.output or "bench_results.json")
+    for output in outputs:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"💾 결과 저장: {output}")
+
+    if args.save_baseline:
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"⚠️ 기준선 없음, 비교 생략: {args.baseline} (--save-baseline 으로 저장)")
+        return 0
+    with open(args.baseline, encoding="utf-8") as f:
+        stored = json.load(f)
+    baseline = stored["results"]
+    # 다른 환경에서 저장한 기준선은 절대 지연 시간 비교가 의미 없으므로 경고
+    mismatched = [key for key in ("processor", "cpu_count", "torch", "torch_threads")
+                  if stored.get("environment", {}).get(key) != report["environment"].get(key)]
+    if mismatched:
+        print(f"⚠️ 기준선과 실행 환경이 다릅니다 ({', '.join(mismatched)}), "
+              f"이 환경에서 --save-baseline 으로 다시 저장하는 것을 권장합니다")
+    regressions = compare_with_baseline(results, baseline, args.latency_threshold, args.memory_threshold)
+    if regressions:
+        print("❌ 성능 회귀 감지:")
+        for line in regressions:
+            print(f"  - {line}")
+        return 1
+    print("✅ 기준선 대비 회귀 없음")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -10,6 +10,18 @@ from .ui_components import UIComponents
 from .file_manager import FileManager
 from .ai_analyzer import AIAnalyzer
 from .pdf_generator import PDFGenerator
+from .profiler import RequestProfiler
+from .cpu_tuner import CPUAutoTuner
+from .triage import TriagePolicy
+from .volume_processor import VolumeReader, VolumeProcessor
+from .results_store import ResultsStore
+from .model_registry import ModelRegistry
+from .cascade import CascadeSegmenter
+from .speculative import SpeculativeAnalyzer
+from .distributed_batch import DistributedBatch
+from .dedup_index import NearDuplicateIndex
+from .folder_watcher import FolderWatcher
+from .server import InferenceService
 from .main_app import BatteryDefectAnalyzer
 
 __version__ = "1.0.0"
@@ -23,5 +35,18 @@ __all__ = [
     "FileManager",
     "AIAnalyzer",
     "PDFGenerator",
+    "RequestProfiler",
+    "CPUAutoTuner",
+    "TriagePolicy",
+    "VolumeReader",
+    "VolumeProcessor",
+    "ResultsStore",
+    "ModelRegistry",
+    "CascadeSegmenter",
+    "SpeculativeAnalyzer",
+    "DistributedBatch",
+    "NearDuplicateIndex",
+    "FolderWatcher",
+    "InferenceService",
     "BatteryDefectAnalyzer"
 ] 
\ No newline at end of file
@@ -0,0 +1,112 @@
+"""
+계단식(coarse-to-fine) 세그멘테이션 모듈
+- 1단계: 전체 이미지를 모델 입력 크기로 축소해 한 번 예측 (저해상도)
+- 2단계: 결함 후보(클래스 2~4) 주변 타일만 원본 해상도로 잘라 배치 예측 후 레이블 맵에 붙여넣기
+"""
+
+import time
+from typing import Dict, List, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+from .config import CASCADE_CONFIG, MODEL_CONFIG
+
+
+class CascadeSegmenter:
+    """저해상도 전체 예측 + 결함 후보 영역의 원본 해상도 재예측 클래스"""
+
+    def __init__(self, vision_model, config: Optional[Dict] = None):
+        self.vision_model = vision_model
+        self.config = {**CASCADE_CONFIG, **(config or {})}
+
+    # =========================================================================
+    # 타일 배치
+    # =========================================================================
+
+    def tile_grid(self, height: int, width: int) -> List[Tuple[int, int, int, int, int, int]]:
+        """원본 해상도 타일 목록 (core_y0, core_y1, core_x0, core_x1, window_y0, window_x0)
+
+        창(window)은 모델 입력 크기 그대로 잘라내고(리사이즈 없음), 가장자리 padding 을 제외한
+        중심(core) 영역만 붙여넣어 타일 경계의 문맥 부족을 피합니다.
+        """
+        tile_width, tile_height = MODEL_CONFIG["input_size"]
+        padding = self.config["tile_padding"]
+        tiles = []
+        for core_y0 in range(0, height, tile_height - 2 * padding):
+            core_y1 = min(core_y0 + tile_height - 2 * padding, height)
+            window_y0 = min(max(core_y0 - padding, 0), height - tile_height)
+            for core_x0 in range(0, width, tile_width - 2 * padding):
+                core_x1 = min(core_x0 + tile_width - 2 * padding, width)
+                window_x0 = min(max(core_x0 - padding, 0), width - tile_width)
+                tiles.append((core_y0, core_y1, core_x0, core_x1, window_y0, window_x0))
+        return tiles
+
+    def _predict_tiles(self, image: np.ndarray, tiles: List[Tuple], labels: np.ndarray):
+        """타일 창을 배치로 예측하여 중심 영역을 레이블 맵에 기록"""
+        tile_width, tile_height = MODEL_CONFIG["input_size"]
+        batch_size = self.config["batch_size"] or self.vision_model.batch_size
+        # 배치 단위로 잘라내어 원본 해상도 창이 한꺼번에 메모리에 올라가지 않도록 함
+        for start in range(0, len(tiles), batch_size):
+            chunk = tiles[start:start + batch_size]
+            windows = [image[wy:wy + tile_height, wx:wx + tile_width] for _, _, _, _, wy, wx in chunk]
+            masks = self.vision_model.predict_batch(windows, batch_size)
+            for (cy0, cy1, cx0, cx1, wy, wx), mask in zip(chunk, masks):
+                labels[cy0:cy1, cx0:cx1] = mask[cy0 - wy:cy1 - wy, cx0 - wx:cx1 - wx]
+
+    # =========================================================================
+    # 예측
+    # =========================================================================
+
+    def segment(self, image_source: Union[str, bytes, np.ndarray]) -> Tuple[np.ndarray, np.ndarray, Dict]:
+        """계단식 예측, (모델 입력 크기 RGB 이미지, 원본 해상도 uint8 레이블 맵, 보고서) 반환"""
+        start = time.perf_counter()
+        image = self.vision_model.load_image(image_source)
+        height, width = image.shape[:2]
+
+        # 1단계: 저해상도 전체 예측
+        image_resized, coarse = self.vision_model.predict(image)
+        coarse = coarse.astype(np.uint8)
+        labels = cv2.resize(coarse, (width, height), interpolation=cv2.INTER_NEAREST)
+        coarse_ms = (time.perf_counter() - start) * 1000
+
+        # 결함 후보 영역 (저해상도에서 팽창 후 원본 크기로 확대)
+        candidates = np.isin(coarse, self.config["defect_classes"]).astype(np.uint8)
+        if self.config["roi_dilation"] > 0:
+            kernel = np.ones((2 * self.config["roi_dilation"] + 1,) * 2, dtype=np.uint8)
+            candidates = cv2.dilate(candidates, kernel)
+        candidates = cv2.resize(candidates, (width, height), interpolation=cv2.INTER_NEAREST)
+
+        # 2단계: 후보와 겹치는 타일만 원본 해상도로 재예측
+        tile_width, tile_height = MODEL_CONFIG["input_size"]
+        tiles = []
+        all_tiles = []
+        if height >= tile_height and width >= tile_width:
+            all_tiles = self.tile_grid(height, width)
+            tiles = [tile for tile in all_tiles if candidates[tile[0]:tile[1], tile[2]:tile[3]].any()]
+        refine_start = time.perf_counter()
+        if tiles:
+            self._predict_tiles(image, tiles, labels)
+        refine_ms = (time.perf_counter() - refine_start) * 1000
+
+        refined_pixels = sum((cy1 - cy0) * (cx1 - cx0) for cy0, cy1, cx0, cx1, _, _ in tiles)
+        report = {
+            "image_size": (width, height),
+            "coarse_ms": coarse_ms,
+            "refine_ms": refine_ms,
+            "total_ms": (time.perf_counter() - start) * 1000,
+            "candidate_fraction": float(candidates.mean()),
+            "tiles_refined": len(tiles),
+            "tiles_total": len(all_tiles),
+            "refined_fraction": refined_pixels / float(height * width),
+        }
+        print(f"🔎 계단식 예측: 타일 {len(tiles)}/{len(all_tiles)}개 재예측 "
+              f"({report['refined_fraction']:.1%} 픽셀, {report['total_ms']:.0f}ms)")
+        return image_resized, labels, report
+
+    def segment_full(self, image_source: Union[str, bytes, np.ndarray]) -> np.ndarray:
+        """비교 기준: 모든 타일을 원본 해상도로 예측한 레이블 맵"""
+        image = self.vision_model.load_image(image_source)
+        height, width = image.shape[:2]
+        labels = np.zeros((height, width), dtype=np.uint8)
+        self._predict_tiles(image, self.tile_grid(height, width), labels)
+        return labels
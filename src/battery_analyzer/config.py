@@ -12,12 +12,155 @@ ENV_VARS = {
     "OLLAMA_GPU_MEMORY_UTILIZATION": "0.8"
 }
 
+def _env_int(name: str):
+    """정수 환경 변수 읽기 (미설정 시 None)"""
+    value = os.environ.get(name)
+    return int(value) if value else None
+
 # 모델 설정
+# num_threads / interop_threads / batch_size 를 지정하면 CPU 자동 튜닝 대신 수동 설정을 사용
+# (환경 변수 BATTERY_NUM_THREADS / BATTERY_INTEROP_THREADS / BATTERY_BATCH_SIZE 로도 지정 가능)
 MODEL_CONFIG = {
     "path": "models/best_deeplabv3_efficientnet_model.pth",
     "num_classes": 5,
     "backbone": "efficientnet-b0",
-    "input_size": (256, 256)
+    "input_size": (256, 256),
+    "num_threads": _env_int("BATTERY_NUM_THREADS"),
+    "interop_threads": _env_int("BATTERY_INTEROP_THREADS"),
+    "batch_size": _env_int("BATTERY_BATCH_SIZE"),
+    "autotune": os.environ.get("BATTERY_AUTOTUNE", "1") == "1",
+    # 고속 전처리 (축소 디코딩 + 재사용 버퍼), 1 이면 사용
+    # 고해상도 이미지에서는 기존 cv2.resize 경로와 입력이 달라져 예측이 바뀔 수 있으므로 기본은 끔
+    "fast_preprocess": os.environ.get("BATTERY_FAST_PREPROCESS", "0") == "1",
+}
+
+# 테스트 시 증강(TTA) 설정
+# 변환: identity, hflip, vflip, rot90, rot180, rot270 (모든 뷰를 한 배치로 예측 후 로짓 평균)
+TTA_CONFIG = {
+    "enabled": os.environ.get("BATTERY_TTA", "0") == "1",
+    "transforms": [
+        name.strip() for name in os.environ.get("BATTERY_TTA_TRANSFORMS", "identity,hflip,vflip").split(",")
+        if name.strip()
+    ],
+}
+
+# 모델 레지스트리 설정
+# models 의 각 항목: name, path, backbone, num_classes, (선택) version
+# BATTERY_MODEL_REGISTRY 로 같은 형식의 JSON 파일을 지정하면 models 대신 사용
+MODEL_REGISTRY_CONFIG = {
+    "models": [
+        {
+            "name": "default",
+            "path": MODEL_CONFIG["path"],
+            "backbone": MODEL_CONFIG["backbone"],
+            "num_classes": MODEL_CONFIG["num_classes"],
+        },
+    ],
+    "default": os.environ.get("BATTERY_DEFAULT_MODEL"),
+    "registry_file": os.environ.get("BATTERY_MODEL_REGISTRY"),
+    "memory_budget_mb": float(os.environ.get("BATTERY_MODEL_MEMORY_MB", "1024")),
+    "watch_checkpoints": True,          # 체크포인트 파일이 갱신되면 자동 교체
+}
+
+# CPU 자동 튜닝 설정
+TUNING_CONFIG = {
+    "cache_path": "./cache/cpu_tuning.json",
+    "thread_candidates": None,          # None 이면 코어 수에 따라 자동 생성
+    "batch_candidates": [1, 2, 4, 8],
+    "iterations": 3,
+    "tolerance": 0.05,                  # 이 비율 이내면 더 적은 스레드를 선호
+}
+
+# 프로파일링 설정 (BATTERY_PROFILE=1 이면 sample_rate 비율의 요청을 캡처)
+PROFILING_CONFIG = {
+    "enabled": os.environ.get("BATTERY_PROFILE", "0") == "1",
+    "sample_rate": float(os.environ.get("BATTERY_PROFILE_SAMPLE_RATE", "1.0")),
+    "output_dir": os.environ.get("BATTERY_PROFILE_DIR", "./profiles"),
+    "top_n": int(os.environ.get("BATTERY_PROFILE_TOP_N", "15")),
+    "torch_trace": True,
+}
+
+# CT 볼륨 모드 설정
+VOLUME_CONFIG = {
+    "batch_size": None,                 # None 이면 비전 모델의 (튜닝된) 배치 크기 사용
+    "voxel_spacing": (1.0, 1.0, 1.0),   # (z, y, x) 복셀 간격
+}
+
+# 계단식(coarse-to-fine) 세그멘테이션 설정
+CASCADE_CONFIG = {
+    "enabled": os.environ.get("BATTERY_CASCADE", "0") == "1",
+    "defect_classes": [2, 3, 4],        # 원본 해상도로 재예측할 후보 클래스
+    "roi_dilation": 2,                  # 후보 영역 팽창 (저해상도 픽셀)
+    "tile_padding": 32,                 # 타일 창 가장자리 문맥 (원본 해상도 픽셀, 붙여넣지 않음)
+    "batch_size": None,                 # None 이면 비전 모델의 (튜닝된) 배치 크기 사용
+}
+
+# 분석 결과 저장소 설정
+RESULTS_CONFIG = {
+    "enabled": os.environ.get("BATTERY_RESULTS_STORE", "1") == "1",
+    "root_dir": os.environ.get("BATTERY_RESULTS_DIR", "./results_store"),
+    "segment_size_mb": 256,             # 마스크 세그먼트 파일 크기
+}
+
+# 근사 중복 이미지 재사용 설정 (64비트 dHash 해밍 거리, dedup_index.py)
+DEDUP_CONFIG = {
+    "enabled": os.environ.get("BATTERY_DEDUP", "0") == "1",  # 기본 꺼짐 (BATTERY_DEDUP=1 로 켜기)
+    "max_distance": int(os.environ.get("BATTERY_DEDUP_DISTANCE", "6")),  # 이 거리 이하이면 근사 중복 (0 ~ 64)
+    "merge_threshold": 4096,            # 꼬리 항목이 이 수에 도달하면 정렬 색인에 병합
+    "mask_agreement": 0.9,              # 결함 영역 픽셀 일치율이 이 값 이상이면 같은 마스크로 판단
+}
+
+# 핫 폴더 감시 설정 (folder_watcher.py)
+WATCHER_CONFIG = {
+    "poll_interval": 0.5,               # 폴더 mtime 확인 주기 (초)
+    "full_scan_interval": 60.0,         # mtime 갱신이 누락되는 네트워크 파일시스템 대비 전체 재조회 주기 (초)
+    "stable_seconds": 1.0,              # 크기/mtime 이 이 시간 동안 그대로면 기록 완료로 판단
+    "max_wait": 300.0,                  # 끝 표식이 없어도 이 시간이 지나면 처리 시도 (초)
+    "decode_retries": 3,                # 디코딩 실패 시 다시 안정화 대기하는 횟수
+    "queue_size": 16,                   # 처리 큐 크기 (가득 차면 준비된 파일은 디스크에서 대기)
+    "workers": 1,                       # 처리 스레드 수
+    "recursive": True,
+    "reprocess": False,                 # 판정 파일이 이미 있는 이미지도 다시 처리
+    "status_interval": 10.0,            # 상태 출력 주기 (초)
+    "patterns": ["*.png", "*.jpg", "*.jpeg", "*.tif", "*.tiff", "*.bmp"],
+    "mask_suffix": ".mask.png",
+    "verdict_suffix": ".verdict.json",
+}
+
+# 로컬 HTTP 추론 서비스 설정
+SERVER_CONFIG = {
+    "host": os.environ.get("BATTERY_SERVER_HOST", "127.0.0.1"),
+    "port": int(os.environ.get("BATTERY_SERVER_PORT", "8765")),
+    "max_concurrency": 2,               # 동시 세그멘테이션 수
+    "llm_concurrency": 1,               # 동시 LLaVA 분석 수
+    "max_pending": 32,                  # 대기 요청 상한 (초과 시 503)
+    "max_body_mb": 64,                  # 요청 본문 크기 상한
+}
+
+# LLM 트리아지 설정 (고신뢰 정상 셀은 LLaVA 호출 없이 템플릿 판정)
+TRIAGE_CONFIG = {
+    "enabled": os.environ.get("BATTERY_TRIAGE", "1") == "1",
+    "normal_confidence": 0.90,          # 이미지 전체 평균 최대 확률 하한
+    "min_class_confidence": 0.85,       # 배경/배터리 클래스별 평균 확률 하한
+    "uncertain_threshold": 0.60,        # 이 확률 미만 픽셀은 불확실로 간주
+    "max_uncertain_fraction": 0.02,     # 불확실 픽셀 비율 상한
+}
+
+# LLaVA 분석 선행 실행 설정 (세그멘테이션 직후 백그라운드에서 분석 시작)
+SPECULATIVE_CONFIG = {
+    "enabled": os.environ.get("BATTERY_SPECULATIVE", "0") == "1",
+    "max_workers": 1,                   # 동시 선행 분석 수 (Ollama 처리 용량에 맞춤)
+    "work_dir": "./temp/speculative",   # 작업별 입력 파일 사본 위치
+    # 버튼 클릭 후 실행 중인 선행 분석을 기다리는 최대 시간 (초), 초과하면 직접 분석
+    "result_timeout": float(os.environ.get("BATTERY_SPECULATIVE_TIMEOUT", "300")),
+}
+
+# 분산 배치 설정 (공유 파일시스템 기반, distributed_batch.py)
+DISTRIBUTED_CONFIG = {
+    "shard_size": 50,                   # 샤드당 이미지 수
+    "lease_ttl": 120.0,                 # heartbeat 없이 이 시간(초)이 지나면 다른 작업자가 회수
+    "poll_interval": 5.0,               # 남은 샤드가 모두 점유 중일 때 재확인 간격 (초)
+    "patterns": ["*.png", "*.jpg", "*.jpeg", "*.tif", "*.tiff", "*.bmp"],
 }
 
 # 결함 클래스 정의
@@ -0,0 +1,244 @@
+"""
+CPU 스레드 수 / 배치 크기 자동 튜닝 모듈
+"""
+
+import argparse
+import json
+import os
+import platform
+import time
+from typing import Dict, List, Optional
+
+import torch
+from .config import MODEL_CONFIG, TUNING_CONFIG
+
+# configure_process() 로 프로세스 시작 시 적용한 스레드 설정 (이후 모델 로드 보고서에 사용)
+_PROCESS_THREADS: Dict[str, int] = {}
+
+
+class CPUAutoTuner:
+    """세그멘테이션 모델의 CPU 실행 설정 자동 튜닝 클래스"""
+
+    def __init__(self, cache_path: str = TUNING_CONFIG["cache_path"]):
+        self.cache_path = cache_path
+
+    @staticmethod
+    def cpu_signature() -> Dict[str, object]:
+        """CPU 모델명과 코어 수"""
+        cpu_model = platform.processor() or platform.machine()
+        try:
+            with open("/proc/cpuinfo") as f:
+                for line in f:
+                    if line.startswith("model name"):
+                        cpu_model = line.split(":", 1)[1].strip()
+                        break
+        except OSError:
+            pass
+        cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+        return {"cpu_model": cpu_model, "cores": cores or 1}
+
+    @staticmethod
+    def batch_candidates() -> List[int]:
+        """튜닝할 배치 크기 목록 (배치 크기를 수동 지정하면 그 값만)"""
+        if MODEL_CONFIG.get("batch_size"):
+            return [int(MODEL_CONFIG["batch_size"])]
+        return list(TUNING_CONFIG["batch_candidates"])
+
+    def cache_key(self, vision_model) -> str:
+        """캐시 키 (CPU 모델명, 코어 수, 백본, 입력 크기, TTA 뷰 수, 배치 크기 후보)"""
+        signature = self.cpu_signature()
+        width, height = MODEL_CONFIG["input_size"]
+        views = len(getattr(vision_model, "tta_transforms", None) or []) or 1
+        batches = ",".join(str(b) for b in self.batch_candidates())
+        return (f"{signature['cpu_model']}|{signature['cores']}|{vision_model.backbone}|{width}x{height}"
+                f"|tta{views}|batch{batches}")
+
+    @staticmethod
+    def default_thread_candidates(cores: int) -> List[int]:
+        """1, 2, 4, ... 및 코어 수 절반/전체"""
+        candidates = {1, max(cores // 2, 1), cores}
+        n = 2
+        while n < cores:
+            candidates.add(n)
+            n *= 2
+        return sorted(candidates)
+
+    def _load_cache(self) -> Dict:
+        try:
+            with open(self.cache_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def load_cached(self, vision_model) -> Optional[Dict]:
+        """현재 CPU / 모델 구성에 대한 캐시된 설정"""
+        return self._load_cache().get(self.cache_key(vision_model))
+
+    def save_cache(self, settings: Dict, vision_model):
+        """현재 CPU / 모델 구성에 대한 설정 저장"""
+        cache = self._load_cache()
+        cache[self.cache_key(vision_model)] = settings
+        cache_dir = os.path.dirname(self.cache_path)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f"{self.cache_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(cache, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.cache_path)
+
+    def tune(self, vision_model, thread_candidates: Optional[List[int]] = None,
+             batch_candidates: Optional[List[int]] = None,
+             iterations: int = TUNING_CONFIG["iterations"],
+             tolerance: float = TUNING_CONFIG["tolerance"]) -> Dict:
+        """스레드 수 x 배치 크기 조합별 이미지당 지연 시간 측정 후 최적 설정 선택"""
+        if vision_model.model is None:
+            raise ValueError("모델이 로드되지 않았습니다.")
+
+        cores = self.cpu_signature()["cores"]
+        thread_candidates = thread_candidates or TUNING_CONFIG["thread_candidates"] \
+            or self.default_thread_candidates(cores)
+        batch_candidates = batch_candidates or self.batch_candidates()
+        width, height = MODEL_CONFIG["input_size"]
+        original_threads = torch.get_num_threads()
+
+        measurements = []
+        try:
+            for threads in thread_candidates:
+                torch.set_num_threads(threads)
+                for batch_size in batch_candidates:
+                    image_tensor = torch.randn(batch_size, 3, height, width, device=vision_model.device)
+                    with torch.no_grad():
+                        vision_model._forward(image_tensor)  # 워밍업
+                        start = time.perf_counter()
+                        for _ in range(iterations):
+                            vision_model._forward(image_tensor)
+                        elapsed = (time.perf_counter() - start) / iterations
+                    measurements.append({
+                        "threads": threads,
+                        "batch_size": batch_size,
+                        "batch_latency_ms": elapsed * 1000,
+                        "per_image_ms": elapsed * 1000 / batch_size,
+                    })
+                    print(f"⚙️ threads={threads} batch={batch_size}: {elapsed * 1000 / batch_size:.1f}ms/이미지")
+        finally:
+            torch.set_num_threads(original_threads)
+
+        # 최저 이미지당 지연 시간 대비 허용 범위 이내라면 스레드 수가 적은 설정을 선호
+        # (다른 세션 및 Ollama와 코어를 나눠 쓰기 위함)
+        best_per_image = min(m["per_image_ms"] for m in measurements)
+        acceptable = [m for m in measurements if m["per_image_ms"] <= best_per_image * (1 + tolerance)]
+        best = min(acceptable, key=lambda m: (m["threads"], m["per_image_ms"]))
+
+        # 같은 스레드 수에서 배치 1 지연 시간 (대화형 단일 이미지 요청용)
+        single = [m for m in measurements if m["threads"] == best["threads"] and m["batch_size"] == 1]
+        return {
+            "num_threads": best["threads"],
+            "interop_threads": 1,
+            "batch_size": best["batch_size"],
+            "per_image_ms": best["per_image_ms"],
+            "single_image_ms": single[0]["batch_latency_ms"] if single else None,
+            "measurements": measurements,
+            "tuned_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            **self.cpu_signature(),
+        }
+
+    @staticmethod
+    def apply(settings: Dict, vision_model=None):
+        """스레드 수 / 배치 크기 적용"""
+        if settings.get("num_threads"):
+            torch.set_num_threads(int(settings["num_threads"]))
+        if settings.get("interop_threads"):
+            try:
+                torch.set_num_interop_threads(int(settings["interop_threads"]))
+            except RuntimeError:
+                # 병렬 작업 시작 이후에는 변경할 수 없음 (프로세스당 1회)
+                pass
+        if vision_model is not None and settings.get("batch_size"):
+            vision_model.batch_size = int(settings["batch_size"])
+
+    def configure(self, vision_model, force: bool = False, tune: bool = True,
+                  apply_threads: bool = True) -> Dict:
+        """수동 설정 → 캐시 → 자동 튜닝 순으로 설정을 결정하고 적용
+
+        tune=False 이면 캐시가 없어도 측정하지 않고 기본 설정을 사용합니다.
+        apply_threads=False 이면 배치 크기만 적용합니다 (스레드 수는 configure_process() 에서 시작 시 한 번만).
+        """
+        overrides = {
+            key: MODEL_CONFIG.get(key)
+            for key in ("num_threads", "interop_threads", "batch_size")
+            if MODEL_CONFIG.get(key)
+        }
+        settings = None
+        source = "default"
+
+        if vision_model.device != "cpu":
+            source = "skipped (GPU)"
+        elif len(overrides) == 3:
+            source = "override"
+        elif not force and self.load_cached(vision_model):
+            settings = self.load_cached(vision_model)
+            source = "cache"
+        elif not tune:
+            source = "default (no tuning cache)"
+            print("⚙️ CPU 튜닝 캐시가 없습니다. 기본 설정을 사용합니다 "
+                  "(튜닝: python -m src.battery_analyzer.cpu_tuner)")
+        elif MODEL_CONFIG.get("autotune", True) or force:
+            print("⚙️ CPU 자동 튜닝 시작...")
+            settings = self.tune(vision_model)
+            self.save_cache(settings, vision_model)
+            source = "autotune"
+
+        applied = {key: value for key, value in (settings or {}).items()
+                   if key in ("num_threads", "interop_threads", "batch_size")}
+        applied.update(overrides)
+        if not apply_threads:
+            applied = {key: value for key, value in applied.items() if key == "batch_size"}
+        self.apply(applied, vision_model)
+
+        if apply_threads or not _PROCESS_THREADS:
+            threads = {"num_threads": torch.get_num_threads(), "interop_threads": torch.get_num_interop_threads()}
+        else:
+            threads = dict(_PROCESS_THREADS)
+        report = {
+            "source": source,
+            **threads,
+            "batch_size": vision_model.batch_size,
+            "overrides": sorted(overrides),
+            **self.cpu_signature(),
+        }
+        print(f"⚙️ CPU 설정 ({source}): threads={report['num_threads']}, "
+              f"interop={report['interop_threads']}, batch={report['batch_size']}")
+        return report
+
+    def configure_process(self, spec: Dict) -> Dict:
+        """요청을 처리하기 전 프로세스 시작 시 한 번: 수동/캐시 설정의 스레드 수를 적용 (측정하지 않음)
+
+        torch.set_num_threads() 는 서비스 중에 호출하면 다른 세션의 스레드 수까지 바뀌므로
+        이후 모델 로드에서는 configure(..., apply_threads=False) 로 배치 크기만 적용합니다.
+        """
+        from .vision_model import VisionModel
+
+        vision_model = VisionModel(spec["path"], spec["num_classes"], spec["backbone"])
+        report = self.configure(vision_model, tune=False)
+        _PROCESS_THREADS.update(num_threads=report["num_threads"], interop_threads=report["interop_threads"])
+        return report
+
+
+def main(argv: Optional[List[str]] = None):
+    """튜닝 결과를 강제로 갱신 (체크포인트가 없으면 무작위 가중치 사용)"""
+    from .vision_model import VisionModel
+
+    parser = argparse.ArgumentParser(description="CPU 스레드/배치 크기 자동 튜닝")
+    parser.add_argument("--cache", default=TUNING_CONFIG["cache_path"])
+    parser.add_argument("--model-path", default=MODEL_CONFIG["path"])
+    args = parser.parse_args(argv)
+
+    vision_model = VisionModel(args.model_path, MODEL_CONFIG["num_classes"], MODEL_CONFIG["backbone"])
+    if not (os.path.exists(args.model_path) and vision_model.load_model()):
+        vision_model.init_random_model()
+    report = CPUAutoTuner(args.cache).configure(vision_model, force=True)
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
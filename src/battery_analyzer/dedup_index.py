@@ -0,0 +1,214 @@
+"""
+근사 중복 이미지 색인 모듈
+- 64비트 dHash(차분 지각 해시)로 연속 CT 슬라이스 / 같은 셀 재촬영처럼 바이트는 달라도 거의 같은 이미지 검출
+- 다중 색인 해싱(multi-index hashing): 해시를 16비트 조각 4개로 나누어 조각별 정렬 색인에서 후보 검색
+  (해밍 거리 r 이내이면 적어도 한 조각은 거리 r // 4 이내 → 조각 이웃만 조회해도 누락 없음)
+- 후보는 numpy popcount 로 한 번에 검증, 최근 추가분은 작은 꼬리 배열에서 전수 비교 후 주기적으로 병합
+- 결과 저장소(ResultsStore)의 phash 컬럼과 ID 기준으로 증분 동기화
+- 9x8 dHash 는 국소 결함 차이를 구분하지 못하므로 후보는 재사용 근거가 아니라 비교 대상으로만 사용
+  (masks_match 로 새 마스크와 이전 마스크가 일치하는지 확인)
+"""
+
+import threading
+from itertools import combinations
+from typing import Dict, List, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+from .config import DEDUP_CONFIG
+
+# 해시 비트 수 / 조각 수 / 조각 비트 수
+_HASH_BITS = 64
+_CHUNKS = 4
+_CHUNK_BITS = _HASH_BITS // _CHUNKS
+_CHUNK_MASK = np.uint64((1 << _CHUNK_BITS) - 1)
+
+# popcount: numpy 2.0 이상은 내장 함수, 이전 버전은 바이트 조회 테이블
+_POPCOUNT_LUT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def _popcount(values: np.ndarray) -> np.ndarray:
+    """uint64 배열의 비트 수"""
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(values)
+    return _POPCOUNT_LUT[values.view(np.uint8)].reshape(-1, 8).sum(axis=1)
+
+
+def _flip_masks(radius: int) -> np.ndarray:
+    """조각 비트 중 radius 개 이하를 뒤집는 XOR 마스크 목록"""
+    masks = [0]
+    for r in range(1, radius + 1):
+        for bits in combinations(range(_CHUNK_BITS), r):
+            masks.append(sum(1 << b for b in bits))
+    return np.array(masks, dtype=np.uint64)
+
+
+class NearDuplicateIndex:
+    """dHash 해밍 거리 기반 근사 중복 색인 클래스"""
+
+    def __init__(self, results_store=None, max_distance: int = DEDUP_CONFIG["max_distance"],
+                 merge_threshold: int = DEDUP_CONFIG["merge_threshold"]):
+        self.results_store = results_store
+        self.max_distance = max_distance
+        self.merge_threshold = merge_threshold
+        self._lock = threading.Lock()
+        self._last_id = 0
+
+        # 정렬 색인 (병합된 항목)
+        self._ids = np.empty(0, dtype=np.int64)
+        self._hashes = np.empty(0, dtype=np.uint64)
+        self._chunk_sorted: List[np.ndarray] = []
+        self._chunk_order: List[np.ndarray] = []
+        self._build_tables()
+
+        # 꼬리 (최근 추가, 전수 비교)
+        self._tail_ids: List[int] = []
+        self._tail_hashes: List[int] = []
+
+    # =========================================================================
+    # 해시
+    # =========================================================================
+
+    @staticmethod
+    def dhash(image_source: Union[str, bytes, np.ndarray]) -> int:
+        """64비트 dHash (9x8 그레이스케일 축소 후 가로 방향 인접 픽셀 밝기 비교)"""
+        from .vision_model import VisionModel
+
+        image, layout = VisionModel.decode_reduced(image_source)
+        if layout == "bgr":
+            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        elif layout == "rgb":
+            gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+        else:
+            gray = image
+        small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA).astype(np.int16)
+        bits = (small[:, 1:] > small[:, :-1]).flatten()
+        return int(np.packbits(bits).view(">u8")[0])
+
+    @staticmethod
+    def distance(a: int, b: int) -> int:
+        return bin(a ^ b).count("1")
+
+    @staticmethod
+    def masks_match(mask: np.ndarray, other: np.ndarray,
+                    min_agreement: float = DEDUP_CONFIG["mask_agreement"]) -> bool:
+        """두 레이블 맵의 결함 클래스가 같고 결함 영역(둘 중 하나라도 결함인 픽셀) 일치율이 min_agreement 이상인지"""
+        other = np.asarray(other)
+        if other.shape != mask.shape:
+            other = cv2.resize(other, (mask.shape[1], mask.shape[0]), interpolation=cv2.INTER_NEAREST)
+        defects = (mask > 1) | (other > 1)
+        if set(np.unique(mask[mask > 1]).tolist()) != set(np.unique(other[other > 1]).tolist()):
+            return False
+        if not defects.any():
+            return True
+        return float((mask[defects] == other[defects]).mean()) >= min_agreement
+
+    # =========================================================================
+    # 추가 / 동기화
+    # =========================================================================
+
+    def __len__(self) -> int:
+        return len(self._ids) + len(self._tail_ids)
+
+    def add(self, result_id: int, phash: int):
+        with self._lock:
+            self._add_locked([result_id], [phash])
+
+    def add_many(self, result_ids: np.ndarray, phashes: np.ndarray):
+        with self._lock:
+            self._add_locked(list(result_ids), list(phashes))
+
+    def _add_locked(self, result_ids: List[int], phashes: List[int]):
+        self._tail_ids.extend(int(i) for i in result_ids)
+        self._tail_hashes.extend(int(h) for h in phashes)
+        if result_ids:
+            self._last_id = max(self._last_id, max(int(i) for i in result_ids))
+        if len(self._tail_ids) >= self.merge_threshold:
+            self._merge_tail()
+
+    def sync(self) -> int:
+        """저장소에서 마지막 동기화 이후 추가된 해시를 읽어 색인에 반영, 추가 수 반환"""
+        if self.results_store is None:
+            return 0
+        with self._lock:
+            ids, hashes = self.results_store.load_phashes(after_id=self._last_id)
+            self._add_locked(list(ids), list(hashes))
+        return len(ids)
+
+    def _merge_tail(self):
+        """꼬리 항목을 정렬 색인에 병합"""
+        if not self._tail_ids:
+            return
+        self._ids = np.concatenate([self._ids, np.array(self._tail_ids, dtype=np.int64)])
+        self._hashes = np.concatenate([self._hashes, np.array(self._tail_hashes, dtype=np.uint64)])
+        self._tail_ids, self._tail_hashes = [], []
+        self._build_tables()
+
+    def _build_tables(self):
+        """조각별 (정렬된 조각 값, 원래 위치) 색인 생성"""
+        self._chunk_sorted, self._chunk_order = [], []
+        for chunk in range(_CHUNKS):
+            values = (self._hashes >> np.uint64(chunk * _CHUNK_BITS)) & _CHUNK_MASK
+            order = np.argsort(values, kind="stable")
+            self._chunk_sorted.append(values[order])
+            self._chunk_order.append(order)
+
+    # =========================================================================
+    # 검색
+    # =========================================================================
+
+    def query(self, phash: int, max_distance: Optional[int] = None, limit: int = 5) -> List[Tuple[int, int]]:
+        """해밍 거리 max_distance 이내 항목을 가까운 순으로 (result_id, distance) 반환"""
+        max_distance = self.max_distance if max_distance is None else max_distance
+        query = np.uint64(phash)
+        with self._lock:
+            positions = self._candidates(query, max_distance)
+            ids = np.concatenate([self._ids[positions], np.array(self._tail_ids, dtype=np.int64)])
+            hashes = np.concatenate([self._hashes[positions], np.array(self._tail_hashes, dtype=np.uint64)])
+
+        distances = _popcount(hashes ^ query).astype(np.int64)
+        keep = distances <= max_distance
+        ids, distances = ids[keep], distances[keep]
+        # 같은 거리에서는 최신 결과(큰 ID) 우선
+        order = np.lexsort((-ids, distances))[:limit]
+        return [(int(ids[i]), int(distances[i])) for i in order]
+
+    def _candidates(self, query: np.uint64, max_distance: int) -> np.ndarray:
+        """정렬 색인에서 어떤 조각이 radius 이내인 항목 위치 (중복 제거)"""
+        if len(self._ids) == 0:
+            return np.empty(0, dtype=np.int64)
+        flips = _flip_masks(max_distance // _CHUNKS)
+        found = []
+        for chunk in range(_CHUNKS):
+            value = (query >> np.uint64(chunk * _CHUNK_BITS)) & _CHUNK_MASK
+            probes = value ^ flips
+            starts = np.searchsorted(self._chunk_sorted[chunk], probes, side="left")
+            lengths = np.searchsorted(self._chunk_sorted[chunk], probes, side="right") - starts
+            total = int(lengths.sum())
+            if total == 0:
+                continue
+            # 조회 구간들 [start, start + length) 를 반복문 없이 하나의 위치 배열로 펼침
+            offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+            found.append(self._chunk_order[chunk][offsets + np.arange(total)])
+        if not found:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate(found))
+
+    def find_similar(self, phash: int, model_version: Optional[str] = None,
+                     max_distance: Optional[int] = None) -> Optional[Dict]:
+        """같은 모델 버전의 가장 가까운 이전 결과 레코드 (distance 포함), 없으면 None"""
+        if self.results_store is None:
+            return None
+        self.sync()
+        # 거리 이내 전체 후보를 모델 버전으로 거른 뒤 가장 가까운 항목 선택 (앞쪽 몇 개만 보면 누락 가능)
+        hits = self.query(phash, max_distance, limit=len(self))
+        if model_version is not None and hits:
+            allowed = self.results_store.ids_with_version([result_id for result_id, _ in hits], model_version)
+            hits = [hit for hit in hits if hit[0] in allowed]
+        for result_id, distance in hits:
+            record = self.results_store.get_record(result_id)
+            if record is None:
+                continue
+            record["distance"] = distance
+            return record
+        return None
@@ -0,0 +1,507 @@
+"""
+공유 파일시스템 기반 분산 배치 검사 모듈
+- 브로커 없이 작업 폴더(공유 파일시스템)만으로 여러 호스트의 작업자가 샤드를 나누어 처리
+- 샤드 점유: O_EXCL 임대(lease) 파일 생성, 처리 중에는 mtime 갱신(heartbeat)
+- 만료된 임대(작업자 비정상 종료)는 원자적 rename 으로 회수 후 재점유
+- 샤드별 결과는 원자적으로 기록하고 마지막에 하나의 요약으로 병합
+
+작업 폴더 구성:
+    plan.json                 입력 목록/샤드 설정
+    shards/shard_00000.json   샤드별 입력 파일 목록
+    leases/shard_00000.lease  점유 중인 작업자 정보 (mtime = 마지막 heartbeat)
+    results/shard_00000.json  샤드 처리 결과
+    masks/                    (선택) 레이블 마스크 PNG
+    summary.json              병합 요약
+"""
+
+import argparse
+import fnmatch
+import glob
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+from .config import DEFECT_CLASSES, DISTRIBUTED_CONFIG, MODEL_CONFIG
+from .image_processor import ImageProcessor
+
+
+def _write_json_atomic(path: str, payload: Dict):
+    """임시 파일에 쓴 뒤 rename (읽는 쪽은 항상 완전한 파일만 봄)"""
+    tmp_path = f"{path}.tmp.{uuid.uuid4().hex}"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _read_json(path: str) -> Optional[Dict]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class ShardLease:
+    """샤드 임대 파일 (O_EXCL 생성으로 점유, mtime 갱신으로 heartbeat)"""
+
+    def __init__(self, path: str, token: str):
+        self.path = path
+        self.token = token
+
+    @classmethod
+    def try_acquire(cls, path: str, owner: Dict) -> Optional["ShardLease"]:
+        """임대 파일을 배타적으로 생성 (이미 있으면 None)"""
+        token = uuid.uuid4().hex
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            return None
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({**owner, "token": token, "acquired_at": time.time()}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        return cls(path, token)
+
+    def is_owned(self) -> bool:
+        """임대 파일이 아직 자신의 것인지 (회수되었으면 False)"""
+        info = _read_json(self.path)
+        return info is not None and info.get("token") == self.token
+
+    def heartbeat(self) -> bool:
+        if not self.is_owned():
+            return False
+        try:
+            os.utime(self.path)
+            return True
+        except OSError:
+            return False
+
+    def release(self):
+        if self.is_owned():
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+
+class LeaseHeartbeat:
+    """백그라운드에서 주기적으로 임대를 갱신하고, 임대를 잃으면 lost 를 설정"""
+
+    def __init__(self, lease: ShardLease, interval: float):
+        self.lease = lease
+        self.interval = interval
+        self.lost = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self) -> "LeaseHeartbeat":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            if not self.lease.heartbeat():
+                self.lost.set()
+                return
+
+
+class DistributedBatch:
+    """공유 작업 폴더의 샤드 계획 / 작업 / 병합 클래스"""
+
+    def __init__(self, job_dir: str):
+        self.job_dir = job_dir
+        self.shard_dir = os.path.join(job_dir, "shards")
+        self.lease_dir = os.path.join(job_dir, "leases")
+        self.result_dir = os.path.join(job_dir, "results")
+        self.mask_dir = os.path.join(job_dir, "masks")
+        self.plan_path = os.path.join(job_dir, "plan.json")
+
+    # =========================================================================
+    # 계획
+    # =========================================================================
+
+    def plan(self, input_dir: str, shard_size: int = DISTRIBUTED_CONFIG["shard_size"],
+             patterns: Optional[List[str]] = None, lease_ttl: float = DISTRIBUTED_CONFIG["lease_ttl"]) -> Dict:
+        """입력 폴더의 이미지를 정렬해 샤드로 나누고 작업 폴더 생성"""
+        if os.path.exists(self.plan_path):
+            raise FileExistsError(f"이미 계획된 작업 폴더입니다: {self.job_dir}")
+        patterns = patterns or DISTRIBUTED_CONFIG["patterns"]
+        files = sorted(
+            os.path.abspath(os.path.join(root, name))
+            for root, _, names in os.walk(input_dir)
+            for name in names
+            if any(fnmatch.fnmatch(name.lower(), pattern) for pattern in patterns)
+        )
+        for directory in (self.shard_dir, self.lease_dir, self.result_dir):
+            os.makedirs(directory, exist_ok=True)
+
+        num_shards = (len(files) + shard_size - 1) // shard_size
+        for shard in range(num_shards):
+            _write_json_atomic(self._shard_path(shard),
+                               {"shard": shard, "files": files[shard * shard_size:(shard + 1) * shard_size]})
+        plan = {
+            "created_at": time.time(),
+            "input_dir": os.path.abspath(input_dir),
+            "num_files": len(files),
+            "shard_size": shard_size,
+            "num_shards": num_shards,
+            "lease_ttl": lease_ttl,
+        }
+        # plan.json 을 마지막에 기록 (작업자는 plan.json 이 있어야 시작)
+        _write_json_atomic(self.plan_path, plan)
+        print(f"🗂️ 작업 계획: 이미지 {len(files)}개 → 샤드 {num_shards}개 ({self.job_dir})")
+        return plan
+
+    def load_plan(self) -> Dict:
+        plan = _read_json(self.plan_path)
+        if plan is None:
+            raise FileNotFoundError(f"작업 계획이 없습니다: {self.plan_path}")
+        return plan
+
+    def _shard_path(self, shard: int) -> str:
+        return os.path.join(self.shard_dir, f"shard_{shard:05d}.json")
+
+    def _lease_path(self, shard: int) -> str:
+        return os.path.join(self.lease_dir, f"shard_{shard:05d}.lease")
+
+    def _result_path(self, shard: int) -> str:
+        return os.path.join(self.result_dir, f"shard_{shard:05d}.json")
+
+    # =========================================================================
+    # 점유 / 회수
+    # =========================================================================
+
+    def _fs_now(self, worker_id: str) -> float:
+        """공유 파일시스템 기준 현재 시각 (호스트 간 시계 차이와 무관하게 mtime 과 비교)"""
+        probe = os.path.join(self.lease_dir, f".clock_{worker_id}")
+        with open(probe, "a"):
+            pass
+        try:
+            os.utime(probe)
+            return os.stat(probe).st_mtime
+        finally:
+            os.remove(probe)
+
+    def _reclaim_if_expired(self, shard: int, lease_ttl: float, worker_id: str) -> bool:
+        """만료된 임대를 원자적 rename 으로 치우고 True 반환 (여러 작업자 중 한 명만 성공)"""
+        lease_path = self._lease_path(shard)
+        try:
+            mtime = os.stat(lease_path).st_mtime
+        except FileNotFoundError:
+            return True
+        if self._fs_now(worker_id) - mtime < lease_ttl:
+            return False
+        stale_path = f"{lease_path}.expired.{uuid.uuid4().hex}"
+        try:
+            os.rename(lease_path, stale_path)
+        except FileNotFoundError:
+            return False  # 다른 작업자가 먼저 회수
+        previous = _read_json(stale_path) or {}
+        print(f"♻️ 만료된 샤드 {shard} 회수 (이전 작업자: {previous.get('worker', '?')})")
+        try:
+            os.remove(stale_path)
+        except OSError:
+            pass
+        return True
+
+    def claim_next(self, worker_id: str, owner: Dict) -> Optional[tuple]:
+        """미완료 샤드 하나를 점유하여 (shard, lease) 반환, 남은 샤드가 모두 다른 작업자 점유 중이면 None"""
+        plan = self.load_plan()
+        shards = list(range(plan["num_shards"]))
+        # 작업자마다 다른 위치에서 시작하여 점유 경쟁 감소
+        offset = random.Random(worker_id).randrange(len(shards)) if shards else 0
+        for shard in shards[offset:] + shards[:offset]:
+            if os.path.exists(self._result_path(shard)):
+                continue
+            lease = ShardLease.try_acquire(self._lease_path(shard), owner)
+            if lease is None and self._reclaim_if_expired(shard, plan["lease_ttl"], worker_id):
+                lease = ShardLease.try_acquire(self._lease_path(shard), owner)
+            if lease is None:
+                continue
+            if os.path.exists(self._result_path(shard)):
+                # 점유 직전에 다른 작업자가 완료
+                lease.release()
+                continue
+            return shard, lease
+        return None
+
+    def pending_shards(self) -> List[int]:
+        plan = self.load_plan()
+        return [s for s in range(plan["num_shards"]) if not os.path.exists(self._result_path(s))]
+
+    # =========================================================================
+    # 작업
+    # =========================================================================
+
+    def process_shard(self, shard: int, vision_model, heartbeat: LeaseHeartbeat, worker_id: str,
+                      save_masks: bool = False) -> Optional[Dict]:
+        """샤드의 이미지를 세그멘테이션하여 결과 반환 (임대를 잃으면 None)"""
+        files = _read_json(self._shard_path(shard))["files"]
+        start = time.time()
+        images = []
+        for index, image_path in enumerate(files):
+            if heartbeat.lost.is_set():
+                print(f"⚠️ 샤드 {shard} 임대를 잃어 처리를 중단합니다.")
+                return None
+
+            item_start = time.perf_counter()
+            try:
+                _, mask = vision_model.predict(image_path)
+                mask = mask.astype(np.uint8)
+                areas = ImageProcessor.compute_class_areas(mask)
+                item = {
+                    "path": image_path,
+                    "detected_defects": [int(d) for d in ImageProcessor.get_detected_defects(mask)],
+                    "class_areas": {DEFECT_CLASSES.get(c, f"Class {c}"): int(a) for c, a in areas.items()},
+                }
+                if save_masks:
+                    mask_path = os.path.join(self.mask_dir, f"shard_{shard:05d}", f"{index:05d}_"
+                                             f"{os.path.splitext(os.path.basename(image_path))[0]}.png")
+                    os.makedirs(os.path.dirname(mask_path), exist_ok=True)
+                    cv2.imwrite(mask_path, mask)
+                    item["mask_path"] = mask_path
+            except Exception as e:
+                item = {"path": image_path, "error": str(e)}
+            item["latency_ms"] = (time.perf_counter() - item_start) * 1000
+            images.append(item)
+
+        return {
+            "shard": shard,
+            "worker": worker_id,
+            "host": socket.gethostname(),
+            "model_version": vision_model.output_version,
+            "started_at": start,
+            "finished_at": time.time(),
+            "images": images,
+        }
+
+    def work(self, vision_model_factory, worker_id: Optional[str] = None, save_masks: bool = False,
+             max_shards: Optional[int] = None, poll_interval: float = DISTRIBUTED_CONFIG["poll_interval"]) -> int:
+        """남은 샤드가 없을 때까지 점유 → 처리 → 결과 기록 반복, 처리한 샤드 수 반환"""
+        worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        owner = {"worker": worker_id, "host": socket.gethostname(), "pid": os.getpid()}
+        plan = self.load_plan()
+        heartbeat_interval = plan["lease_ttl"] / 3
+        vision_model = None
+        processed = 0
+
+        print(f"👷 작업자 시작: {worker_id}")
+        while max_shards is None or processed < max_shards:
+            claimed = self.claim_next(worker_id, owner)
+            if claimed is None:
+                if not self.pending_shards():
+                    break
+                # 남은 샤드는 다른 작업자가 처리 중 → 완료 또는 임대 만료 대기
+                time.sleep(poll_interval)
+                continue
+
+            shard, lease = claimed
+            if vision_model is None:
+                vision_model = vision_model_factory()  # 처리할 샤드가 있을 때만 모델 로드
+            with LeaseHeartbeat(lease, heartbeat_interval) as heartbeat:
+                result = self.process_shard(shard, vision_model, heartbeat, worker_id, save_masks)
+            if result is None or not lease.is_owned():
+                continue
+            _write_json_atomic(self._result_path(shard), result)
+            lease.release()
+            processed += 1
+            errors = sum(1 for item in result["images"] if "error" in item)
+            print(f"✅ 샤드 {shard} 완료: 이미지 {len(result['images'])}개, 오류 {errors}개 "
+                  f"({result['finished_at'] - result['started_at']:.1f}초)")
+
+        print(f"👷 작업자 종료: {worker_id} (샤드 {processed}개 처리)")
+        return processed
+
+    # =========================================================================
+    # 상태 / 병합
+    # =========================================================================
+
+    def status(self) -> Dict:
+        plan = self.load_plan()
+        done = sum(os.path.exists(self._result_path(s)) for s in range(plan["num_shards"]))
+        leased = len(glob.glob(os.path.join(self.lease_dir, "shard_*.lease")))
+        return {"num_shards": plan["num_shards"], "done": done, "leased": leased,
+                "waiting": plan["num_shards"] - done - leased}
+
+    def merge(self, allow_partial: bool = False) -> Dict:
+        """샤드별 결과를 하나의 요약으로 병합하여 summary.json 기록"""
+        plan = self.load_plan()
+        missing = self.pending_shards()
+        if missing and not allow_partial:
+            raise RuntimeError(f"완료되지 않은 샤드가 있습니다: {missing[:10]}{' ...' if len(missing) > 10 else ''}")
+
+        defect_images = {name: 0 for class_id, name in DEFECT_CLASSES.items() if class_id > 1}
+        area_totals = {name: 0 for name in DEFECT_CLASSES.values()}
+        workers: Dict[str, Dict] = {}
+        errors, latencies, defective = [], [], []
+        first_start, last_finish = None, None
+        model_versions = set()
+
+        for shard in range(plan["num_shards"]):
+            result = _read_json(self._result_path(shard))
+            if result is None:
+                continue
+            model_versions.add(result["model_version"])
+            worker = workers.setdefault(result["worker"], {"shards": 0, "images": 0, "busy_s": 0.0})
+            worker["shards"] += 1
+            worker["images"] += len(result["images"])
+            worker["busy_s"] += result["finished_at"] - result["started_at"]
+            first_start = min(first_start or result["started_at"], result["started_at"])
+            last_finish = max(last_finish or result["finished_at"], result["finished_at"])
+            for item in result["images"]:
+                latencies.append(item["latency_ms"])
+                if "error" in item:
+                    errors.append({"path": item["path"], "error": item["error"]})
+                    continue
+                for name, area in item["class_areas"].items():
+                    area_totals[name] = area_totals.get(name, 0) + area
+                names = [DEFECT_CLASSES.get(d, f"Class {d}") for d in item["detected_defects"]]
+                for name in names:
+                    defect_images[name] = defect_images.get(name, 0) + 1
+                if names:
+                    defective.append({"path": item["path"], "defects": names})
+
+        processed = len(latencies)
+        wall = (last_finish - first_start) if first_start is not None else 0.0
+        summary = {
+            "job_dir": os.path.abspath(self.job_dir),
+            "num_files": plan["num_files"],
+            "processed": processed,
+            "errors": len(errors),
+            "missing_shards": missing,
+            "model_versions": sorted(model_versions),
+            "images_with_defect": defect_images,
+            "total_class_area": area_totals,
+            "defective_images": defective,
+            "error_details": errors,
+            "workers": workers,
+            "wall_s": wall,
+            "throughput_per_s": processed / wall if wall > 0 else 0.0,
+            "latency_p50_ms": float(np.percentile(latencies, 50)) if latencies else None,
+            "latency_p95_ms": float(np.percentile(latencies, 95)) if latencies else None,
+        }
+        _write_json_atomic(os.path.join(self.job_dir, "summary.json"), summary)
+        print(f"📊 병합 완료: {processed}/{plan['num_files']}개 처리, 결함 이미지 {len(defective)}개, "
+              f"오류 {len(errors)}개, 작업자 {len(workers)}명, {summary['throughput_per_s']:.2f}장/초")
+        return summary
+
+
+# =============================================================================
+# 명령행
+# =============================================================================
+
+def _model_factory(args):
+    """작업자용 비전 모델 생성 함수"""
+    def create():
+        import torch
+        from .vision_model import VisionModel
+
+        if args.threads:
+            torch.set_num_threads(args.threads)
+        vision_model = VisionModel(args.model_path, MODEL_CONFIG["num_classes"], MODEL_CONFIG["backbone"])
+        if args.random_weights:
+            vision_model.init_random_model(args.seed)
+        elif not vision_model.load_model():
+            raise SystemExit("비전 모델을 로드할 수 없습니다.")
+        return vision_model
+    return create
+
+
+def _add_worker_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--model-path", default=MODEL_CONFIG["path"])
+    parser.add_argument("--random-weights", action="store_true", help="체크포인트 없이 무작위 가중치 사용 (시험용)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--threads", type=int, default=None, help="작업자당 torch 스레드 수")
+    parser.add_argument("--save-masks", action="store_true", help="레이블 마스크 PNG 저장")
+    parser.add_argument("--poll-interval", type=float, default=DISTRIBUTED_CONFIG["poll_interval"])
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="공유 파일시스템 기반 분산 배치 검사")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("plan", help="입력 폴더를 샤드로 나누어 작업 폴더 생성")
+    p.add_argument("input_dir")
+    p.add_argument("job_dir")
+    p.add_argument("--shard-size", type=int, default=DISTRIBUTED_CONFIG["shard_size"])
+    p.add_argument("--lease-ttl", type=float, default=DISTRIBUTED_CONFIG["lease_ttl"], help="임대 만료 시간 (초)")
+    p.add_argument("--patterns", default=",".join(DISTRIBUTED_CONFIG["patterns"]))
+
+    p = sub.add_parser("work", help="샤드를 점유하여 처리 (호스트마다 여러 개 실행 가능)")
+    p.add_argument("job_dir")
+    p.add_argument("--worker-id", default=None)
+    p.add_argument("--max-shards", type=int, default=None)
+    _add_worker_arguments(p)
+
+    p = sub.add_parser("status", help="샤드 진행 상태")
+    p.add_argument("job_dir")
+
+    p = sub.add_parser("merge", help="샤드 결과를 summary.json 으로 병합")
+    p.add_argument("job_dir")
+    p.add_argument("--allow-partial", action="store_true")
+
+    p = sub.add_parser("run-local", help="한 호스트에서 계획 + 작업자 N개 + 병합 실행")
+    p.add_argument("input_dir")
+    p.add_argument("job_dir")
+    p.add_argument("--workers", type=int, default=2)
+    p.add_argument("--shard-size", type=int, default=DISTRIBUTED_CONFIG["shard_size"])
+    p.add_argument("--lease-ttl", type=float, default=DISTRIBUTED_CONFIG["lease_ttl"])
+    _add_worker_arguments(p)
+
+    args = parser.parse_args(argv)
+    batch = DistributedBatch(args.job_dir)
+
+    if args.command == "plan":
+        batch.plan(args.input_dir, args.shard_size, [s for s in args.patterns.split(",") if s], args.lease_ttl)
+    elif args.command == "work":
+        batch.work(_model_factory(args), args.worker_id, args.save_masks, args.max_shards, args.poll_interval)
+    elif args.command == "status":
+        print(json.dumps(batch.status(), ensure_ascii=False))
+    elif args.command == "merge":
+        try:
+            summary = batch.merge(args.allow_partial)
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            return 1
+        return 1 if summary["errors"] or summary["missing_shards"] else 0
+    elif args.command == "run-local":
+        if not os.path.exists(batch.plan_path):
+            batch.plan(args.input_dir, args.shard_size, lease_ttl=args.lease_ttl)
+        worker_args = ["--model-path", args.model_path, "--seed", str(args.seed),
+                       "--poll-interval", str(args.poll_interval)]
+        worker_args += ["--random-weights"] if args.random_weights else []
+        worker_args += ["--save-masks"] if args.save_masks else []
+        worker_args += ["--threads", str(args.threads)] if args.threads else []
+        # 패키지 __init__ 이 이 모듈을 먼저 import 하므로 -m 대신 main() 직접 호출
+        command = [sys.executable, "-c", "import sys; from src.battery_analyzer.distributed_batch import main; "
+                   "sys.exit(main(sys.argv[1:]))"]
+        env = {**os.environ, "PYTHONUNBUFFERED": "1"}
+        processes = [
+            subprocess.Popen(command + ["work", args.job_dir, "--worker-id", f"{socket.gethostname()}-w{index}"]
+                             + worker_args, env=env)
+            for index in range(args.workers)
+        ]
+        for process in processes:
+            process.wait()
+        summary = batch.merge()
+        return 1 if summary["errors"] else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,417 @@
+"""
+핫 폴더 감시 모듈
+- CT 장비가 네트워크 폴더에 계속 저장하는 이미지를 업로드 없이 자동 검사
+- 폴더 mtime 폴링: 매 주기 폴더마다 stat 한 번, mtime 이 바뀐 폴더만 목록 조회 (주기적 전체 재조회로 보완)
+- 기록 중인 파일 처리: 크기/mtime 이 stable_seconds 동안 변하지 않고 PNG/JPEG 끝 표식이 있어야 처리,
+  디코딩 실패 시 다시 안정화 대기
+- 처리한 파일은 (크기, mtime) 으로 기억: 같은 이름으로 다시 기록되면 재처리, 삭제된 파일은 전체 재조회 때 잊음
+- 폭주 시 제한: 처리 큐 크기 제한 (가득 차면 준비된 파일은 디스크 대기열에 남김)
+- 결과: 이미지 옆에 <이름>.mask.png(컬러 마스크), <이름>.verdict.json(판정, 단계별 지연 시간)을 원자적으로 기록
+"""
+
+import argparse
+import fnmatch
+import json
+import os
+import queue
+import signal
+import sys
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+from .config import DEFECT_CLASSES, MODEL_CONFIG, WATCHER_CONFIG
+from .image_processor import ImageProcessor
+
+# 기록 중임을 나타내는 임시 파일 확장자
+_TEMP_SUFFIXES = (".tmp", ".part", ".partial", ".crdownload", "~")
+
+
+class FolderWatcher:
+    """핫 폴더 감시 및 자동 검사 클래스"""
+
+    def __init__(self, watch_dir: str, vision_model, config: Optional[Dict] = None):
+        self.watch_dir = os.path.abspath(watch_dir)
+        self.vision_model = vision_model
+        self.config = {**WATCHER_CONFIG, **(config or {})}
+
+        self._dir_mtimes: Dict[str, int] = {}
+        self._pending: Dict[str, Dict] = {}        # 안정화 대기 중인 파일
+        self._ready: deque = deque()                # 큐가 가득 차 디스크에서 대기 중인 파일
+        self._known: Dict[str, Optional[Tuple[int, int]]] = {}  # 처리한 파일의 (크기, mtime), 대기/처리 중이면 None
+        self._queue: queue.Queue = queue.Queue(maxsize=self.config["queue_size"])
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._workers: List[threading.Thread] = []
+        self._last_full_scan = 0.0
+        self._latencies: deque = deque(maxlen=1000)
+        self.stats = {"processed": 0, "errors": 0, "retried": 0, "skipped_existing": 0,
+                      "dir_listings": 0, "peak_backlog": 0}
+
+    # =========================================================================
+    # 파일 판별
+    # =========================================================================
+
+    def _is_input(self, name: str) -> bool:
+        lower = name.lower()
+        if lower.startswith(".") or lower.endswith(_TEMP_SUFFIXES):
+            return False
+        if lower.endswith(self.config["mask_suffix"]) or lower.endswith(self.config["verdict_suffix"]):
+            return False
+        return any(fnmatch.fnmatch(lower, pattern) for pattern in self.config["patterns"])
+
+    def output_paths(self, image_path: str) -> tuple:
+        """(마스크 경로, 판정 JSON 경로)"""
+        stem = os.path.splitext(image_path)[0]
+        return stem + self.config["mask_suffix"], stem + self.config["verdict_suffix"]
+
+    @staticmethod
+    def looks_complete(image_path: str) -> bool:
+        """PNG(IEND)/JPEG(EOI) 끝 표식 확인, 다른 형식은 안정화 여부만으로 판단"""
+        lower = image_path.lower()
+        if not lower.endswith((".png", ".jpg", ".jpeg")):
+            return True
+        try:
+            with open(image_path, "rb") as f:
+                f.seek(max(os.path.getsize(image_path) - 16, 0))
+                tail = f.read()
+        except OSError:
+            return False
+        if lower.endswith(".png"):
+            return b"IEND" in tail
+        return tail.rstrip(b"\x00").endswith(b"\xff\xd9")
+
+    # =========================================================================
+    # 폴링
+    # =========================================================================
+
+    def _scan_dir(self, directory: str, found: List[Tuple[str, Tuple[int, int]]]):
+        """폴더 목록 조회, (경로, (크기, mtime)) 수집 (목록 조회 전에 폴더 mtime 을 기록하여 조회 중 변경은 다음 주기에 감지)"""
+        stack = [directory]
+        while stack:
+            current = stack.pop()
+            try:
+                self._dir_mtimes[current] = os.stat(current).st_mtime_ns
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            if self.config["recursive"] and not entry.name.startswith(".") \
+                                    and entry.path not in self._dir_mtimes:
+                                stack.append(entry.path)
+                        elif self._is_input(entry.name):
+                            try:
+                                stat = entry.stat()
+                            except FileNotFoundError:
+                                continue
+                            found.append((entry.path, (stat.st_size, stat.st_mtime_ns)))
+            except FileNotFoundError:
+                self._dir_mtimes.pop(current, None)
+            self.stats["dir_listings"] += 1
+
+    def _discover(self) -> List[Tuple[str, Tuple[int, int]]]:
+        """mtime 이 바뀐 폴더에서 새 파일 또는 처리 이후 다시 기록된 파일 수집
+
+        같은 자리에 덮어쓴 파일은 폴더 mtime 이 바뀌지 않으므로 전체 재조회 때 감지됩니다.
+        """
+        now = time.time()
+        full = now - self._last_full_scan >= self.config["full_scan_interval"]
+        if full:
+            self._last_full_scan = now
+            directories = [self.watch_dir]
+            self._dir_mtimes.clear()
+        else:
+            directories = []
+            for directory, mtime in list(self._dir_mtimes.items()):
+                try:
+                    if os.stat(directory).st_mtime_ns != mtime:
+                        directories.append(directory)
+                except FileNotFoundError:
+                    self._dir_mtimes.pop(directory, None)
+
+        found: List[Tuple[str, Tuple[int, int]]] = []
+        for directory in directories:
+            self._scan_dir(directory, found)
+        if full:
+            # 삭제된 파일은 잊음 (기억하는 파일 수가 폴더의 파일 수를 넘지 않도록)
+            present = {path for path, _ in found}
+            for path in [path for path, signature in self._known.items()
+                         if signature is not None and path not in present]:
+                del self._known[path]
+        return [(path, signature) for path, signature in found
+                if path not in self._known or self._known[path] not in (None, signature)]
+
+    def _has_current_verdict(self, path: str, signature: Tuple[int, int]) -> bool:
+        """이미지보다 나중에 기록된 판정 파일이 있는지"""
+        try:
+            return os.stat(self.output_paths(path)[1]).st_mtime_ns >= signature[1]
+        except OSError:
+            return False
+
+    def _track(self, paths: List[Tuple[str, Tuple[int, int]]]):
+        """새 파일을 안정화 대기 목록에 추가 (이미지보다 최신인 판정 파일이 이미 있으면 건너뜀)"""
+        now = time.time()
+        for path, signature in paths:
+            if not self.config["reprocess"] and path not in self._known and self._has_current_verdict(path, signature):
+                self._known[path] = signature
+                self.stats["skipped_existing"] += 1
+                continue
+            self._known[path] = None
+            self._pending[path] = {"path": path, "seen_at": now, "size": -1, "mtime": -1, "stable_since": now}
+
+    def _check_pending(self):
+        """크기/mtime 이 stable_seconds 동안 그대로이고 끝 표식이 있는 파일을 처리 준비 목록으로 이동"""
+        now = time.time()
+        for path, item in list(self._pending.items()):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                # 임시 이름으로 기록 후 rename 된 경우 등
+                del self._pending[path]
+                self._known.pop(path, None)
+                continue
+            if (stat.st_size, stat.st_mtime_ns) != (item["size"], item["mtime"]):
+                item.update(size=stat.st_size, mtime=stat.st_mtime_ns, stable_since=now)
+                continue
+            if stat.st_size == 0 or now - item["stable_since"] < self.config["stable_seconds"]:
+                continue
+            if not self.looks_complete(path):
+                if now - item["seen_at"] > self.config["max_wait"]:
+                    print(f"⚠️ 완성되지 않은 파일로 판단하여 처리합니다: {path}")
+                else:
+                    continue
+            del self._pending[path]
+            item["written_at"] = stat.st_mtime_ns / 1e9
+            item["ready_at"] = now
+            self._ready.append(item)
+
+    def _dispatch(self):
+        """준비된 파일을 제한된 큐에 넣음 (가득 차면 나머지는 다음 주기로)"""
+        while self._ready:
+            try:
+                self._queue.put_nowait(self._ready[0])
+            except queue.Full:
+                break
+            self._ready.popleft()
+            self._in_flight += 1  # 큐에 넣은 시점부터 처리 완료까지
+        backlog = len(self._ready) + len(self._pending)
+        self.stats["peak_backlog"] = max(self.stats["peak_backlog"], backlog)
+
+    def poll_once(self):
+        """한 주기: 폴더 변경 감지 → 안정화 확인 → 큐 투입 (호출자가 _lock 보유)"""
+        self._track(self._discover())
+        self._check_pending()
+        self._dispatch()
+
+    # =========================================================================
+    # 처리
+    # =========================================================================
+
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            try:
+                self.process(item)
+            except Exception as e:
+                # 판정 기록 실패 등: 오류로 집계하고 작업자는 계속 실행
+                print(f"❌ 처리 실패 {item['path']}: {e}")
+                with self._lock:
+                    self.stats["errors"] += 1
+            finally:
+                with self._lock:
+                    self._in_flight -= 1
+                    # 재시도로 되돌린 파일이 아니면 처리한 버전을 기억 (다시 기록되면 재처리)
+                    if item["path"] not in self._pending:
+                        self._known[item["path"]] = (item["size"], item["mtime"])
+
+    def process(self, item: Dict) -> Optional[Dict]:
+        """세그멘테이션 후 마스크와 판정 JSON 기록, 판정 반환 (디코딩 실패 시 안정화 대기로 되돌림)"""
+        path = item["path"]
+        item["started_at"] = time.time()
+        mask_path, verdict_path = self.output_paths(path)
+        try:
+            _, mask = self.vision_model.predict(path)
+        except Exception as e:
+            if item.get("retries", 0) < self.config["decode_retries"] and os.path.exists(path):
+                # 기록이 잠시 멈췄던 파일 등: 다시 안정화 대기 (폴링 스레드에서 처리)
+                item["retries"] = item.get("retries", 0) + 1
+                item.update(size=-1, mtime=-1, stable_since=time.time())
+                with self._lock:
+                    self.stats["retried"] += 1
+                    self._pending[path] = item
+                return None
+            verdict = {"file": os.path.basename(path), "status": "error", "error": str(e)}
+        else:
+            try:
+                verdict = self._write_mask(path, mask, mask_path)
+            except Exception as e:
+                verdict = {"file": os.path.basename(path), "status": "error", "error": f"마스크 기록 실패: {e}"}
+
+        finished_at = time.time()
+        verdict["timing"] = {
+            "written_at": item["written_at"],
+            "seen_at": item["seen_at"],
+            "finished_at": finished_at,
+            "e2e_ms": (finished_at - item["written_at"]) * 1000,       # 파일 기록 완료 → 판정
+            "stabilize_ms": (item["ready_at"] - item["seen_at"]) * 1000,
+            "queue_ms": (item["started_at"] - item["ready_at"]) * 1000,
+            "process_ms": (finished_at - item["started_at"]) * 1000,
+        }
+        # 판정 JSON 은 마지막에 기록 (후속 시스템은 판정 파일 생성을 완료 신호로 사용)
+        # 기록에 실패하면 _worker 에서 오류로 한 번만 집계
+        self._write_atomic(verdict_path, lambda tmp: self._dump_json(tmp, verdict))
+        with self._lock:
+            if verdict["status"] == "ok":
+                self.stats["processed"] += 1
+                self._latencies.append(verdict["timing"]["e2e_ms"])
+            else:
+                self.stats["errors"] += 1
+        status = verdict.get("verdict", "오류")
+        print(f"🔬 {verdict['file']}: {status} ({verdict['timing']['e2e_ms']:.0f}ms)")
+        return verdict
+
+    def _write_mask(self, path: str, mask: np.ndarray, mask_path: str) -> Dict:
+        """컬러 마스크를 기록하고 판정 반환"""
+        mask = mask.astype(np.uint8)
+        colored = ImageProcessor.create_colored_mask(mask)
+        self._write_atomic(mask_path, lambda tmp: cv2.imwrite(tmp, cv2.cvtColor(colored, cv2.COLOR_RGB2BGR)))
+        defects = [DEFECT_CLASSES.get(int(d), f"Class {d}") for d in ImageProcessor.get_detected_defects(mask)]
+        areas = ImageProcessor.compute_class_areas(mask)
+        return {
+            "file": os.path.basename(path),
+            "status": "ok",
+            "verdict": "defect" if defects else "normal",
+            "detected_defects": defects,
+            "class_areas": {DEFECT_CLASSES.get(c, f"Class {c}"): a for c, a in areas.items()},
+            "mask_file": os.path.basename(mask_path),
+            "model_version": self.vision_model.output_version,
+        }
+
+    @staticmethod
+    def _dump_json(path: str, payload: Dict):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False, indent=2)
+
+    @staticmethod
+    def _write_atomic(path: str, write):
+        """숨김 임시 파일에 쓴 뒤 rename (감시 대상/부분 파일로 보이지 않게, 실패 시 임시 파일 삭제)"""
+        directory, name = os.path.split(path)
+        tmp_path = os.path.join(directory, f".{name}.{os.getpid()}.{threading.get_ident()}{os.path.splitext(name)[1]}")
+        try:
+            if write(tmp_path) is False:
+                raise OSError(f"파일을 기록할 수 없습니다: {path}")
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    # =========================================================================
+    # 실행
+    # =========================================================================
+
+    def latency_summary(self) -> Dict:
+        with self._lock:
+            latencies = list(self._latencies)
+        if not latencies:
+            return {"count": 0}
+        return {
+            "count": len(latencies),
+            "p50_ms": float(np.percentile(latencies, 50)),
+            "p95_ms": float(np.percentile(latencies, 95)),
+            "max_ms": float(np.max(latencies)),
+        }
+
+    def idle(self) -> bool:
+        with self._lock:
+            return not self._pending and not self._ready and self._in_flight == 0
+
+    def start(self):
+        for index in range(self.config["workers"]):
+            worker = threading.Thread(target=self._worker, name=f"watcher-{index}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def stop(self):
+        self._stop.set()
+
+    def run(self, once: bool = False) -> Dict:
+        """폴링 루프 (once=True 이면 현재 파일을 모두 처리하고 종료)"""
+        print(f"👀 폴더 감시 시작: {self.watch_dir} (주기 {self.config['poll_interval']}초, "
+              f"큐 {self.config['queue_size']}, 작업자 {self.config['workers']})")
+        self.start()
+        last_status = time.time()
+        try:
+            while not self._stop.is_set():
+                with self._lock:
+                    self.poll_once()
+                if once and self.idle():
+                    break
+                if time.time() - last_status >= self.config["status_interval"]:
+                    last_status = time.time()
+                    self._print_status()
+                self._stop.wait(self.config["poll_interval"])
+        finally:
+            for _ in self._workers:
+                self._queue.put(None)
+            for worker in self._workers:
+                worker.join()
+        summary = {**self.stats, "latency": self.latency_summary()}
+        print(f"👀 폴더 감시 종료: {json.dumps(summary, ensure_ascii=False)}")
+        return summary
+
+    def _print_status(self):
+        latency = self.latency_summary()
+        if latency["count"] == 0 and not self._pending and not self._ready:
+            return
+        p50 = f"{latency['p50_ms']:.0f}ms" if latency["count"] else "-"
+        p95 = f"{latency['p95_ms']:.0f}ms" if latency["count"] else "-"
+        print(f"📂 안정화 대기 {len(self._pending)} / 디스크 대기 {len(self._ready)} / 큐 {self._queue.qsize()} / "
+              f"처리 {self.stats['processed']} / 오류 {self.stats['errors']} / 지연 p50 {p50} p95 {p95}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="핫 폴더 감시 및 자동 검사")
+    parser.add_argument("watch_dir")
+    parser.add_argument("--model-path", default=MODEL_CONFIG["path"])
+    parser.add_argument("--random-weights", action="store_true", help="체크포인트 없이 무작위 가중치 사용 (시험용)")
+    parser.add_argument("--workers", type=int, default=WATCHER_CONFIG["workers"])
+    parser.add_argument("--queue-size", type=int, default=WATCHER_CONFIG["queue_size"])
+    parser.add_argument("--poll-interval", type=float, default=WATCHER_CONFIG["poll_interval"])
+    parser.add_argument("--stable-seconds", type=float, default=WATCHER_CONFIG["stable_seconds"])
+    parser.add_argument("--no-recursive", action="store_true", help="하위 폴더 감시 안 함")
+    parser.add_argument("--reprocess", action="store_true", help="판정 파일이 있어도 다시 처리")
+    parser.add_argument("--once", action="store_true", help="현재 파일을 모두 처리한 뒤 종료")
+    args = parser.parse_args(argv)
+
+    from .vision_model import VisionModel
+
+    vision_model = VisionModel(args.model_path, MODEL_CONFIG["num_classes"], MODEL_CONFIG["backbone"])
+    if args.random_weights:
+        vision_model.init_random_model()
+    elif not vision_model.load_model():
+        raise SystemExit("비전 모델을 로드할 수 없습니다.")
+
+    watcher = FolderWatcher(args.watch_dir, vision_model, {
+        "workers": args.workers,
+        "queue_size": args.queue_size,
+        "poll_interval": args.poll_interval,
+        "stable_seconds": args.stable_seconds,
+        "recursive": not args.no_recursive,
+        "reprocess": args.reprocess,
+    })
+    signal.signal(signal.SIGTERM, lambda *_: watcher.stop())
+    try:
+        watcher.run(once=args.once)
+    except KeyboardInterrupt:
+        watcher.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
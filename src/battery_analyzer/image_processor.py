@@ -4,8 +4,8 @@
 
 import cv2
 import numpy as np
-from typing import List, Tuple
-from .config import COLORS
+from typing import Dict, List, Tuple
+from .config import COLORS, DEFECT_CLASSES
 
 class ImageProcessor:
     """이미지 처리 및 마스크 생성 클래스"""
@@ -32,6 +32,12 @@ class ImageProcessor:
         defect_classes = [cls for cls in unique_classes if cls > 1]
         return defect_classes
     
+    @staticmethod
+    def compute_class_areas(mask: np.ndarray) -> Dict[int, int]:
+        """클래스별 픽셀 면적 계산"""
+        counts = np.bincount(mask.ravel().astype(np.int64), minlength=len(DEFECT_CLASSES))
+        return {class_id: int(counts[class_id]) for class_id in DEFECT_CLASSES}
+    
     @staticmethod
     def create_overlay(image: np.ndarray, colored_mask: np.ndarray, alpha: float = 0.4) -> np.ndarray:
         """오버레이 이미지 생성"""
@@ -12,13 +12,50 @@ from typing import Optional
 
 # 모듈 import
 from .system_config import SystemConfig
-from .vision_model import VisionModel
 from .image_processor import ImageProcessor
 from .ui_components import UIComponents
 from .file_manager import FileManager
 from .ai_analyzer import AIAnalyzer
 from .pdf_generator import PDFGenerator
-from .config import MODEL_CONFIG, DEFECT_CLASSES, COLORS_AND_LABELS
+from .profiler import RequestProfiler
+from .cpu_tuner import CPUAutoTuner
+from .triage import TriagePolicy
+from .volume_processor import VolumeReader, VolumeProcessor
+from .results_store import ResultsStore
+from .model_registry import ModelRegistry
+from .cascade import CascadeSegmenter
+from .speculative import SpeculativeAnalyzer
+from .dedup_index import NearDuplicateIndex
+from .config import (DEFECT_CLASSES, COLORS_AND_LABELS, PROFILING_CONFIG, TRIAGE_CONFIG,
+                     VOLUME_CONFIG, RESULTS_CONFIG, CASCADE_CONFIG, SPECULATIVE_CONFIG, DEDUP_CONFIG)
+
+
+@st.cache_resource(show_spinner=False)
+def _shared_model_registry() -> ModelRegistry:
+    """모든 세션이 공유하는 모델 레지스트리
+
+    CPU 스레드 수는 여기서 (첫 요청 처리 전) 캐시된 튜닝 결과로 한 번만 설정하고, 모델 로드 시에는
+    배치 크기만 적용합니다. 앱은 튜닝을 실행하지 않습니다 (python -m src.battery_analyzer.cpu_tuner).
+    """
+    tuner = CPUAutoTuner()
+    registry = ModelRegistry(
+        on_load=lambda vision_model: tuner.configure(vision_model, tune=False, apply_threads=False))
+    default_spec = next(spec for spec in registry.list_models() if spec["name"] == registry.default)
+    tuner.configure_process(default_spec)
+    return registry
+
+
+@st.cache_resource(show_spinner=False)
+def _shared_speculative_analyzer() -> SpeculativeAnalyzer:
+    """모든 세션이 공유하는 LLaVA 선행 분석 작업자"""
+    return SpeculativeAnalyzer(AIAnalyzer())
+
+
+@st.cache_resource(show_spinner=False)
+def _shared_dedup_index() -> NearDuplicateIndex:
+    """모든 세션이 공유하는 근사 중복 색인 (결과 저장소와 ID 기준 증분 동기화)"""
+    return NearDuplicateIndex(ResultsStore())
+
 
 class BatteryDefectAnalyzer:
     """배터리 결함 분석 메인 애플리케이션"""
@@ -28,7 +65,12 @@ class BatteryDefectAnalyzer:
         self.file_manager = FileManager()
         self.ai_analyzer = AIAnalyzer()
         self.pdf_generator = PDFGenerator()
+        self.profiler = RequestProfiler()
+        self.triage_policy = TriagePolicy()
+        self.model_registry = None
+        self.model_lease = None
         self.vision_model = None
+        self.results_store = None
         
         # 세션 상태 초기화
         self._init_session_state()
@@ -56,26 +98,189 @@ class BatteryDefectAnalyzer:
         print("✅ 정리 완료")
     
     def _load_vision_model(self):
-        """비전 모델 로드"""
-        if "vision_model" not in st.session_state:
+        """선택된 비전 모델을 레지스트리에서 대여 (최초 사용 시 로드, 실행 종료 시 반납)"""
+        self.model_registry = _shared_model_registry()
+        names = self.model_registry.names()
+        model_name = names[0]
+        if len(names) > 1:
+            model_name = st.sidebar.selectbox("🧠 비전 모델", names, index=names.index(self.model_registry.default))
+        
+        try:
             with st.spinner("비전 모델을 로딩 중입니다..."):
-                self.vision_model = VisionModel(MODEL_CONFIG["path"])
-                if self.vision_model.load_model():
-                    st.session_state.vision_model = self.vision_model
-                    st.session_state.device = self.vision_model.device
-                else:
-                    st.session_state.vision_model = None
-        else:
-            self.vision_model = st.session_state.vision_model
+                self.model_lease = self.model_registry.acquire(model_name)
+        except Exception as e:
+            st.error(f"비전 모델 로딩 실패: {str(e)}")
+            self.vision_model = None
+            return
+        
+        self.vision_model = self.model_lease.vision_model
+        st.session_state.device = self.vision_model.device
+        st.session_state.cpu_tuning = self.model_registry.load_reports.get(model_name)
+        
+        # 모델(버전)이 바뀌면 이전 모델 기준의 분석/대화 초기화
+        previous_version = st.session_state.get("model_version")
+        if previous_version is not None and previous_version != self.vision_model.output_version:
+            for key in ("llava_output", "stored_llava_output", "force_llm"):
+                st.session_state.pop(key, None)
+            st.session_state.chat_history = []
+            st.session_state.show_pdf = False
+        st.session_state.model_version = self.vision_model.output_version
+    
+    def _release_vision_model(self):
+        """대여한 모델 반납 (교체된 이전 버전은 마지막 반납 시 해제)"""
+        if self.model_lease is not None:
+            self.model_lease.release()
+            self.model_lease = None
+    
+    def _load_results_store(self):
+        """분석 결과 저장소 열기"""
+        if not RESULTS_CONFIG["enabled"]:
+            return
+        if "results_store" not in st.session_state:
+            try:
+                st.session_state.results_store = ResultsStore()
+            except Exception as e:
+                print(f"⚠️ 결과 저장소 열기 실패: {e}")
+                st.session_state.results_store = None
+        self.results_store = st.session_state.results_store
+    
+    def _save_result(self, image_path: str, image_name: str, mask: np.ndarray):
+        """세그멘테이션 결과를 저장소에 기록 (같은 업로드/모델 버전은 한 번만)"""
+        if self.results_store is None:
+            return
+        try:
+            image_hash = st.session_state.upload_hash
+            result_key = (image_hash, self.vision_model.output_version)
+            if st.session_state.get("result_hash") != result_key:
+                st.session_state.result_id = self.results_store.append(
+                    image_hash, mask, self.vision_model.output_version, image_name=image_name,
+                    phash=st.session_state.get("upload_phash"),
+                )
+                st.session_state.result_hash = result_key
+        except Exception as e:
+            print(f"⚠️ 결과 저장 실패: {e}")
+    
+    def _track_upload(self, image_path: str):
+        """업로드 해시 기록, 다른 이미지가 올라오면 이전 분석/대화 초기화 및 선행 분석 취소"""
+        if image_path is None:
+            return
+        upload_hash = ResultsStore.hash_image(image_path)
+        previous_hash = st.session_state.get("upload_hash")
+        if previous_hash is not None and previous_hash != upload_hash:
+            _shared_speculative_analyzer().cancel(st.session_state.pop("speculative_job", None))
+            for key in ("llava_output", "stored_llava_output", "force_llm", "speculative_saved", "upload_phash",
+                        "dedup_reused"):
+                st.session_state.pop(key, None)
+            st.session_state.chat_history = []
+            st.session_state.show_pdf = False
+        st.session_state.upload_hash = upload_hash
+    
+    def _find_near_duplicate(self, image_path: str, mask: np.ndarray):
+        """같은 모델 버전의 근사 중복 이전 결과 검색, 새 마스크와 이전 마스크의 일치 여부 기록
+        (재사용은 자동으로 하지 않고 화면에서 사용자가 선택)"""
+        if not DEDUP_CONFIG["enabled"] or self.results_store is None:
+            return
+        match_key = (st.session_state.upload_hash, self.vision_model.output_version)
+        match = st.session_state.get("dedup_match")
+        if match is not None and match["key"] == match_key:
+            # 업로드/모델마다 한 번만 검색 (이후 재실행에서는 자신의 결과가 검색되므로)
+            return
+        record, mask_matches = None, False
+        try:
+            phash = NearDuplicateIndex.dhash(image_path)
+            st.session_state.upload_phash = phash
+            record = _shared_dedup_index().find_similar(phash, self.vision_model.output_version)
+            if record is not None:
+                mask_matches = NearDuplicateIndex.masks_match(mask, self.results_store.get_mask(record["id"]))
+                print(f"♻️ 근사 중복 발견: 결과 #{record['id']} (해밍 거리 {record['distance']}, "
+                      f"마스크 {'일치' if mask_matches else '불일치'})")
+        except Exception as e:
+            print(f"⚠️ 근사 중복 검색 실패: {e}")
+        st.session_state.dedup_match = {"key": match_key, "record": record, "mask_matches": mask_matches}
+    
+    def _reuse_near_duplicate_analysis(self):
+        """근사 중복 이전 결과의 AI 분석 재사용 (사용자가 선택한 경우)"""
+        record = st.session_state.dedup_match["record"]
+        _shared_speculative_analyzer().cancel(st.session_state.pop("speculative_job", None))
+        st.session_state.llava_output = record["llava_output"]
+        st.session_state.dedup_reused = record["id"]
+    
+    def _display_near_duplicate(self):
+        """근사 중복 이전 결과 안내 (마스크가 일치하고 이전 AI 분석이 있으면 재사용 선택)"""
+        match = st.session_state.get("dedup_match")
+        if match is None or match["record"] is None:
+            return
+        record = match["record"]
+        name = record.get("image_name") or record["image_hash"][:12]
+        if st.session_state.get("dedup_reused") == record["id"]:
+            st.caption(f"♻️ 유사 이미지({name})의 이전 AI 분석을 재사용했습니다.")
+        elif not match["mask_matches"]:
+            st.caption(f"♻️ 유사 이미지({name}, 해밍 거리 {record['distance']}/64)의 이전 결과가 있지만 "
+                       f"결함 탐지 결과가 달라 재사용하지 않습니다.")
+        elif record.get("llava_output") and "llava_output" not in st.session_state:
+            st.info(f"♻️ 유사 이미지({name}, 해밍 거리 {record['distance']}/64)의 이전 결과가 있으며 "
+                    f"결함 탐지 결과가 일치합니다. 이전 AI 분석을 재사용할 수 있습니다.")
+            if st.button("이전 AI 분석 재사용"):
+                self._reuse_near_duplicate_analysis()
+                st.rerun()
+    
+    def _analysis_inputs(self):
+        """LLaVA 분석 입력 (defect_info, analysis_type)"""
+        detected_defects = st.session_state.detected_defects if "detected_defects" in st.session_state else []
+        if detected_defects:
+            defect_labels = [DEFECT_CLASSES.get(d, f"Class {d}") for d in detected_defects]
+            return f"Detected defects: {', '.join(defect_labels)}", "defect_analysis"
+        return "No defects detected (Normal battery)", "normal_analysis"
+    
+    def _speculative_key(self, defect_info: str, analysis_type: str) -> str:
+        """선행 분석 식별 키 (같은 업로드/모델/분석 입력이면 결과 재사용)"""
+        return f"{st.session_state.upload_hash}:{self.vision_model.output_version}:{analysis_type}:{defect_info}"
+    
+    def _start_speculative_analysis(self, image_path: str, mask_path: str):
+        """세그멘테이션 직후 LLaVA 분석을 백그라운드에서 미리 시작"""
+        if not SPECULATIVE_CONFIG["enabled"] or "llava_output" in st.session_state:
+            return
+        triage = st.session_state.get("triage")
+        if (triage is not None and triage["route"] == "template"
+                and not st.session_state.get("force_llm", False)):
+            return
+        
+        defect_info, analysis_type = self._analysis_inputs()
+        key = self._speculative_key(defect_info, analysis_type)
+        job = st.session_state.get("speculative_job")
+        if job is not None and job.key == key and not job.cancelled:
+            return
+        speculative = _shared_speculative_analyzer()
+        speculative.cancel(job)
+        st.session_state.speculative_job = speculative.submit(key, image_path, mask_path, defect_info, analysis_type)
     
     def _process_uploaded_image(self, uploaded_file):
         """업로드된 이미지 처리"""
         image_path = self.file_manager.save_uploaded_image(uploaded_file)
+        self._track_upload(image_path)
         
         if self.vision_model is not None:
             with st.spinner("AI가 결함 영역을 자동으로 탐지하고 있습니다..."):
                 try:
-                    image_resized, mask = self.vision_model.predict(image_path)
+                    st.session_state.cascade_report = None
+                    with self.profiler.torch_trace("predict"):
+                        if CASCADE_CONFIG["enabled"]:
+                            # 결함 후보 영역만 원본 해상도로 재예측 (신뢰도 없음 → 트리아지 생략)
+                            image_resized, mask, cascade_report = CascadeSegmenter(self.vision_model).segment(image_path)
+                            st.session_state.cascade_report = cascade_report
+                            confidence = None
+                        elif TRIAGE_CONFIG["enabled"]:
+                            image_resized, mask, confidence = self.vision_model.predict_with_confidence(
+                                image_path, TRIAGE_CONFIG["uncertain_threshold"]
+                            )
+                        else:
+                            image_resized, mask = self.vision_model.predict(image_path)
+                            confidence = None
+                    
+                    # LLM 트리아지 (고신뢰 정상 셀은 템플릿 판정)
+                    st.session_state.triage = (
+                        self.triage_policy.decide(mask, confidence) if confidence is not None else None
+                    )
                     
                     # 탐지된 결함 확인
                     detected_defects = ImageProcessor.get_detected_defects(mask)
@@ -101,6 +306,12 @@ class BatteryDefectAnalyzer:
                     st.session_state.generated_mask = defect_mask
                     st.session_state.image_resized = image_resized
                     
+                    # 근사 중복 이전 결과 검색 (저장 전에 검색해야 자신의 결과가 검색되지 않음)
+                    self._find_near_duplicate(image_path, mask)
+                    
+                    # 결과 저장소 기록
+                    self._save_result(image_path, uploaded_file.name, mask)
+                    
                 except Exception as e:
                     st.error(f"결함 탐지 실패: {str(e)}")
                     st.session_state.generated_mask = None
@@ -138,6 +349,13 @@ class BatteryDefectAnalyzer:
             legend_img = UIComponents.make_legend_img(COLORS_AND_LABELS)
             UIComponents.display_images(img_display, colored_mask_resized, overlay, legend_img)
             
+            self._display_near_duplicate()
+            
+            if st.session_state.get("cascade_report"):
+                report = st.session_state.cascade_report
+                st.caption(f"🔎 계단식 예측: 원본 해상도 재예측 {report['refined_fraction']:.1%} 픽셀 "
+                           f"(타일 {report['tiles_refined']}/{report['tiles_total']}, {report['total_ms']:.0f}ms)")
+            
             # 탐지된 결함 메시지
             if "detected_defects" in st.session_state and st.session_state.detected_defects:
                 detected_names = [DEFECT_CLASSES.get(d, f"Class {d}") for d in st.session_state.detected_defects]
@@ -150,19 +368,21 @@ class BatteryDefectAnalyzer:
     
     def _handle_ai_analysis(self, image_path: str, mask_path: str):
         """AI 분석 처리"""
-        if st.button("AI 분석 시작") or "llava_output" in st.session_state:
+        if (st.button("AI 분석 시작") or "llava_output" in st.session_state
+                or st.session_state.get("force_llm", False)):
             st.markdown("<div style='height:32px'></div>", unsafe_allow_html=True)
             
             # 결함 정보 수집
-            detected_defects = st.session_state.detected_defects if "detected_defects" in st.session_state else []
+            defect_info, analysis_type = self._analysis_inputs()
             
-            if detected_defects:
-                defect_labels = [DEFECT_CLASSES.get(d, f"Class {d}") for d in detected_defects]
-                defect_info = f"Detected defects: {', '.join(defect_labels)}"
-                analysis_type = "defect_analysis"
-            else:
-                defect_info = "No defects detected (Normal battery)"
-                analysis_type = "normal_analysis"
+            triage = st.session_state.get("triage")
+            use_template = (triage is not None and triage["route"] == "template"
+                            and not st.session_state.get("force_llm", False))
+            
+            if "llava_output" not in st.session_state and use_template:
+                # 고신뢰 정상 셀: LLaVA 호출 생략
+                st.session_state.llava_output = triage["verdict"]
+                print(f"⚡ 트리아지: {triage['reason']} - LLaVA 호출 생략")
             
             if "llava_output" not in st.session_state:
                 print("=" * 60)
@@ -185,9 +405,20 @@ class BatteryDefectAnalyzer:
                     print("📋 Ollama 모델 상태 확인 중...")
                     
                     analysis_start = time.time()
-                    st.session_state.llava_output = self.ai_analyzer.analyze_image(
-                        image_path, mask_path, defect_info, analysis_type
-                    )
+                    llava_output = None
+                    job = st.session_state.pop("speculative_job", None)
+                    speculative_key = self._speculative_key(defect_info, analysis_type)
+                    if job is not None and not job.cancelled and job.key == speculative_key:
+                        # 선행 분석 결과 사용 (진행 중이면 제한 시간까지 대기, 아직 대기열에 있으면 직접 분석)
+                        llava_output, saved = _shared_speculative_analyzer().result(job)
+                        if llava_output is not None:
+                            st.session_state.speculative_saved = saved
+                            print(f"🔮 선행 분석 결과 사용: 대기 시간 {saved:.2f}초 절약")
+                    if llava_output is None:
+                        llava_output = self.ai_analyzer.analyze_image(
+                            image_path, mask_path, defect_info, analysis_type
+                        )
+                    st.session_state.llava_output = llava_output
                     analysis_end = time.time()
                 
                 end_time = time.time()
@@ -201,7 +432,22 @@ class BatteryDefectAnalyzer:
                 print(f"📝 답변 길이: {len(st.session_state.llava_output)} 문자")
                 print("=" * 60)
             
+            # 결과 저장소에 분석 결과 기록
+            if self.results_store is not None and "result_id" in st.session_state \
+                    and st.session_state.get("stored_llava_output") != st.session_state.llava_output:
+                self.results_store.update_analysis(st.session_state.result_id, st.session_state.llava_output)
+                st.session_state.stored_llava_output = st.session_state.llava_output
+            
             st.markdown(f"**분석 결과:**\n\n{st.session_state.llava_output}")
+            if st.session_state.get("speculative_saved"):
+                st.caption(f"🔮 백그라운드 선행 분석으로 대기 시간 {st.session_state.speculative_saved:.1f}초를 절약했습니다.")
+            
+            if use_template and st.session_state.llava_output == triage["verdict"]:
+                st.caption(f"⚡ {triage['reason']}으로 판정되어 LLaVA 분석을 생략했습니다.")
+                if st.button("LLaVA 상세 분석 요청"):
+                    st.session_state.force_llm = True
+                    del st.session_state.llava_output
+                    st.rerun()
             st.markdown("<div style='height:40px'></div>", unsafe_allow_html=True)
     
     def _handle_chat(self, image_path: str, mask_path: str):
@@ -335,8 +581,131 @@ class BatteryDefectAnalyzer:
                         except Exception:
                             pass
     
+    def _handle_volume_upload(self, uploaded_file):
+        """CT 볼륨 업로드 처리"""
+        if self.vision_model is None:
+            st.error("비전 모델이 로드되지 않아 볼륨을 분석할 수 없습니다.")
+            return
+        
+        # raw 볼륨은 형태와 자료형 입력 필요
+        shape, dtype = None, "uint8"
+        if uploaded_file.name.lower().endswith(".raw"):
+            col1, col2 = st.columns(2)
+            shape_text = col1.text_input("raw 볼륨 형태 (D,H,W)")
+            dtype = col2.selectbox("raw 자료형", ["uint8", "uint16", "int16", "float32"])
+            if not shape_text:
+                st.info("raw 볼륨의 형태를 입력하세요.")
+                return
+            try:
+                shape = tuple(int(v) for v in shape_text.split(","))
+                if len(shape) != 3 or min(shape) <= 0:
+                    raise ValueError("양의 정수 3개(D,H,W)가 필요합니다")
+            except ValueError as e:
+                st.error(f"잘못된 raw 볼륨 형태 '{shape_text}': {str(e)}")
+                return
+        
+        volume_key = f"{uploaded_file.name}_{uploaded_file.size}_{shape}_{dtype}"
+        if st.session_state.get("volume_key") != volume_key:
+            volume_path = self.file_manager.save_uploaded_image(uploaded_file)
+            label_path = self.file_manager.create_temp_image_path("volume_labels", "npy")
+            progress = st.progress(0.0, text="슬라이스를 분석 중입니다...")
+            reader = None
+            try:
+                reader = VolumeReader(volume_path, shape, dtype)
+                summary = VolumeProcessor(self.vision_model).process(
+                    reader, label_path, VOLUME_CONFIG["voxel_spacing"],
+                    progress_callback=lambda done, total: progress.progress(
+                        done / total, text=f"슬라이스를 분석 중입니다... ({done}/{total})"
+                    ),
+                )
+                worst_slice = summary["worst_slice"] if summary["worst_slice"] is not None else len(reader) // 2
+                slice_image, slice_labels = VolumeProcessor.load_slice(
+                    reader, label_path, worst_slice, summary["window"]
+                )
+            except Exception as e:
+                st.error(f"볼륨 분석 실패: {str(e)}")
+                return
+            finally:
+                if reader is not None:
+                    reader.close()
+                # 요약과 표시용 슬라이스는 메모리에 있으므로 볼륨 / 레이블 볼륨 파일은 바로 삭제
+                self.file_manager.cleanup_temp_files([volume_path, label_path])
+            
+            st.session_state.volume_key = volume_key
+            st.session_state.volume_summary = summary
+            st.session_state.volume_slice = (worst_slice, slice_image, slice_labels)
+        
+        summary = st.session_state.volume_summary
+        worst_slice, slice_image, slice_labels = st.session_state.volume_slice
+        
+        # 요약 지표
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("슬라이스 수", summary["num_slices"])
+        col2.metric("스웰링 부피", f"{summary['swelling_volume']:.1f}")
+        col3.metric("3D 결함 수", len(summary["components"]))
+        col4.metric("최악 슬라이스", "-" if summary["worst_slice"] is None else summary["worst_slice"])
+        
+        # 최악 슬라이스 표시
+        colored_mask = ImageProcessor.create_colored_mask(slice_labels)
+        overlay = ImageProcessor.create_overlay(slice_image, colored_mask)
+        legend_img = UIComponents.make_legend_img(COLORS_AND_LABELS)
+        UIComponents.display_images(slice_image, colored_mask, overlay, legend_img)
+        st.caption(f"슬라이스 {worst_slice} / {summary['num_slices']}")
+        
+        if summary["components"]:
+            st.markdown("**슬라이스별 결함 면적**")
+            st.line_chart(summary["slice_defect_areas"])
+            st.markdown("**3D 결함 요소 (상위 20개)**")
+            st.table([
+                {"결함": c["class_name"], "부피": c["volume"], "복셀": c["voxels"],
+                 "슬라이스 범위": f"{c['z_min']}~{c['z_max']}"}
+                for c in summary["components"][:20]
+            ])
+        else:
+            st.success("볼륨 전체에서 결함이 감지되지 않았습니다.")
+    
+    def _display_history(self):
+        """분석 이력 검색"""
+        if self.results_store is None:
+            return
+        
+        with st.expander("📚 분석 이력 검색"):
+            col1, col2, col3 = st.columns([1, 1, 1])
+            class_name = col1.selectbox("결함 클래스", [DEFECT_CLASSES[c] for c in DEFECT_CLASSES if c > 1])
+            min_area = col2.number_input("면적 하한 (초과, 픽셀)", min_value=0, value=0, step=100)
+            days = col3.number_input("최근 기간 (일)", min_value=1, value=7)
+            
+            records = self.results_store.query(
+                min_areas={class_name: int(min_area)}, since=time.time() - days * 86400, limit=200
+            )
+            if not records:
+                st.info("조건에 맞는 분석 결과가 없습니다.")
+                return
+            
+            st.table([
+                {"ID": r["id"], "시각": time.strftime("%Y-%m-%d %H:%M", time.localtime(r["created_at"])),
+                 "이미지": r["image_name"], "모델": r["model_version"],
+                 "결함": ", ".join(DEFECT_CLASSES.get(d, f"Class {d}") for d in r["detected_defects"]),
+                 f"{class_name} 면적": r["areas"][class_name]}
+                for r in records
+            ])
+            
+            selected = st.selectbox("마스크 보기", [r["id"] for r in records])
+            record = next(r for r in records if r["id"] == selected)
+            mask = self.results_store.get_mask(selected)
+            st.image(ImageProcessor.create_colored_mask(mask), caption=f"ID {selected} 마스크", width=256)
+            if record["llava_output"]:
+                st.markdown(f"**분석 결과:**\n\n{record['llava_output']}")
+    
     def run(self):
         """메인 애플리케이션 실행"""
+        try:
+            self._run()
+        finally:
+            self._release_vision_model()
+    
+    def _run(self):
+        """화면 구성 및 분석 흐름"""
         # 제목
         st.markdown("""
         <h1 style='text-align: center; margin-bottom: 50px;'>🔍 배터리 CT 결함 분석 프로그램</h1>
@@ -348,27 +717,69 @@ class BatteryDefectAnalyzer:
         # 비전 모델 로드
         self._load_vision_model()
         
+        # 결과 저장소 열기
+        self._load_results_store()
+        
         # 이미지 업로드
         col1, col2, col3 = st.columns([1, 2, 1])
         with col2:
-            uploaded_ct = st.file_uploader("**CT 이미지를 업로드하세요**", type=["png", "jpg", "jpeg"])
+            mode = st.radio("**분석 모드**", ["단일 이미지", "CT 볼륨"], horizontal=True)
+            uploaded_ct, uploaded_volume = None, None
+            if mode == "CT 볼륨":
+                uploaded_volume = st.file_uploader(
+                    "**CT 볼륨을 업로드하세요** (멀티 페이지 TIFF / .npy / raw)", type=["tif", "tiff", "npy", "raw"]
+                )
+            else:
+                uploaded_ct = st.file_uploader("**CT 이미지를 업로드하세요**", type=["png", "jpg", "jpeg"])
+        
+        # CPU 설정 보고
+        if st.session_state.get("cpu_tuning"):
+            tuning = st.session_state.cpu_tuning
+            st.sidebar.caption(
+                f"⚙️ CPU 설정 ({tuning['source']}): 스레드 {tuning['num_threads']}, "
+                f"interop {tuning['interop_threads']}, 배치 {tuning['batch_size']}"
+            )
+        if self.vision_model is not None:
+            st.sidebar.caption(f"🧠 모델 버전: {self.vision_model.output_version}")
+        
+        # 프로파일링 모드 (환경 변수 샘플링 또는 사이드바 스위치)
+        force_profile = st.sidebar.toggle("🔬 프로파일링 모드", value=False)
+        
+        if uploaded_volume:
+            self._handle_volume_upload(uploaded_volume)
         
         if uploaded_ct:
-            # 이미지 처리
-            image_path = self._process_uploaded_image(uploaded_ct)
-            
-            # 결과 표시
-            mask_path = self._display_results(image_path)
-            
-            if mask_path:
-                # AI 분석
-                self._handle_ai_analysis(image_path, mask_path)
+            profile_active = self.profiler.should_profile(PROFILING_CONFIG["enabled"], force_profile)
+            with self.profiler.capture(profile_active) as profile_session:
+                # 이미지 처리
+                with self.profiler.stage("process_uploaded_image"):
+                    image_path = self._process_uploaded_image(uploaded_ct)
                 
-                # 채팅
-                self._handle_chat(image_path, mask_path)
+                # 결과 표시
+                with self.profiler.stage("display_results"):
+                    mask_path = self._display_results(image_path)
                 
-                # PDF 생성
-                self._handle_pdf_generation(image_path, mask_path)
+                if mask_path:
+                    # LLaVA 분석 선행 시작 (옵션)
+                    self._start_speculative_analysis(image_path, mask_path)
+                    
+                    # AI 분석
+                    with self.profiler.stage("ai_analysis"):
+                        self._handle_ai_analysis(image_path, mask_path)
+                    
+                    # 채팅
+                    with self.profiler.stage("chat"):
+                        self._handle_chat(image_path, mask_path)
+                    
+                    # PDF 생성
+                    with self.profiler.stage("pdf_generation"):
+                        self._handle_pdf_generation(image_path, mask_path)
+            
+            if profile_session.active:
+                UIComponents.display_profile_summary(profile_session)
+        
+        # 분석 이력 검색
+        self._display_history()
 
 # =============================================================================
 # 메인 실행
@@ -0,0 +1,292 @@
+"""
+모델 레지스트리 모듈
+- 여러 체크포인트(백본/클래스 구성) 등록 및 최초 사용 시 지연 로드
+- 메모리 예산 기반 LRU 상주 관리
+- 실행 중인 예측은 기존 모델로 끝내고 새 버전으로 원자적 교체 (핫스왑)
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+import torch
+from .config import MODEL_REGISTRY_CONFIG
+from .vision_model import VisionModel
+
+
+def checkpoint_version(path: str) -> str:
+    """체크포인트 파일명 + 내용 해시 앞 8자리 (예: best_model-1a2b3c4d)"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return f"{os.path.splitext(os.path.basename(path))[0]}-{digest.hexdigest()[:8]}"
+
+
+def model_nbytes(vision_model: VisionModel) -> int:
+    """모델 파라미터 + 버퍼 메모리 크기 (바이트)"""
+    module = vision_model.model
+    return sum(t.numel() * t.element_size() for t in list(module.parameters()) + list(module.buffers()))
+
+
+class _ResidentModel:
+    """메모리에 상주하는 모델 한 버전 (사용 중인 예측 수 추적)"""
+
+    def __init__(self, name: str, spec: Dict, vision_model: VisionModel, mtime: Optional[float]):
+        self.name = name
+        self.spec = spec
+        self.vision_model = vision_model
+        self.mtime = mtime
+        self.nbytes = model_nbytes(vision_model)
+        self.refcount = 0
+        self.retired = False
+
+
+class ModelLease:
+    """acquire() 로 빌린 모델 (with 블록 종료 시 반납)"""
+
+    def __init__(self, registry: "ModelRegistry", resident: _ResidentModel):
+        self._registry = registry
+        self._resident = resident
+        self.vision_model = resident.vision_model
+
+    def release(self):
+        if self._resident is not None:
+            self._registry._release(self._resident)
+            self._resident = None
+
+    def __enter__(self) -> VisionModel:
+        return self.vision_model
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class ModelRegistry:
+    """여러 비전 모델 체크포인트를 관리하는 레지스트리 클래스"""
+
+    def __init__(self, models: Optional[List[Dict]] = None, default: Optional[str] = None,
+                 memory_budget_mb: Optional[float] = None, watch_checkpoints: Optional[bool] = None,
+                 loader: Optional[Callable[[Dict], VisionModel]] = None,
+                 on_load: Optional[Callable[[VisionModel], None]] = None):
+        models = models if models is not None else self.load_model_specs()
+        if not models:
+            raise ValueError("등록된 모델이 없습니다.")
+        self._specs: "OrderedDict[str, Dict]" = OrderedDict((spec["name"], dict(spec)) for spec in models)
+        self.default = default or MODEL_REGISTRY_CONFIG["default"] or next(iter(self._specs))
+        if self.default not in self._specs:
+            raise ValueError(f"기본 모델이 등록되지 않았습니다: {self.default}")
+        budget = memory_budget_mb if memory_budget_mb is not None else MODEL_REGISTRY_CONFIG["memory_budget_mb"]
+        self.memory_budget = int(budget * 1024 ** 2)
+        self.watch_checkpoints = (MODEL_REGISTRY_CONFIG["watch_checkpoints"]
+                                  if watch_checkpoints is None else watch_checkpoints)
+        self.loader = loader or self.load_checkpoint
+        self.on_load = on_load
+
+        self._lock = threading.Lock()
+        self._load_locks = {name: threading.Lock() for name in self._specs}
+        self._residents: "OrderedDict[str, _ResidentModel]" = OrderedDict()  # LRU 순서 (마지막이 최근)
+        self._retired: List[_ResidentModel] = []
+        self.load_reports: Dict[str, object] = {}  # 모델별 on_load 반환값 (예: CPU 튜닝 결과)
+        self.stats = {"loads": 0, "evictions": 0, "swaps": 0}
+
+    @staticmethod
+    def load_model_specs() -> List[Dict]:
+        """설정 또는 JSON 레지스트리 파일(BATTERY_MODEL_REGISTRY)에서 모델 목록 읽기"""
+        registry_file = MODEL_REGISTRY_CONFIG["registry_file"]
+        if registry_file:
+            with open(registry_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data["models"] if isinstance(data, dict) else data
+        return [dict(spec) for spec in MODEL_REGISTRY_CONFIG["models"]]
+
+    @staticmethod
+    def load_checkpoint(spec: Dict) -> VisionModel:
+        """기본 로더: 체크포인트에서 VisionModel 생성 (오류는 호출자가 한 번만 표시하도록 예외로 전달)"""
+        vision_model = VisionModel(spec["path"], num_classes=spec["num_classes"], backbone=spec["backbone"])
+        try:
+            vision_model.load_weights()
+        except Exception as e:
+            raise RuntimeError(f"{spec['path']}: {e}") from e
+        vision_model.model_version = spec.get("version") or checkpoint_version(spec["path"])
+        return vision_model
+
+    # =========================================================================
+    # 조회
+    # =========================================================================
+
+    def names(self) -> List[str]:
+        return list(self._specs)
+
+    def list_models(self) -> List[Dict]:
+        """등록 모델 목록 (상주 여부, 버전, 사용 중인 예측 수 포함)"""
+        with self._lock:
+            rows = []
+            for name, spec in self._specs.items():
+                resident = self._residents.get(name)
+                rows.append({
+                    "name": name,
+                    "path": spec["path"],
+                    "backbone": spec["backbone"],
+                    "num_classes": spec["num_classes"],
+                    "loaded": resident is not None,
+                    "version": resident.vision_model.model_version if resident else spec.get("version"),
+                    "in_flight": resident.refcount if resident else 0,
+                    "memory_mb": resident.nbytes / 1024 ** 2 if resident else 0.0,
+                })
+            return rows
+
+    @property
+    def resident_bytes(self) -> int:
+        with self._lock:
+            return sum(r.nbytes for r in self._residents.values()) + sum(r.nbytes for r in self._retired)
+
+    # =========================================================================
+    # 대여 / 반납
+    # =========================================================================
+
+    def acquire(self, name: Optional[str] = None) -> ModelLease:
+        """모델 대여 (최초 사용 시 로드). 반납 전까지 교체/축출되지 않음"""
+        name = name or self.default
+        if name not in self._specs:
+            raise KeyError(f"등록되지 않은 모델: {name}")
+
+        if self.watch_checkpoints:
+            self._swap_if_changed(name)
+
+        with self._lock:
+            resident = self._residents.get(name)
+            if resident is not None:
+                return self._lease(resident)
+
+        # 같은 모델의 중복 로드 방지 (다른 모델 대여는 막지 않음)
+        with self._load_locks[name]:
+            with self._lock:
+                resident = self._residents.get(name)
+                if resident is not None:
+                    return self._lease(resident)
+                spec = dict(self._specs[name])
+
+            resident = self._load(name, spec)
+            with self._lock:
+                self._residents[name] = resident
+                lease = self._lease(resident)
+                self._enforce_budget()
+            return lease
+
+    def _lease(self, resident: _ResidentModel) -> ModelLease:
+        """(잠금 하에) 참조 수 증가 및 LRU 갱신"""
+        resident.refcount += 1
+        if not resident.retired:
+            self._residents.move_to_end(resident.name)
+        return ModelLease(self, resident)
+
+    def _release(self, resident: _ResidentModel):
+        with self._lock:
+            resident.refcount -= 1
+            if resident.retired and resident.refcount == 0:
+                self._retired.remove(resident)
+                self._unload(resident)
+            else:
+                self._enforce_budget()
+
+    # =========================================================================
+    # 로드 / 축출 / 교체
+    # =========================================================================
+
+    def _load(self, name: str, spec: Dict) -> _ResidentModel:
+        """(잠금 밖에서) 모델 로드"""
+        start = time.perf_counter()
+        vision_model = self.loader(spec)
+        if self.on_load is not None:
+            self.load_reports[name] = self.on_load(vision_model)
+        mtime = os.path.getmtime(spec["path"]) if os.path.exists(spec["path"]) else None
+        resident = _ResidentModel(name, spec, vision_model, mtime)
+        self.stats["loads"] += 1
+        print(f"📦 모델 로드: {name} ({vision_model.model_version}, "
+              f"{resident.nbytes / 1024 ** 2:.1f}MB, {time.perf_counter() - start:.2f}초)")
+        return resident
+
+    def _enforce_budget(self):
+        """(잠금 하에) 예산 초과 시 사용 중이 아닌 모델을 오래된 순으로 축출"""
+        total = sum(r.nbytes for r in self._residents.values()) + sum(r.nbytes for r in self._retired)
+        for name in list(self._residents):
+            if total <= self.memory_budget:
+                break
+            resident = self._residents[name]
+            if resident.refcount > 0:
+                continue
+            del self._residents[name]
+            total -= resident.nbytes
+            self._unload(resident)
+            self.stats["evictions"] += 1
+            print(f"♻️ 모델 축출 (메모리 예산): {name}")
+        if total > self.memory_budget:
+            print(f"⚠️ 사용 중인 모델이 메모리 예산을 초과합니다: {total / 1024 ** 2:.1f}MB")
+
+    def _unload(self, resident: _ResidentModel):
+        resident.vision_model.model = None
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+    def swap(self, name: str, **spec_updates) -> str:
+        """새 버전을 미리 로드한 뒤 원자적으로 교체하고 새 버전명 반환
+
+        교체 이후의 acquire() 는 새 버전을 받고, 이미 대여 중인 예측은 기존 버전으로 끝난 뒤 해제됩니다.
+        """
+        if name not in self._specs:
+            raise KeyError(f"등록되지 않은 모델: {name}")
+        with self._load_locks[name]:
+            spec = {**self._specs[name], **spec_updates}
+            if "path" in spec_updates and "version" not in spec_updates:
+                spec.pop("version", None)
+            resident = self._load(name, spec)
+            with self._lock:
+                self._specs[name] = spec
+                old = self._residents.pop(name, None)
+                self._residents[name] = resident
+                if old is not None:
+                    old.retired = True
+                    if old.refcount == 0:
+                        self._unload(old)
+                    else:
+                        self._retired.append(old)
+                self.stats["swaps"] += 1
+                self._enforce_budget()
+        print(f"🔄 모델 교체: {name} → {resident.vision_model.model_version}")
+        return resident.vision_model.model_version
+
+    def _swap_if_changed(self, name: str):
+        """상주 중인 체크포인트 파일이 갱신되었으면 교체"""
+        with self._lock:
+            resident = self._residents.get(name)
+        if resident is None or resident.mtime is None:
+            return
+        try:
+            mtime = os.path.getmtime(resident.spec["path"])
+        except OSError:
+            return
+        if mtime != resident.mtime:
+            with self._lock:
+                # 다른 스레드가 이미 교체했으면 생략
+                if self._residents.get(name) is not resident:
+                    return
+                resident.mtime = mtime
+            try:
+                self.swap(name)
+            except Exception as e:
+                print(f"⚠️ 갱신된 체크포인트 로드 실패, 기존 버전 유지: {e}")
+
+    def evict(self, name: str) -> bool:
+        """사용 중이 아닌 모델을 명시적으로 내림"""
+        with self._lock:
+            resident = self._residents.get(name)
+            if resident is None or resident.refcount > 0:
+                return False
+            del self._residents[name]
+            self._unload(resident)
+            return True
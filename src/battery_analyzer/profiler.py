@@ -0,0 +1,201 @@
+"""
+요청 단위 프로파일링 모듈 (cProfile + torch.profiler)
+"""
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+import torch
+from .config import PROFILING_CONFIG
+
+# 인터프리터당 cProfile 은 하나만 활성화할 수 있으므로 (Python 3.12+) 동시 캡처는 한 요청만 허용
+_CAPTURE_LOCK = threading.Lock()
+
+
+class ProfileSession:
+    """한 요청에 대한 프로파일링 캡처 결과"""
+
+    def __init__(self, request_id: str, output_dir: str, active: bool):
+        self.request_id = request_id
+        self.output_dir = output_dir
+        self.active = active
+        self.stage_times: Dict[str, float] = {}
+        self.hotspots: List[Dict] = []
+        self.total_time = 0.0
+        self.files: List[str] = []
+
+
+class RequestProfiler:
+    """요청 단위 프로파일러 (샘플링 지원)"""
+
+    def __init__(self, output_dir: str = PROFILING_CONFIG["output_dir"],
+                 sample_rate: float = PROFILING_CONFIG["sample_rate"],
+                 top_n: int = PROFILING_CONFIG["top_n"],
+                 torch_trace: bool = PROFILING_CONFIG["torch_trace"]):
+        self.output_dir = output_dir
+        self.sample_rate = sample_rate
+        self.top_n = top_n
+        self.torch_trace_enabled = torch_trace
+        self.session: Optional[ProfileSession] = None
+        self._cprofile: Optional[cProfile.Profile] = None
+
+    def should_profile(self, enabled: bool, force: bool = False) -> bool:
+        """이번 요청의 프로파일링 여부 결정 (force: 사이드바 스위치 등 수동 요청)"""
+        if force:
+            return True
+        return enabled and random.random() < self.sample_rate
+
+    @contextmanager
+    def capture(self, active: bool):
+        """요청 전체를 cProfile로 캡처 (다른 세션이 캡처 중이거나 시작에 실패하면 프로파일링 없이 실행)"""
+        request_id = f"{time.strftime('%Y%m%d-%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        session = ProfileSession(request_id, os.path.join(self.output_dir, request_id), active)
+        if not active:
+            yield session
+            return
+        if not _CAPTURE_LOCK.acquire(blocking=False):
+            print("⚠️ 다른 요청을 프로파일링 중이라 이번 요청은 프로파일링하지 않습니다.")
+            session.active = False
+            yield session
+            return
+
+        try:
+            os.makedirs(session.output_dir, exist_ok=True)
+            profile = cProfile.Profile()
+            profile.enable()
+        except Exception as e:
+            # 다른 프로파일링 도구가 이미 활성화된 경우 등
+            _CAPTURE_LOCK.release()
+            print(f"⚠️ 프로파일링 시작 실패: {e}")
+            session.active = False
+            yield session
+            return
+
+        self.session = session
+        self._cprofile = profile
+        start = time.perf_counter()
+        try:
+            yield session
+        finally:
+            profile.disable()
+            _CAPTURE_LOCK.release()
+            session.total_time = time.perf_counter() - start
+            self.session = None
+            self._cprofile = None
+            self._write_profile(session, profile)
+            print(f"🔬 프로파일 저장: {session.output_dir}")
+
+    @contextmanager
+    def stage(self, name: str):
+        """단계별 소요 시간 기록 (캡처 중일 때만)"""
+        if self.session is None:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.session.stage_times[name] = time.perf_counter() - start
+
+    @contextmanager
+    def torch_trace(self, name: str = "predict"):
+        """torch.profiler 트레이스 캡처 (캡처 중일 때만)"""
+        session = self.session
+        if session is None or not self.torch_trace_enabled:
+            yield
+            return
+
+        # 프로파일링 오류는 요청 실패로 이어지지 않도록 경고만 출력
+        try:
+            activities = [torch.profiler.ProfilerActivity.CPU]
+            if torch.cuda.is_available():
+                activities.append(torch.profiler.ProfilerActivity.CUDA)
+            prof = torch.profiler.profile(activities=activities)
+            prof.start()
+        except Exception as e:
+            print(f"⚠️ torch 트레이스 시작 실패: {e}")
+            prof = None
+
+        try:
+            yield
+        finally:
+            if prof is not None:
+                self._stop_torch_trace(session, prof, name)
+
+    def _stop_torch_trace(self, session: ProfileSession, prof, name: str):
+        """트레이스 종료 및 저장 (후처리 비용이 cProfile 결과에 섞이지 않도록 일시 중지)"""
+        cprofile = self._cprofile
+        cprofile.disable()
+        try:
+            export_start = time.perf_counter()
+            prof.stop()
+            self._export_torch_trace(session, prof, name)
+            session.stage_times[f"{name}_trace_export"] = time.perf_counter() - export_start
+        except Exception as e:
+            print(f"⚠️ torch 트레이스 종료 실패: {e}")
+        finally:
+            try:
+                cprofile.enable()
+            except Exception as e:
+                print(f"⚠️ cProfile 재개 실패: {e}")
+
+    def _export_torch_trace(self, session: ProfileSession, prof, name: str):
+        """torch.profiler 트레이스와 연산자 요약 저장"""
+        try:
+            trace_path = os.path.join(session.output_dir, f"{name}_trace.json")
+            prof.export_chrome_trace(trace_path)
+            ops_path = os.path.join(session.output_dir, f"{name}_ops.txt")
+            with open(ops_path, "w", encoding="utf-8") as f:
+                f.write(prof.key_averages().table(sort_by="self_cpu_time_total", row_limit=self.top_n))
+            session.files.extend([trace_path, ops_path])
+        except Exception as e:
+            print(f"⚠️ torch 트레이스 저장 실패: {e}")
+
+    def _write_profile(self, session: ProfileSession, profile: cProfile.Profile):
+        """cProfile 덤프와 상위 N개 핫스팟 요약 저장"""
+        try:
+            prof_path = os.path.join(session.output_dir, "cprofile.prof")
+            profile.dump_stats(prof_path)
+
+            stats = pstats.Stats(profile)
+            session.hotspots = self._top_hotspots(stats)
+
+            stream = io.StringIO()
+            pstats.Stats(profile, stream=stream).sort_stats("cumulative").print_stats(self.top_n)
+            text_path = os.path.join(session.output_dir, "hotspots.txt")
+            with open(text_path, "w", encoding="utf-8") as f:
+                f.write(stream.getvalue())
+
+            summary_path = os.path.join(session.output_dir, "summary.json")
+            with open(summary_path, "w", encoding="utf-8") as f:
+                json.dump({
+                    "request_id": session.request_id,
+                    "total_time": session.total_time,
+                    "stage_times": session.stage_times,
+                    "hotspots": session.hotspots,
+                }, f, indent=2, ensure_ascii=False)
+            session.files.extend([prof_path, text_path, summary_path])
+        except Exception as e:
+            print(f"⚠️ 프로파일 저장 실패: {e}")
+
+    def _top_hotspots(self, stats: pstats.Stats) -> List[Dict]:
+        """자체 실행 시간(tottime) 기준 상위 N개 함수"""
+        rows = []
+        for (filename, line, func), (cc, ncalls, tottime, cumtime, _) in stats.stats.items():
+            rows.append({
+                "function": f"{os.path.basename(filename)}:{line}({func})",
+                "ncalls": ncalls,
+                "tottime": round(tottime, 4),
+                "cumtime": round(cumtime, 4),
+            })
+        rows.sort(key=lambda row: row["tottime"], reverse=True)
+        return rows[:self.top_n]
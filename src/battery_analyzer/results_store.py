@@ -0,0 +1,292 @@
+"""
+분석 결과 저장소 모듈
+- 레이블 맵: 대용량 uint8 세그먼트 파일에 연속 저장 (메모리 매핑, 오프셋 색인)
+- 메타데이터: SQLite 색인 (이미지 해시, 시각, 모델 버전, 클래스별 면적, LLaVA 분석 결과)
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from .config import DEFECT_CLASSES, RESULTS_CONFIG
+from .image_processor import ImageProcessor
+
+# 세그먼트 내 마스크 시작 위치 정렬 단위 (바이트)
+_ALIGNMENT = 64
+
+
+def _area_column(class_id: int) -> str:
+    """클래스별 면적 컬럼명 (예: area_resin_overflow)"""
+    return "area_" + DEFECT_CLASSES[class_id].lower().replace(" ", "_")
+
+
+AREA_COLUMNS = {class_id: _area_column(class_id) for class_id in DEFECT_CLASSES}
+
+
+def _to_signed(phash: Optional[int]) -> Optional[int]:
+    """64비트 부호 없는 해시 → SQLite INTEGER(부호 있는 64비트) 값"""
+    if phash is None:
+        return None
+    return phash - (1 << 64) if phash >= 1 << 63 else phash
+
+
+class ResultsStore:
+    """색인된 메모리 매핑 분석 결과 저장소 클래스"""
+
+    def __init__(self, root_dir: str = RESULTS_CONFIG["root_dir"],
+                 segment_size: int = RESULTS_CONFIG["segment_size_mb"] * 1024 ** 2):
+        self.root_dir = root_dir
+        self.segment_dir = os.path.join(root_dir, "segments")
+        self.segment_size = segment_size
+        self._lock = threading.Lock()
+        self._readers: Dict[int, np.memmap] = {}
+        os.makedirs(self.segment_dir, exist_ok=True)
+
+        self.conn = sqlite3.connect(os.path.join(root_dir, "index.sqlite3"),
+                                    check_same_thread=False, timeout=30, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_schema()
+
+    def _create_schema(self):
+        """테이블 및 색인 생성"""
+        area_columns = ", ".join(f"{column} INTEGER NOT NULL DEFAULT 0" for column in AREA_COLUMNS.values())
+        self.conn.executescript(f"""
+            CREATE TABLE IF NOT EXISTS segments (
+                segment INTEGER PRIMARY KEY,
+                capacity INTEGER NOT NULL,
+                used INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS analyses (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                image_hash TEXT NOT NULL,
+                image_name TEXT,
+                created_at REAL NOT NULL,
+                model_version TEXT,
+                height INTEGER NOT NULL,
+                width INTEGER NOT NULL,
+                segment INTEGER NOT NULL,
+                offset INTEGER NOT NULL,
+                detected_defects TEXT,
+                llava_output TEXT,
+                phash INTEGER,
+                {area_columns}
+            );
+            CREATE INDEX IF NOT EXISTS idx_analyses_hash ON analyses(image_hash);
+            CREATE INDEX IF NOT EXISTS idx_analyses_created ON analyses(created_at);
+        """)
+        # 이전 버전 저장소: 지각 해시 컬럼 추가
+        columns = {row["name"] for row in self.conn.execute("PRAGMA table_info(analyses)")}
+        if "phash" not in columns:
+            self.conn.execute("ALTER TABLE analyses ADD COLUMN phash INTEGER")
+        for class_id, column in AREA_COLUMNS.items():
+            if class_id > 1:
+                self.conn.execute(f"CREATE INDEX IF NOT EXISTS idx_analyses_{column} ON analyses({column})")
+
+    @staticmethod
+    def hash_image(image_path: str) -> str:
+        """이미지 파일 SHA-256 해시"""
+        digest = hashlib.sha256()
+        with open(image_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    # =========================================================================
+    # 세그먼트 관리
+    # =========================================================================
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.segment_dir, f"segment_{segment:05d}.bin")
+
+    def _allocate(self, nbytes: List[int]) -> List[tuple]:
+        """(트랜잭션 안에서) 마스크별 (segment, offset) 할당"""
+        row = self.conn.execute("SELECT segment, capacity, used FROM segments ORDER BY segment DESC LIMIT 1").fetchone()
+        segment, capacity, used = (row["segment"], row["capacity"], row["used"]) if row else (-1, 0, 0)
+
+        placements = []
+        for size in nbytes:
+            offset = (used + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+            if segment < 0 or offset + size > capacity:
+                segment += 1
+                capacity = max(self.segment_size, size)
+                offset = 0
+                with open(self._segment_path(segment), "wb") as f:
+                    f.truncate(capacity)  # 희소 파일로 미리 할당
+                self.conn.execute("INSERT INTO segments (segment, capacity, used) VALUES (?, ?, 0)",
+                                  (segment, capacity))
+            placements.append((segment, offset))
+            used = offset + size
+            self.conn.execute("UPDATE segments SET used = ? WHERE segment = ?", (used, segment))
+        return placements
+
+    def _write(self, writers: Dict[int, np.memmap], segment: int, offset: int, mask: np.ndarray):
+        """세그먼트 파일의 지정 위치에 마스크 기록 (배치 동안 세그먼트별 매핑 재사용)"""
+        writer = writers.get(segment)
+        if writer is None:
+            writer = np.memmap(self._segment_path(segment), dtype=np.uint8, mode="r+")
+            writers[segment] = writer
+        writer[offset:offset + mask.size] = mask.ravel()
+
+    def _reader(self, segment: int) -> np.memmap:
+        """세그먼트 읽기 전용 메모리 매핑 (캐시)"""
+        reader = self._readers.get(segment)
+        if reader is None:
+            reader = np.memmap(self._segment_path(segment), dtype=np.uint8, mode="r")
+            self._readers[segment] = reader
+        return reader
+
+    # =========================================================================
+    # 추가 / 수정
+    # =========================================================================
+
+    def append(self, image_hash: str, mask: np.ndarray, model_version: Optional[str] = None,
+               llava_output: Optional[str] = None, image_name: Optional[str] = None,
+               phash: Optional[int] = None) -> int:
+        """단일 결과 추가 후 ID 반환"""
+        return self.append_many([{
+            "image_hash": image_hash, "mask": mask, "model_version": model_version,
+            "llava_output": llava_output, "image_name": image_name, "phash": phash,
+        }])[0]
+
+    def append_many(self, records: List[Dict]) -> List[int]:
+        """배치 결과를 한 트랜잭션으로 추가 (record: image_hash, mask, model_version, llava_output, image_name, phash)"""
+        masks = [np.ascontiguousarray(record["mask"], dtype=np.uint8) for record in records]
+        columns = ["image_hash", "image_name", "created_at", "model_version", "height", "width",
+                   "segment", "offset", "detected_defects", "llava_output", "phash"] + list(AREA_COLUMNS.values())
+        sql = f"INSERT INTO analyses ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+
+        ids = []
+        with self._lock:
+            # BEGIN IMMEDIATE: 다른 프로세스와의 오프셋 할당 경쟁 방지
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                placements = self._allocate([mask.size for mask in masks])
+                writers: Dict[int, np.memmap] = {}
+                for record, mask, (segment, offset) in zip(records, masks, placements):
+                    self._write(writers, segment, offset, mask)
+                    areas = ImageProcessor.compute_class_areas(mask)
+                    defects = [int(d) for d in ImageProcessor.get_detected_defects(mask)]
+                    cursor = self.conn.execute(sql, [
+                        record["image_hash"], record.get("image_name"), record.get("created_at", time.time()),
+                        record.get("model_version"), mask.shape[0], mask.shape[1], segment, offset,
+                        json.dumps(defects), record.get("llava_output"), _to_signed(record.get("phash")),
+                    ] + [areas[class_id] for class_id in AREA_COLUMNS])
+                    ids.append(cursor.lastrowid)
+                for writer in writers.values():
+                    writer.flush()
+                writers.clear()
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return ids
+
+    def update_analysis(self, result_id: int, llava_output: str):
+        """LLaVA 분석 결과 기록"""
+        with self._lock:
+            self.conn.execute("UPDATE analyses SET llava_output = ? WHERE id = ?", (llava_output, result_id))
+
+    # =========================================================================
+    # 조회
+    # =========================================================================
+
+    def _fetch(self, sql: str, params=()) -> List[sqlite3.Row]:
+        """잠금 하에 조회 (여러 세션 스레드가 연결을 공유)"""
+        with self._lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def get_record(self, result_id: int) -> Optional[Dict]:
+        rows = self._fetch("SELECT * FROM analyses WHERE id = ?", (result_id,))
+        row = rows[0] if rows else None
+        return self._row_to_dict(row) if row else None
+
+    def ids_with_version(self, result_ids: List[int], model_version: str) -> Set[int]:
+        """result_ids 중 model_version 으로 만든 결과의 ID 집합 (근사 중복 후보 필터링용)"""
+        found = set()
+        for start in range(0, len(result_ids), 500):
+            chunk = [int(i) for i in result_ids[start:start + 500]]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self._fetch(f"SELECT id FROM analyses WHERE model_version = ? AND id IN ({placeholders})",
+                               [model_version, *chunk])
+            found.update(row[0] for row in rows)
+        return found
+
+    def get_mask(self, result_id: int) -> np.ndarray:
+        """레이블 맵 조회 (세그먼트 메모리 매핑의 읽기 전용 뷰, 복사 없음)"""
+        rows = self._fetch("SELECT segment, offset, height, width FROM analyses WHERE id = ?", (result_id,))
+        if not rows:
+            raise KeyError(f"결과가 없습니다: {result_id}")
+        row = rows[0]
+        size = row["height"] * row["width"]
+        with self._lock:
+            reader = self._reader(row["segment"])
+        return reader[row["offset"]:row["offset"] + size].reshape(row["height"], row["width"])
+
+    def find_by_hash(self, image_hash: str, model_version: Optional[str] = None) -> Optional[Dict]:
+        """같은 이미지의 가장 최근 결과"""
+        sql = "SELECT * FROM analyses WHERE image_hash = ?"
+        params: list = [image_hash]
+        if model_version is not None:
+            sql += " AND model_version = ?"
+            params.append(model_version)
+        rows = self._fetch(sql + " ORDER BY created_at DESC LIMIT 1", params)
+        return self._row_to_dict(rows[0]) if rows else None
+
+    def query(self, min_areas: Optional[Dict[str, int]] = None, since: Optional[float] = None,
+              until: Optional[float] = None, model_version: Optional[str] = None,
+              limit: int = 100) -> List[Dict]:
+        """조건 검색 (예: min_areas={"Porosity": 500} → Porosity 면적 500 초과)"""
+        name_to_id = {name: class_id for class_id, name in DEFECT_CLASSES.items()}
+        clauses, params = [], []
+        for name, min_area in (min_areas or {}).items():
+            if name not in name_to_id:
+                raise ValueError(f"알 수 없는 클래스: {name}")
+            clauses.append(f"{AREA_COLUMNS[name_to_id[name]]} > ?")
+            params.append(min_area)
+        if since is not None:
+            clauses.append("created_at >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("created_at < ?")
+            params.append(until)
+        if model_version is not None:
+            clauses.append("model_version = ?")
+            params.append(model_version)
+
+        sql = "SELECT * FROM analyses"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY created_at DESC LIMIT ?"
+        params.append(limit)
+        return [self._row_to_dict(row) for row in self._fetch(sql, params)]
+
+    def load_phashes(self, after_id: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+        """ID 가 after_id 보다 큰 결과의 (ID, 지각 해시) 배열 (근사 중복 색인 증분 동기화용)"""
+        rows = self._fetch("SELECT id, phash FROM analyses WHERE id > ? AND phash IS NOT NULL ORDER BY id",
+                           (after_id,))
+        ids = np.array([row[0] for row in rows], dtype=np.int64)
+        hashes = np.array([row[1] for row in rows], dtype=np.int64).view(np.uint64)
+        return ids, hashes
+
+    def count(self) -> int:
+        return self._fetch("SELECT COUNT(*) FROM analyses")[0][0]
+
+    @staticmethod
+    def _row_to_dict(row: sqlite3.Row) -> Dict:
+        record = dict(row)
+        record["detected_defects"] = json.loads(record["detected_defects"] or "[]")
+        if record.get("phash") is not None:
+            record["phash"] &= (1 << 64) - 1
+        record["areas"] = {DEFECT_CLASSES[class_id]: record.pop(column) for class_id, column in AREA_COLUMNS.items()}
+        return record
+
+    def close(self):
+        self._readers.clear()
+        self.conn.close()
@@ -0,0 +1,438 @@
+"""
+로컬 HTTP 추론 서비스 모듈
+- 모델을 한 번만 로드하여 모든 요청이 공유
+- asyncio 기반 HTTP/1.1 서버 (표준 라이브러리만 사용)
+- 세그멘테이션 / LLaVA 분석 동시 실행 수 제한
+
+엔드포인트:
+    GET  /healthz                         프로세스 생존 확인
+    GET  /readyz                          모델 준비 상태 (서브프로세스 호출 없음)
+    GET  /stats                           요청 통계
+    POST /predict?format=json|png|raw     본문: 인코딩된 이미지 (PNG/JPG)
+                 &size=model|original     마스크 해상도
+                 &colored=1               (png) 컬러 마스크
+    POST /overlay                         원본 해상도 오버레이 PNG
+    POST /analyze?triage=1                결함 정보 + LLaVA 분석 (JSON)
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlsplit
+
+import cv2
+import numpy as np
+from PIL import Image
+from .config import DEFECT_CLASSES, MODEL_CONFIG, SERVER_CONFIG, TRIAGE_CONFIG
+from .file_manager import FileManager
+from .image_processor import ImageProcessor
+from .triage import TriagePolicy
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+_CHUNK_SIZE = 64 * 1024
+_PREDICT_FORMATS = ("json", "png", "raw")
+_MASK_SIZES = ("model", "original")
+
+
+class HTTPError(Exception):
+    """HTTP 오류 응답"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class InferenceService:
+    """세그멘테이션 / 분석 HTTP 서비스 클래스"""
+
+    def __init__(self, vision_model, ai_analyzer=None, config: Optional[Dict] = None):
+        self.vision_model = vision_model
+        self.ai_analyzer = ai_analyzer
+        self.config = {**SERVER_CONFIG, **(config or {})}
+        self.file_manager = FileManager()
+        self.triage_policy = TriagePolicy()
+        self._executor = ThreadPoolExecutor(max_workers=self.config["max_concurrency"],
+                                            thread_name_prefix="segment")
+        self._llm_executor = ThreadPoolExecutor(max_workers=self.config["llm_concurrency"],
+                                                thread_name_prefix="llava")
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._llm_semaphore: Optional[asyncio.Semaphore] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self.stats = {"requests": 0, "errors": 0, "rejected": 0, "pending": 0, "in_flight": 0}
+
+    # =========================================================================
+    # 서버 수명 주기
+    # =========================================================================
+
+    async def start(self, host: str = None, port: int = None) -> asyncio.AbstractServer:
+        """서버 시작 (port=0 이면 임의 포트)"""
+        self._semaphore = asyncio.Semaphore(self.config["max_concurrency"])
+        self._llm_semaphore = asyncio.Semaphore(self.config["llm_concurrency"])
+        self._server = await asyncio.start_server(
+            self._handle_connection,
+            host or self.config["host"],
+            self.config["port"] if port is None else port,
+        )
+        return self._server
+
+    @property
+    def port(self) -> int:
+        return self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        self._executor.shutdown(wait=False)
+        self._llm_executor.shutdown(wait=False)
+
+    def run(self, host: str = None, port: int = None):
+        """서버를 실행하고 종료될 때까지 대기"""
+        async def _main():
+            server = await self.start(host, port)
+            print(f"🚀 추론 서비스 시작: http://{server.sockets[0].getsockname()[0]}:{self.port}")
+            async with server:
+                await server.serve_forever()
+        asyncio.run(_main())
+
+    # =========================================================================
+    # HTTP 처리
+    # =========================================================================
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """연결 처리 (keep-alive 지원)"""
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except HTTPError as e:
+                    await self._send_json(writer, e.status, {"error": e.message}, keep_alive=False)
+                    break
+                if request is None:
+                    break
+
+                method, path, query, headers, body = request
+                keep_alive = headers.get("connection", "").lower() != "close"
+                self.stats["requests"] += 1
+                try:
+                    status, payload, content_type, extra = await self._dispatch(method, path, query, body)
+                except HTTPError as e:
+                    self.stats["errors"] += 1
+                    status, payload, content_type, extra = e.status, self._json_bytes({"error": e.message}), \
+                        "application/json", {}
+                except Exception as e:
+                    self.stats["errors"] += 1
+                    print(f"❌ 요청 처리 오류: {e}")
+                    status, payload, content_type, extra = 500, self._json_bytes({"error": str(e)}), \
+                        "application/json", {}
+                await self._send(writer, status, payload, content_type, extra, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionResetError, BrokenPipeError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader):
+        """요청 줄, 헤더, 본문 읽기 (연결 종료 시 None)"""
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError:
+            return None
+        except asyncio.LimitOverrunError:
+            raise HTTPError(400, "헤더가 너무 큽니다.")
+
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, _ = lines[0].split(" ", 2)
+        except ValueError:
+            raise HTTPError(400, "잘못된 요청 줄입니다.")
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                key, value = line.split(":", 1)
+                headers[key.strip().lower()] = value.strip()
+
+        length_text = headers.get("content-length", "0") or "0"
+        if not (length_text.isascii() and length_text.isdigit()):
+            raise HTTPError(400, f"잘못된 Content-Length: {length_text}")
+        length = int(length_text)
+        if length > self.config["max_body_mb"] * 1024 ** 2:
+            raise HTTPError(413, "요청 본문이 너무 큽니다.")
+        body = await reader.readexactly(length) if length else b""
+
+        url = urlsplit(target)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        return method.upper(), url.path, query, headers, body
+
+    async def _send(self, writer: asyncio.StreamWriter, status: int, payload, content_type: str,
+                    extra_headers: Optional[Dict[str, str]] = None, keep_alive: bool = True):
+        """응답 전송 (메모리에 있는 본문을 청크 단위로 쓰고 청크마다 drain 하여 쓰기 버퍼가 커지지 않게 함)"""
+        payload = memoryview(payload).cast("B")
+        headers = {
+            "Content-Type": content_type,
+            "Content-Length": str(payload.nbytes),
+            "Connection": "keep-alive" if keep_alive else "close",
+            **(extra_headers or {}),
+        }
+        head = f"HTTP/1.1 {status} {_REASONS.get(status, 'Unknown')}\r\n"
+        head += "".join(f"{key}: {value}\r\n" for key, value in headers.items()) + "\r\n"
+        writer.write(head.encode("latin-1", errors="replace"))
+        for start in range(0, payload.nbytes, _CHUNK_SIZE):
+            writer.write(payload[start:start + _CHUNK_SIZE])
+            await writer.drain()
+        await writer.drain()
+
+    async def _send_json(self, writer, status: int, data: Dict, keep_alive: bool = True):
+        await self._send(writer, status, self._json_bytes(data), "application/json", None, keep_alive)
+
+    @staticmethod
+    def _json_bytes(data: Dict) -> bytes:
+        return json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+    async def _dispatch(self, method: str, path: str, query: Dict[str, str], body: bytes):
+        """경로별 처리 → (status, payload, content_type, extra_headers)"""
+        routes = {
+            "/healthz": ("GET", self._healthz),
+            "/readyz": ("GET", self._readyz),
+            "/stats": ("GET", self._stats),
+            "/predict": ("POST", self._predict),
+            "/overlay": ("POST", self._overlay),
+            "/analyze": ("POST", self._analyze),
+        }
+        if path not in routes:
+            raise HTTPError(404, f"알 수 없는 경로: {path}")
+        expected, handler = routes[path]
+        if method != expected:
+            raise HTTPError(405, f"{path} 는 {expected} 요청만 지원합니다.")
+        if expected == "POST" and not body:
+            raise HTTPError(400, "요청 본문에 이미지가 없습니다.")
+        return await handler(query, body)
+
+    # =========================================================================
+    # 모델 실행 (동시 실행 수 제한)
+    # =========================================================================
+
+    async def _run_bounded(self, semaphore: asyncio.Semaphore, executor: ThreadPoolExecutor, fn, *args):
+        """대기열 상한 확인 후 세마포어 범위 안에서 스레드 풀 실행"""
+        if self.stats["pending"] >= self.config["max_pending"]:
+            self.stats["rejected"] += 1
+            raise HTTPError(503, "요청이 많아 처리할 수 없습니다. 잠시 후 다시 시도하세요.")
+        self.stats["pending"] += 1
+        try:
+            await semaphore.acquire()
+        finally:
+            self.stats["pending"] -= 1
+
+        self.stats["in_flight"] += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+        finally:
+            self.stats["in_flight"] -= 1
+            semaphore.release()
+
+    def _segment(self, body: bytes, with_confidence: bool = False, full_image: bool = True) -> Dict:
+        """디코딩 + 세그멘테이션 + 결함 통계 (작업 스레드에서 실행)
+        full_image=False 이면 표시용 원본 해상도 이미지를 만들지 않고 인코딩된 본문으로 바로 예측 (image 는 None)"""
+        start = time.perf_counter()
+        try:
+            if full_image:
+                image = self.vision_model.load_image(body)
+                height, width = image.shape[:2]
+                source = image
+            else:
+                # 원본 크기는 헤더에서만 읽음
+                with Image.open(io.BytesIO(body)) as header:
+                    width, height = header.size
+                image, source = None, body
+        except (ValueError, OSError):
+            raise HTTPError(400, "이미지를 디코딩할 수 없습니다.")
+
+        try:
+            confidence = None
+            if with_confidence:
+                _, mask, confidence = self.vision_model.predict_with_confidence(
+                    source, TRIAGE_CONFIG["uncertain_threshold"]
+                )
+            else:
+                _, mask = self.vision_model.predict(source)
+        except ValueError:
+            if full_image:
+                raise
+            raise HTTPError(400, "이미지를 디코딩할 수 없습니다.")
+        mask = mask.astype(np.uint8)
+
+        return {
+            "image": image,
+            "image_size": (width, height),
+            "mask": mask,
+            "confidence": confidence,
+            "detected_defects": [int(d) for d in ImageProcessor.get_detected_defects(mask)],
+            "class_areas": ImageProcessor.compute_class_areas(mask),
+            "latency_ms": (time.perf_counter() - start) * 1000,
+        }
+
+    def _summary(self, result: Dict) -> Dict:
+        """JSON 응답용 결과 요약"""
+        return {
+            "model_version": self.vision_model.output_version,
+            "image_size": [int(result["image_size"][0]), int(result["image_size"][1])],
+            "mask_size": [int(result["mask"].shape[1]), int(result["mask"].shape[0])],
+            "detected_defects": [DEFECT_CLASSES.get(d, f"Class {d}") for d in result["detected_defects"]],
+            "class_areas": {DEFECT_CLASSES[c]: area for c, area in result["class_areas"].items()},
+            "latency_ms": round(result["latency_ms"], 2),
+        }
+
+    # =========================================================================
+    # 엔드포인트
+    # =========================================================================
+
+    async def _healthz(self, query, body):
+        return 200, self._json_bytes({"status": "ok"}), "application/json", {}
+
+    async def _readyz(self, query, body):
+        ready = self.vision_model is not None and self.vision_model.model is not None
+        data = {
+            "ready": ready,
+            "device": self.vision_model.device if self.vision_model else None,
+            "model_version": self.vision_model.output_version if self.vision_model else None,
+            "analyzer": self.ai_analyzer is not None,
+        }
+        return (200 if ready else 503), self._json_bytes(data), "application/json", {}
+
+    async def _stats(self, query, body):
+        return 200, self._json_bytes({**self.stats, "triage": self.triage_policy.stats}), "application/json", {}
+
+    async def _predict(self, query, body):
+        # 잘못된 질의는 세그멘테이션 슬롯을 차지하기 전에 거절
+        output_format = query.get("format", "json")
+        if output_format not in _PREDICT_FORMATS:
+            raise HTTPError(400, f"지원하지 않는 형식: {output_format} (지원: {', '.join(_PREDICT_FORMATS)})")
+        mask_size = query.get("size", "model")
+        if mask_size not in _MASK_SIZES:
+            raise HTTPError(400, f"지원하지 않는 마스크 크기: {mask_size} (지원: {', '.join(_MASK_SIZES)})")
+
+        # 마스크만 반환하므로 표시용 원본 해상도 이미지는 만들지 않음
+        result = await self._run_bounded(self._semaphore, self._executor, self._segment, body, False, False)
+        if output_format == "json":
+            return 200, self._json_bytes(self._summary(result)), "application/json", {}
+
+        mask = result["mask"]
+        if mask_size == "original":
+            width, height = result["image_size"]
+            mask = cv2.resize(mask, (width, height), interpolation=cv2.INTER_NEAREST)
+        headers = {
+            "X-Mask-Height": str(mask.shape[0]),
+            "X-Mask-Width": str(mask.shape[1]),
+            "X-Detected-Defects": ",".join(str(d) for d in result["detected_defects"]),
+            "X-Model-Version": str(self.vision_model.output_version),
+        }
+
+        if output_format == "raw":
+            return 200, np.ascontiguousarray(mask).data, "application/octet-stream", headers
+        if query.get("colored") == "1":
+            mask = cv2.cvtColor(ImageProcessor.create_colored_mask(mask), cv2.COLOR_RGB2BGR)
+        ok, encoded = cv2.imencode(".png", mask)
+        if not ok:
+            raise HTTPError(500, "PNG 인코딩 실패")
+        return 200, encoded.data, "image/png", headers
+
+    async def _overlay(self, query, body):
+        def render():
+            result = self._segment(body)
+            image = result["image"]
+            colored_mask = cv2.resize(ImageProcessor.create_colored_mask(result["mask"]),
+                                      (image.shape[1], image.shape[0]), interpolation=cv2.INTER_NEAREST)
+            overlay = ImageProcessor.create_overlay(image, colored_mask)
+            ok, encoded = cv2.imencode(".png", cv2.cvtColor(overlay, cv2.COLOR_RGB2BGR))
+            if not ok:
+                raise HTTPError(500, "PNG 인코딩 실패")
+            return encoded
+
+        encoded = await self._run_bounded(self._semaphore, self._executor, render)
+        return 200, encoded.data, "image/png", {}
+
+    async def _analyze(self, query, body):
+        use_triage = query.get("triage", "1") == "1"
+        result = await self._run_bounded(self._semaphore, self._executor, self._segment, body, use_triage)
+        response = self._summary(result)
+
+        decision = self.triage_policy.decide(result["mask"], result["confidence"]) if use_triage else None
+        if decision is not None:
+            response["triage"] = {"route": decision["route"], "reason": decision["reason"]}
+        if decision is not None and decision["route"] == "template":
+            response.update({"analysis": decision["verdict"], "llm_called": False})
+            return 200, self._json_bytes(response), "application/json", {}
+
+        if self.ai_analyzer is None:
+            raise HTTPError(503, "AI 분석기가 설정되지 않았습니다.")
+
+        if result["detected_defects"]:
+            defect_info = f"Detected defects: {', '.join(response['detected_defects'])}"
+            analysis_type = "defect_analysis"
+        else:
+            defect_info = "No defects detected (Normal battery)"
+            analysis_type = "normal_analysis"
+
+        # AIAnalyzer는 파일 경로를 입력으로 받으므로 임시 파일 작성
+        image = result["image"]
+        image_path = self.file_manager.create_temp_image_path("server_image", "png")
+        mask_path = self.file_manager.create_temp_image_path("server_mask", "png")
+
+        def write_inputs():
+            colored_mask = cv2.resize(ImageProcessor.create_colored_mask(result["mask"]),
+                                      (image.shape[1], image.shape[0]), interpolation=cv2.INTER_NEAREST)
+            cv2.imwrite(image_path, cv2.cvtColor(image, cv2.COLOR_RGB2BGR))
+            cv2.imwrite(mask_path, colored_mask)
+
+        await asyncio.get_running_loop().run_in_executor(self._executor, write_inputs)
+        try:
+            start = time.perf_counter()
+            analysis = await self._run_bounded(
+                self._llm_semaphore, self._llm_executor,
+                self.ai_analyzer.analyze_image, image_path, mask_path, defect_info, analysis_type,
+            )
+            response["analysis_latency_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        finally:
+            self.file_manager.cleanup_temp_files([image_path, mask_path])
+
+        response.update({"analysis": analysis, "llm_called": True})
+        return 200, self._json_bytes(response), "application/json", {}
+
+
+def main(argv=None):
+    """명령행 서버 실행"""
+    from .ai_analyzer import AIAnalyzer
+    from .cpu_tuner import CPUAutoTuner
+    from .vision_model import VisionModel
+
+    parser = argparse.ArgumentParser(description="배터리 결함 분석 로컬 HTTP 추론 서비스")
+    parser.add_argument("--host", default=SERVER_CONFIG["host"])
+    parser.add_argument("--port", type=int, default=SERVER_CONFIG["port"])
+    parser.add_argument("--model-path", default=MODEL_CONFIG["path"])
+    parser.add_argument("--max-concurrency", type=int, default=SERVER_CONFIG["max_concurrency"])
+    parser.add_argument("--no-analyzer", action="store_true", help="/analyze 의 LLaVA 호출 비활성화")
+    args = parser.parse_args(argv)
+
+    vision_model = VisionModel(args.model_path, MODEL_CONFIG["num_classes"], MODEL_CONFIG["backbone"])
+    if not (os.path.exists(args.model_path) and vision_model.load_model()):
+        raise SystemExit(f"비전 모델을 로드할 수 없습니다: {args.model_path}")
+    CPUAutoTuner().configure(vision_model)
+
+    service = InferenceService(
+        vision_model,
+        None if args.no_analyzer else AIAnalyzer(),
+        {"max_concurrency": args.max_concurrency},
+    )
+    service.run(args.host, args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+LLaVA 분석 선행 실행 모듈
+- 세그멘테이션 직후 백그라운드 작업자에서 분석을 미리 시작
+- 세션별 작업(future)은 업로드 해시로 식별, 다른 이미지 업로드 시 취소/폐기
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Optional, Tuple
+
+from .config import SPECULATIVE_CONFIG
+
+
+class SpeculativeJob:
+    """미리 시작한 분석 작업 한 건"""
+
+    def __init__(self, key: str, work_dir: str):
+        self.key = key
+        self.work_dir = work_dir
+        self.future: Optional[Future] = None
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.cancelled = False
+
+    @property
+    def done(self) -> bool:
+        return self.future is not None and self.future.done()
+
+    def time_saved(self, requested_at: float) -> float:
+        """요청 시점 기준으로 이미 진행된 분석 시간 (= 절약된 대기 시간)"""
+        if self.started_at is None:
+            return 0.0
+        end = self.finished_at if self.finished_at is not None else requested_at
+        return max(min(end, requested_at) - self.started_at, 0.0)
+
+
+class SpeculativeAnalyzer:
+    """AIAnalyzer.analyze_image 를 백그라운드에서 미리 실행하는 클래스 (세션 간 작업자 공유)"""
+
+    def __init__(self, ai_analyzer, max_workers: int = SPECULATIVE_CONFIG["max_workers"],
+                 work_root: str = SPECULATIVE_CONFIG["work_dir"]):
+        self.ai_analyzer = ai_analyzer
+        self.work_root = work_root
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="speculative")
+        self._lock = threading.Lock()
+        self.stats = {"submitted": 0, "used": 0, "cancelled": 0, "discarded": 0, "bypassed": 0,
+                      "timed_out": 0, "time_saved_s": 0.0}
+        os.makedirs(work_root, exist_ok=True)
+
+    def submit(self, key: str, image_path: str, mask_path: str, defect_info: str,
+               analysis_type: str) -> SpeculativeJob:
+        """입력 파일을 작업 전용 폴더에 복사한 뒤 분석 시작 (원본 임시 파일은 재실행마다 정리됨)"""
+        job = SpeculativeJob(key, tempfile.mkdtemp(prefix="job_", dir=self.work_root))
+        image_copy = shutil.copy(image_path, job.work_dir)
+        mask_copy = shutil.copy(mask_path, job.work_dir)
+        job.future = self._executor.submit(self._run, job, image_copy, mask_copy, defect_info, analysis_type)
+        job.future.add_done_callback(lambda _: shutil.rmtree(job.work_dir, ignore_errors=True))
+        with self._lock:
+            self.stats["submitted"] += 1
+        print(f"🔮 LLaVA 분석 선행 시작: {key[:12]}")
+        return job
+
+    def _run(self, job: SpeculativeJob, image_path: str, mask_path: str, defect_info: str,
+             analysis_type: str) -> Optional[str]:
+        if job.cancelled:
+            return None
+        job.started_at = time.time()
+        try:
+            return self.ai_analyzer.analyze_image(image_path, mask_path, defect_info, analysis_type)
+        finally:
+            job.finished_at = time.time()
+            if job.cancelled:
+                print(f"🗑️ 취소된 선행 분석 결과 폐기: {job.key[:12]}")
+
+    def result(self, job: SpeculativeJob,
+               timeout: Optional[float] = SPECULATIVE_CONFIG["result_timeout"]) -> Tuple[Optional[str], float]:
+        """분석 결과 대기 (이미 끝났으면 즉시), (결과, 절약된 대기 시간) 반환
+
+        다른 세션의 선행 작업 뒤에서 아직 시작하지 않았으면 취소하고 (None, 0) 을 반환하여 호출자가 바로
+        직접 분석하도록 합니다. 실행 중이면 timeout 초까지만 기다리고, 초과하면 결과를 폐기하고 (None, 0) 반환.
+        """
+        requested_at = time.time()
+        if job.future.cancel():
+            job.cancelled = True
+            with self._lock:
+                self.stats["bypassed"] += 1
+            print(f"⏭️ 대기 중인 선행 분석 취소, 직접 분석: {job.key[:12]}")
+            return None, 0.0
+        try:
+            output = job.future.result(timeout)
+        except FutureTimeoutError:
+            self.cancel(job)
+            with self._lock:
+                self.stats["timed_out"] += 1
+            print(f"⏱️ 선행 분석 대기 시간 초과 ({timeout:.0f}초), 직접 분석: {job.key[:12]}")
+            return None, 0.0
+        saved = job.time_saved(requested_at)
+        with self._lock:
+            self.stats["used"] += 1
+            self.stats["time_saved_s"] += saved
+        return output, saved
+
+    def cancel(self, job: Optional[SpeculativeJob]):
+        """대기 중이면 취소, 실행 중이면 결과를 폐기 (Ollama 호출 자체는 중단할 수 없음)"""
+        if job is None or job.cancelled:
+            return
+        job.cancelled = True
+        cancelled = job.future.cancel()  # 취소되어도 완료 콜백이 작업 폴더를 정리
+        with self._lock:
+            self.stats["cancelled" if cancelled else "discarded"] += 1
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
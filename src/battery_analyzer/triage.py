@@ -0,0 +1,89 @@
+"""
+신뢰도 기반 LLM 트리아지 모듈
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from .config import DEFECT_CLASSES, TRIAGE_CONFIG
+from .image_processor import ImageProcessor
+
+
+class TriagePolicy:
+    """세그멘테이션 신뢰도로 LLaVA 분석 필요 여부를 판정하는 클래스"""
+
+    def __init__(self, config: Optional[Dict] = None):
+        self.config = {**TRIAGE_CONFIG, **(config or {})}
+        self.stats = {"total": 0, "llm_calls": 0, "llm_calls_avoided": 0}
+
+    def decide(self, mask: np.ndarray, confidence: Dict) -> Dict:
+        """단일 이미지 판정 (route: "template" 또는 "llm")"""
+        detected_defects = ImageProcessor.get_detected_defects(mask)
+        mean_prob = confidence["mean_max_prob"]
+        decision = {"route": "llm", "reason": "", "verdict": None, "confidence": mean_prob}
+
+        if detected_defects:
+            names = [DEFECT_CLASSES.get(d, f"Class {d}") for d in detected_defects]
+            decision["reason"] = f"결함 탐지: {', '.join(names)}"
+        elif confidence["uncertain_fraction"] > self.config["max_uncertain_fraction"]:
+            decision["reason"] = f"불확실 픽셀 비율 {confidence['uncertain_fraction']:.1%}"
+        elif mean_prob < self.config["normal_confidence"]:
+            decision["reason"] = f"평균 신뢰도 {mean_prob:.1%}"
+        else:
+            low_classes = [
+                DEFECT_CLASSES.get(class_id, f"Class {class_id}")
+                for class_id, summary in confidence["class_confidence"].items()
+                if summary["mean_prob"] < self.config["min_class_confidence"]
+            ]
+            if low_classes:
+                decision["reason"] = f"클래스 신뢰도 부족: {', '.join(low_classes)}"
+            else:
+                decision["route"] = "template"
+                decision["reason"] = f"고신뢰 정상 셀 (평균 신뢰도 {mean_prob:.1%})"
+                decision["verdict"] = self.normal_verdict(confidence)
+
+        self._record(decision)
+        return decision
+
+    def triage_batch(self, items: List[Tuple[np.ndarray, Dict]]) -> Tuple[List[Dict], Dict]:
+        """(mask, confidence) 목록 판정 및 배치 통계 반환"""
+        decisions = []
+        for mask, confidence in items:
+            decisions.append(self.decide(mask, confidence))
+        avoided = sum(1 for d in decisions if d["route"] == "template")
+        batch_stats = {
+            "total": len(decisions),
+            "llm_calls": len(decisions) - avoided,
+            "llm_calls_avoided": avoided,
+            "avoided_ratio": avoided / len(decisions) if decisions else 0.0,
+        }
+        print(f"⚡ 트리아지: {batch_stats['total']}건 중 LLM 호출 {batch_stats['llm_calls_avoided']}건 생략")
+        return decisions, batch_stats
+
+    def _record(self, decision: Dict):
+        self.stats["total"] += 1
+        if decision["route"] == "template":
+            self.stats["llm_calls_avoided"] += 1
+        else:
+            self.stats["llm_calls"] += 1
+
+    @staticmethod
+    def normal_verdict(confidence: Dict) -> str:
+        """고신뢰 정상 셀에 대한 템플릿 판정문"""
+        class_lines = []
+        for class_id, summary in sorted(confidence["class_confidence"].items()):
+            name = DEFECT_CLASSES.get(class_id, f"Class {class_id}")
+            class_lines.append(f"- {name}: 평균 신뢰도 {summary['mean_prob']:.1%} ({summary['pixels']} 픽셀)")
+        return (
+            "1. 배터리의 전반적인 구조와 특징\n"
+            "세그멘테이션 결과 배터리 셀과 배경 영역만 확인되었습니다.\n\n"
+            "2. 정상 배터리의 특징과 관찰된 구조의 일치점\n"
+            "스웰링, 기공, 레진 오버플로우로 분류된 영역이 없으며, 전체 픽셀의 평균 분류 신뢰도는 "
+            f"{confidence['mean_max_prob']:.1%}입니다.\n"
+            + "\n".join(class_lines) + "\n\n"
+            "3. 결함이 없다고 판단한 근거\n"
+            f"불확실 픽셀(신뢰도 {confidence['uncertain_threshold']:.0%} 미만) 비율이 "
+            f"{confidence['uncertain_fraction']:.2%}로 낮아 모델 판정이 명확합니다.\n\n"
+            "4. 결론\n"
+            "고신뢰 정상 셀로 판정되었습니다. (자동 판정 - LLaVA 분석 생략)"
+        )
@@ -45,4 +45,15 @@ class UIComponents:
         with col3:
             st.image(Image.fromarray(overlay), caption="선택된 결함 Overlay (컬러)", use_container_width=True)
         with col4:
-            st.image(Image.fromarray(legend_img), caption="", use_container_width=True) 
\ No newline at end of file
+            st.image(Image.fromarray(legend_img), caption="", use_container_width=True)
+    
+    @staticmethod
+    def display_profile_summary(session):
+        """프로파일링 요약 표시"""
+        with st.expander(f"🔬 프로파일링 결과 ({session.total_time:.2f}초)"):
+            st.caption(f"저장 위치: {session.output_dir}")
+            if session.stage_times:
+                st.table([{"단계": name, "소요 시간(초)": round(t, 3)} for name, t in session.stage_times.items()])
+            if session.hotspots:
+                st.markdown("**상위 핫스팟 (자체 실행 시간 기준)**")
+                st.table(session.hotspots)
@@ -2,69 +2,331 @@
 비전 모델 관리 모듈
 """
 
+import io
+import os
+import threading
 import cv2
 import numpy as np
 import torch
 import segmentation_models_pytorch as smp
-from typing import Tuple
-from .config import MODEL_CONFIG
+from PIL import Image
+from typing import Dict, List, Optional, Tuple, Union
+from .config import MODEL_CONFIG, TTA_CONFIG
+
+# [0, 255] → [-1, 1] 정규화 조회 테이블 (_normalize 와 동일한 float32 연산 결과)
+_NORMALIZE_LUT = ((np.arange(256, dtype=np.float32) / np.float32(255.0)) - np.float32(0.5)) / np.float32(0.5)
+
+# (축소 배율, 그레이스케일 여부) → cv2.imread 플래그
+_REDUCED_FLAGS = {
+    (1, False): cv2.IMREAD_COLOR,
+    (2, False): cv2.IMREAD_REDUCED_COLOR_2,
+    (4, False): cv2.IMREAD_REDUCED_COLOR_4,
+    (8, False): cv2.IMREAD_REDUCED_COLOR_8,
+    (1, True): cv2.IMREAD_GRAYSCALE,
+    (2, True): cv2.IMREAD_REDUCED_GRAYSCALE_2,
+    (4, True): cv2.IMREAD_REDUCED_GRAYSCALE_4,
+    (8, True): cv2.IMREAD_REDUCED_GRAYSCALE_8,
+}
+
+# TTA 변환 이름 → (입력 변환, 로짓 역변환), (..., H, W) 텐서의 마지막 두 축에 적용
+_TTA_TRANSFORMS = {
+    "identity": (lambda x: x, lambda x: x),
+    "hflip": (lambda x: x.flip(-1), lambda x: x.flip(-1)),
+    "vflip": (lambda x: x.flip(-2), lambda x: x.flip(-2)),
+    "rot90": (lambda x: x.rot90(1, (-2, -1)), lambda x: x.rot90(-1, (-2, -1))),
+    "rot180": (lambda x: x.rot90(2, (-2, -1)), lambda x: x.rot90(-2, (-2, -1))),
+    "rot270": (lambda x: x.rot90(3, (-2, -1)), lambda x: x.rot90(-3, (-2, -1))),
+}
 
 class VisionModel:
     """비전 모델 관리 클래스"""
     
     def __init__(self, model_path: str, num_classes: int = 5, backbone: str = 'efficientnet-b0'):
         self.model_path = model_path
+        self.model_version = os.path.splitext(os.path.basename(model_path))[0]
         self.num_classes = num_classes
         self.backbone = backbone
         self.model = None
         self.device = 'cuda' if torch.cuda.is_available() else 'cpu'
+        self.batch_size = 1
+        self._buffers = threading.local()  # 스레드별 재사용 입력 버퍼
+        self.tta_transforms: List[str] = []
+        if TTA_CONFIG["enabled"]:
+            self.set_tta(TTA_CONFIG["transforms"])
+    
+    def _create_network(self) -> torch.nn.Module:
+        """DeepLabV3+ 네트워크 구조 생성 (가중치 미로드)"""
+        return smp.DeepLabV3Plus(
+            encoder_name=self.backbone,
+            encoder_weights=None,
+            in_channels=3,
+            classes=self.num_classes,
+            activation=None,
+        )
+    
+    def load_weights(self):
+        """체크포인트 가중치 로드 (실패 시 예외 발생)"""
+        model = self._create_network()
+        model.load_state_dict(torch.load(self.model_path, map_location='cpu'))
+        model.to(self.device)
+        model.eval()
+        self.model = model
     
     def load_model(self):
         """모델 로드"""
         try:
-            self.model = smp.DeepLabV3Plus(
-                encoder_name=self.backbone,
-                encoder_weights=None,
-                in_channels=3,
-                classes=self.num_classes,
-                activation=None,
-            )
-            self.model.load_state_dict(torch.load(self.model_path, map_location='cpu'))
-            self.model.to(self.device)
-            self.model.eval()
+            self.load_weights()
             return True
         except Exception as e:
             import streamlit as st
             st.error(f"비전 모델 로딩 실패: {str(e)}")
             return False
     
-    def predict(self, image_path: str) -> Tuple[np.ndarray, np.ndarray]:
-        """이미지 예측"""
+    def init_random_model(self, seed: int = 0):
+        """체크포인트 없이 무작위 가중치로 모델 초기화 (벤치마크용)"""
+        torch.manual_seed(seed)
+        self.model_version = f"random-init-{seed}"
+        self.model = self._create_network()
+        self.model.to(self.device)
+        self.model.eval()
+        return True
+    
+    def set_tta(self, transforms: Optional[List[str]]):
+        """테스트 시 증강(TTA) 변환 목록 설정 (빈 목록/None 이면 단일 예측)"""
+        transforms = list(transforms or [])
+        unknown = [name for name in transforms if name not in _TTA_TRANSFORMS]
+        if unknown:
+            raise ValueError(f"지원하지 않는 TTA 변환: {unknown} (지원: {list(_TTA_TRANSFORMS)})")
+        width, height = MODEL_CONFIG["input_size"]
+        if width != height and any(name in ("rot90", "rot270") for name in transforms):
+            raise ValueError("rot90/rot270 은 정사각형 입력 크기에서만 사용할 수 있습니다.")
+        # identity 만 있으면 단일 예측과 같으므로 비활성화
+        self.tta_transforms = [] if transforms in ([], ["identity"]) else transforms
+    
+    @property
+    def output_version(self) -> str:
+        """결과 식별용 버전 (TTA 사용 시 변환 목록 포함, 캐시/저장소 키에 사용)"""
+        if not self.tta_transforms:
+            return self.model_version
+        return f"{self.model_version}+tta({','.join(self.tta_transforms)})"
+    
+    def _forward(self, image_tensor: torch.Tensor) -> torch.Tensor:
+        """(B, 3, H, W) 입력의 로짓 계산, TTA 사용 시 모든 증강 뷰를 한 배치로 예측 후 역변환하여 로짓 평균"""
+        if not self.tta_transforms:
+            return self.model(image_tensor)
+        
+        batch = image_tensor.shape[0]
+        views = torch.cat([_TTA_TRANSFORMS[name][0](image_tensor) for name in self.tta_transforms])
+        logits = self.model(views)
+        
+        # 뷰별 로짓을 원래 방향으로 되돌려 디바이스에서 누적
+        total = None
+        for index, name in enumerate(self.tta_transforms):
+            restored = _TTA_TRANSFORMS[name][1](logits[index * batch:(index + 1) * batch])
+            total = restored.clone() if total is None else total.add_(restored)
+        return total.div_(len(self.tta_transforms))
+    
+    def predict(self, image_source: Union[str, bytes, np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        """이미지 예측 (파일 경로, 인코딩된 바이트 또는 RGB 배열)"""
+        image_resized, logits = self._predict_logits(image_source)
+        
+        # argmax는 softmax 없이 로짓에서 바로 계산 (결과 동일)
+        prediction = torch.argmax(logits, dim=1)
+        
+        # numpy 변환
+        mask = prediction.cpu().numpy().squeeze()
+        
+        return image_resized, mask
+    
+    def predict_with_confidence(self, image_source: Union[str, bytes, np.ndarray],
+                                uncertain_threshold: float = 0.6) -> Tuple[np.ndarray, np.ndarray, Dict]:
+        """이미지 예측 + 픽셀별 최대 확률 및 클래스별 신뢰도 요약"""
+        image_resized, logits = self._predict_logits(image_source)
+        
+        probabilities = torch.softmax(logits, dim=1)
+        max_prob, prediction = probabilities.max(dim=1)
+        confidence = self.summarize_confidence(prediction, max_prob, uncertain_threshold)
+        
+        mask = prediction.cpu().numpy().squeeze()
+        confidence["max_prob"] = max_prob.cpu().numpy().squeeze()
+        
+        return image_resized, mask, confidence
+    
+    def summarize_confidence(self, prediction: torch.Tensor, max_prob: torch.Tensor,
+                             uncertain_threshold: float = 0.6) -> Dict:
+        """클래스별 픽셀 수, 평균 신뢰도, 저신뢰 픽셀 비율 계산 (디바이스에서 집계)"""
+        labels = prediction.flatten()
+        probs = max_prob.flatten()
+        uncertain = (probs < uncertain_threshold).float()
+        
+        counts = torch.bincount(labels, minlength=self.num_classes).cpu().numpy()
+        prob_sums = torch.bincount(labels, weights=probs, minlength=self.num_classes).cpu().numpy()
+        uncertain_counts = torch.bincount(labels, weights=uncertain, minlength=self.num_classes).cpu().numpy()
+        
+        class_confidence = {}
+        for class_id in range(self.num_classes):
+            if counts[class_id] == 0:
+                continue
+            class_confidence[class_id] = {
+                "pixels": int(counts[class_id]),
+                "mean_prob": float(prob_sums[class_id] / counts[class_id]),
+                "uncertain_fraction": float(uncertain_counts[class_id] / counts[class_id]),
+            }
+        
+        return {
+            "mean_max_prob": float(probs.mean().item()),
+            "uncertain_fraction": float(uncertain.mean().item()),
+            "uncertain_threshold": uncertain_threshold,
+            "class_confidence": class_confidence,
+        }
+    
+    @staticmethod
+    def load_image(image_source: Union[str, bytes, np.ndarray]) -> np.ndarray:
+        """파일 경로 / 인코딩된 바이트 / 배열을 RGB uint8 이미지로 변환"""
+        if isinstance(image_source, np.ndarray):
+            if image_source.ndim == 2:
+                return cv2.cvtColor(image_source, cv2.COLOR_GRAY2RGB)
+            return image_source
+        if isinstance(image_source, (bytes, bytearray, memoryview)):
+            image = cv2.imdecode(np.frombuffer(image_source, dtype=np.uint8), cv2.IMREAD_COLOR)
+        else:
+            image = cv2.imread(image_source)
+        if image is None:
+            raise ValueError("이미지를 읽을 수 없습니다.")
+        return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    
+    def _predict_logits(self, image_source: Union[str, bytes, np.ndarray]) -> Tuple[np.ndarray, torch.Tensor]:
+        """이미지 로드, 전처리 및 로짓 계산"""
         if self.model is None:
             raise ValueError("모델이 로드되지 않았습니다.")
         
+        if MODEL_CONFIG.get("fast_preprocess", False):
+            image_resized, image_tensor = self.preprocess_fast(image_source)
+        else:
+            image_resized, image_tensor = self.preprocess_reference(image_source)
+        
+        # 예측
+        with torch.no_grad():
+            logits = self._forward(image_tensor)
+        
+        return image_resized, logits
+    
+    def preprocess_reference(self, image_source: Union[str, bytes, np.ndarray]) -> Tuple[np.ndarray, torch.Tensor]:
+        """기존 전처리 경로 (전체 해상도 디코딩 → RGB 변환 → 리사이즈 → 정규화 → 텐서 변환)"""
         # 이미지 로드 및 전처리
-        image = cv2.imread(image_path)
-        image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        image = self.load_image(image_source)
         
         # 리사이즈
         image_resized = cv2.resize(image, MODEL_CONFIG["input_size"])
         
         # 정규화
-        image_normalized = image_resized.astype(np.float32) / 255.0
-        image_normalized = (image_normalized - 0.5) / 0.5
+        image_normalized = self._normalize(image_resized)
         
         # 텐서 변환
         image_tensor = torch.from_numpy(image_normalized).permute(2, 0, 1).unsqueeze(0)
-        image_tensor = image_tensor.to(self.device)
+        return image_resized, image_tensor.to(self.device)
+    
+    def preprocess_fast(self, image_source: Union[str, bytes, np.ndarray]) -> Tuple[np.ndarray, torch.Tensor]:
+        """고속 전처리 경로 (축소 디코딩 → uint8 리사이즈 → 채널 교환/정규화를 재사용 버퍼에 한 번에 기록)"""
+        image, layout = self.decode_reduced(image_source)
+        image_small = cv2.resize(image, MODEL_CONFIG["input_size"])
         
-        # 예측
-        with torch.no_grad():
-            prediction = self.model(image_tensor)
-            prediction = torch.softmax(prediction, dim=1)
-            prediction = torch.argmax(prediction, dim=1)
+        buffer_array, buffer_tensor = self._input_buffer(1)
+        self._fill_input(image_small, layout, buffer_array[0])
         
-        # numpy 변환
-        mask = prediction.cpu().numpy().squeeze()
+        # 표시용 RGB 이미지는 입력 크기에서만 변환
+        if layout == "gray":
+            image_resized = cv2.cvtColor(image_small, cv2.COLOR_GRAY2RGB)
+        elif layout == "bgr":
+            image_resized = cv2.cvtColor(image_small, cv2.COLOR_BGR2RGB)
+        else:
+            image_resized = image_small
+        
+        # CPU에서는 복사 없이 버퍼를 그대로 사용, GPU에서는 고정 메모리에서 비동기 전송
+        return image_resized, buffer_tensor.to(self.device, non_blocking=True)
+    
+    @staticmethod
+    def _reduction_factor(width: int, height: int) -> int:
+        """목표 입력 크기의 2배 이상을 유지하는 최대 디코딩 축소 배율 (1, 2, 4, 8)"""
+        target_width, target_height = MODEL_CONFIG["input_size"]
+        for factor in (8, 4, 2):
+            if width // factor >= 2 * target_width and height // factor >= 2 * target_height:
+                return factor
+        return 1
+    
+    @classmethod
+    def decode_reduced(cls, image_source: Union[str, bytes, np.ndarray]) -> Tuple[np.ndarray, str]:
+        """헤더의 이미지 크기로 축소 배율을 정해 디코딩, (uint8 이미지, 채널 배치 "bgr"/"rgb"/"gray") 반환"""
+        if isinstance(image_source, np.ndarray):
+            return image_source, "gray" if image_source.ndim == 2 else "rgb"
+        
+        is_bytes = isinstance(image_source, (bytes, bytearray, memoryview))
+        try:
+            # PIL은 헤더만 읽으므로 픽셀 디코딩 비용이 없음
+            with Image.open(io.BytesIO(image_source) if is_bytes else image_source) as header:
+                (width, height), grayscale = header.size, header.mode == "L"
+        except Exception:
+            (width, height), grayscale = (0, 0), False
+        
+        flag = _REDUCED_FLAGS[(cls._reduction_factor(width, height), grayscale)]
+        if is_bytes:
+            image = cv2.imdecode(np.frombuffer(image_source, dtype=np.uint8), flag)
+        else:
+            image = cv2.imread(image_source, flag)
+        if image is None:
+            raise ValueError("이미지를 읽을 수 없습니다.")
+        return image, "gray" if image.ndim == 2 else "bgr"
+    
+    @staticmethod
+    def _fill_input(image: np.ndarray, layout: str, out: np.ndarray):
+        """uint8 (H, W[, C]) 이미지를 조회 테이블로 정규화하여 (3, H, W) float32 버퍼에 기록"""
+        if layout == "gray":
+            np.take(_NORMALIZE_LUT, image, out=out[0], mode="clip")
+            out[1] = out[0]
+            out[2] = out[0]
+        else:
+            channels = image.transpose(2, 0, 1)
+            if layout == "bgr":
+                channels = channels[::-1]  # 채널 교환은 뷰로 처리
+            np.take(_NORMALIZE_LUT, channels, out=out, mode="clip")
+    
+    def _input_buffer(self, batch_size: int) -> Tuple[np.ndarray, torch.Tensor]:
+        """스레드별로 재사용하는 (B, 3, H, W) float32 입력 버퍼 (GPU 사용 시 고정 메모리)"""
+        buffers = getattr(self._buffers, "by_size", None)
+        if buffers is None:
+            buffers = self._buffers.by_size = {}
+        if batch_size not in buffers:
+            width, height = MODEL_CONFIG["input_size"]
+            tensor = torch.empty((batch_size, 3, height, width), dtype=torch.float32,
+                                 pin_memory=self.device == "cuda")
+            buffers[batch_size] = (tensor.numpy(), tensor)
+        return buffers[batch_size]
+    
+    @staticmethod
+    def _normalize(image: np.ndarray) -> np.ndarray:
+        """[0, 255] uint8 → [-1, 1] float32 정규화"""
+        image_normalized = image.astype(np.float32) / 255.0
+        return (image_normalized - 0.5) / 0.5
+    
+    def predict_batch(self, images: List[np.ndarray], batch_size: Optional[int] = None) -> np.ndarray:
+        """RGB(또는 그레이스케일) 이미지 목록 배치 예측, (N, H, W) uint8 마스크 반환"""
+        if self.model is None:
+            raise ValueError("모델이 로드되지 않았습니다.")
+        
+        batch_size = batch_size or self.batch_size
+        width, height = MODEL_CONFIG["input_size"]
+        masks = np.zeros((len(images), height, width), dtype=np.uint8)
+        
+        for start in range(0, len(images), batch_size):
+            chunk = images[start:start + batch_size]
+            buffer_array, buffer_tensor = self._input_buffer(len(chunk))
+            for index, image in enumerate(chunk):
+                layout = "gray" if image.ndim == 2 else "rgb"
+                self._fill_input(cv2.resize(image, MODEL_CONFIG["input_size"]), layout, buffer_array[index])
+            
+            image_tensor = buffer_tensor.to(self.device, non_blocking=True)
+            with torch.no_grad():
+                prediction = torch.argmax(self._forward(image_tensor), dim=1)
+            masks[start:start + len(chunk)] = prediction.cpu().numpy()
         
-        return image_resized, mask 
\ No newline at end of file
+        return masks
@@ -0,0 +1,304 @@
+"""
+CT 볼륨(슬라이스 스택) 처리 모듈
+- 멀티 페이지 TIFF / .npy / raw 볼륨을 메모리 매핑으로 열어 슬라이스 단위로 스트리밍
+- 슬라이스별 마스크를 uint8 메모리 매핑 3D 레이블 볼륨으로 저장
+- 3D 연결 요소, 결함 부피, 최악 슬라이스 집계
+"""
+
+import argparse
+import json
+import os
+from typing import Callable, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+from .config import DEFECT_CLASSES, MODEL_CONFIG, VOLUME_CONFIG
+
+
+class VolumeReader:
+    """CT 볼륨 슬라이스 리더 (전체를 메모리에 올리지 않음)"""
+
+    def __init__(self, path: str, shape: Optional[Tuple[int, ...]] = None, dtype: str = "uint8"):
+        self.path = path
+        self._tiff = None
+        extension = os.path.splitext(path)[1].lower()
+
+        if extension == ".npy":
+            self.volume = np.load(path, mmap_mode="r")
+        elif extension in (".tif", ".tiff"):
+            self.volume = self._open_tiff(path)
+        else:
+            if shape is None:
+                raise ValueError("raw 볼륨은 shape (D, H, W)를 지정해야 합니다.")
+            self.volume = np.memmap(path, dtype=np.dtype(dtype), mode="r", shape=tuple(shape))
+
+        if self.volume is not None and self.volume.ndim not in (3, 4):
+            raise ValueError(f"볼륨은 (D, H, W) 또는 (D, H, W, C) 형태여야 합니다: {self.volume.shape}")
+
+    def _open_tiff(self, path: str):
+        """멀티 페이지 TIFF 열기 (비압축이면 메모리 매핑, 아니면 페이지 단위 읽기)"""
+        try:
+            import tifffile
+        except ImportError:
+            raise ImportError("TIFF 볼륨을 읽으려면 tifffile 패키지가 필요합니다: pip install tifffile")
+
+        try:
+            return tifffile.memmap(path, mode="r")
+        except ValueError:
+            # 압축/비연속 TIFF: 페이지 단위로 디코딩
+            self._tiff = tifffile.TiffFile(path)
+            return None
+
+    @property
+    def dtype(self) -> np.dtype:
+        if self.volume is not None:
+            return self.volume.dtype
+        return self._tiff.pages[0].dtype
+
+    def __len__(self) -> int:
+        if self.volume is not None:
+            return self.volume.shape[0]
+        return len(self._tiff.pages)
+
+    @property
+    def slice_shape(self) -> Tuple[int, int]:
+        if self.volume is not None:
+            return tuple(self.volume.shape[1:3])
+        return tuple(self._tiff.pages[0].shape[:2])
+
+    def read(self, start: int, stop: int) -> np.ndarray:
+        """[start, stop) 슬라이스 읽기 (해당 범위만 메모리로 복사)"""
+        if self.volume is not None:
+            return np.array(self.volume[start:stop])
+        return np.stack([self._tiff.pages[i].asarray() for i in range(start, stop)])
+
+    def estimate_window(self, num_samples: int = 16) -> Tuple[float, float]:
+        """균등 간격 표본 슬라이스의 1~99 백분위수로 명암 창 추정"""
+        if self.dtype == np.uint8:
+            return 0.0, 255.0
+        indices = np.linspace(0, len(self) - 1, min(num_samples, len(self))).astype(int)
+        samples = np.concatenate([self.read(i, i + 1).ravel()[::7] for i in indices])
+        low, high = np.percentile(samples, [1, 99])
+        return float(low), float(max(high, low + 1))
+
+    def close(self):
+        if self._tiff is not None:
+            self._tiff.close()
+        self.volume = None
+
+
+class DefectAggregator3D:
+    """슬라이스 스트리밍 방식의 3D 연결 요소 집계 클래스
+
+    인접 두 슬라이스의 레이블과 아직 이어질 수 있는 요소만 유지하고, 현재 슬라이스와 닿지 않아 끝난 요소는
+    병합된 요약 한 건으로 옮깁니다. 유지하는 메모리는 슬라이스 크기 + 슬라이스별 클래스 면적(클래스 수 정수)
+    + 완료된 3D 요소 수에 비례합니다.
+    """
+
+    def __init__(self, num_classes: int = MODEL_CONFIG["num_classes"], defect_classes: Optional[List[int]] = None):
+        self.num_classes = num_classes
+        self.defect_classes = defect_classes or [c for c in range(num_classes) if c > 1]
+        self.slice_areas: List[np.ndarray] = []
+        self._next_id = 0
+        self._parent: Dict[int, int] = {}       # 진행 중인 요소 ID → 부모 ID
+        self._active: Dict[int, Dict] = {}      # 진행 중인 루트 ID → 병합된 요약
+        self._finished: List[Dict] = []
+        self._prev: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+
+    def _find(self, i: int) -> int:
+        while self._parent[i] != i:
+            self._parent[i] = self._parent[self._parent[i]]
+            i = self._parent[i]
+        return i
+
+    def _union(self, a: int, b: int):
+        root_a, root_b = self._find(a), self._find(b)
+        if root_a == root_b:
+            return
+        root, other = min(root_a, root_b), max(root_a, root_b)
+        self._parent[other] = root
+        target, source = self._active[root], self._active.pop(other)
+        target["voxels"] += source["voxels"]
+        for key in ("z_min", "x_min", "y_min"):
+            target[key] = min(target[key], source[key])
+        for key in ("z_max", "x_max", "y_max"):
+            target[key] = max(target[key], source[key])
+
+    def update(self, z: int, labels: np.ndarray):
+        """한 슬라이스의 레이블 맵 반영"""
+        self.slice_areas.append(np.bincount(labels.ravel(), minlength=self.num_classes)[:self.num_classes])
+
+        for class_id in self.defect_classes:
+            binary = (labels == class_id).astype(np.uint8)
+            if not binary.any():
+                self._prev.pop(class_id, None)
+                continue
+
+            count, local, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+            global_ids = np.zeros(count, dtype=np.int64)
+            for k in range(1, count):
+                component_id = self._next_id
+                self._next_id += 1
+                global_ids[k] = component_id
+                self._parent[component_id] = component_id
+                x, y, w, h, area = stats[k]
+                self._active[component_id] = {
+                    "class_id": class_id, "voxels": int(area),
+                    "z_min": z, "z_max": z,
+                    "x_min": int(x), "y_min": int(y), "x_max": int(x + w - 1), "y_max": int(y + h - 1),
+                }
+
+            # 이전 슬라이스와 겹치는 요소 병합 (z 방향 연결)
+            if class_id in self._prev:
+                prev_local, prev_ids = self._prev[class_id]
+                overlap = (prev_local > 0) & (local > 0)
+                if overlap.any():
+                    pairs = np.unique(np.stack([prev_local[overlap], local[overlap]]), axis=1)
+                    for a, b in pairs.T:
+                        self._union(int(prev_ids[a]), int(global_ids[b]))
+            self._prev[class_id] = (local, global_ids)
+
+        self._retire_finished()
+
+    def _retire_finished(self):
+        """현재 슬라이스에 닿지 않는 요소를 완료 목록으로 옮기고, 현재 슬라이스 ID 만 남기도록 union-find 압축"""
+        parent = {}
+        for _, ids in self._prev.values():
+            for component_id in ids[1:].tolist():
+                root = self._find(component_id)
+                parent[component_id] = root
+                parent[root] = root
+        for root in [root for root in self._active if root not in parent]:
+            self._finished.append(self._active.pop(root))
+        self._parent = parent
+
+    def finalize(self, voxel_volume: float = 1.0) -> Dict:
+        """3D 결함 요소 목록과 클래스별 부피, 최악 슬라이스 요약"""
+        self._finished.extend(self._active.values())
+        self._active, self._parent, self._prev = {}, {}, {}
+
+        components = sorted((dict(c) for c in self._finished), key=lambda c: c["voxels"], reverse=True)
+        for component in components:
+            component["class_name"] = DEFECT_CLASSES.get(component["class_id"], f"Class {component['class_id']}")
+            component["volume"] = component["voxels"] * voxel_volume
+
+        areas = np.array(self.slice_areas) if self.slice_areas else np.zeros((0, self.num_classes), dtype=np.int64)
+        class_voxels = areas.sum(axis=0) if len(areas) else np.zeros(self.num_classes, dtype=np.int64)
+        defect_areas = areas[:, self.defect_classes].sum(axis=1) if len(areas) else np.zeros(0)
+        worst_slice = int(np.argmax(defect_areas)) if len(defect_areas) and defect_areas.max() > 0 else None
+
+        return {
+            "num_slices": len(areas),
+            "components": components,
+            "component_counts": {
+                DEFECT_CLASSES.get(c, f"Class {c}"): sum(1 for comp in components if comp["class_id"] == c)
+                for c in self.defect_classes
+            },
+            "class_volumes": {
+                DEFECT_CLASSES.get(c, f"Class {c}"): float(class_voxels[c] * voxel_volume)
+                for c in range(self.num_classes)
+            },
+            "swelling_volume": float(class_voxels[2] * voxel_volume) if self.num_classes > 2 else 0.0,
+            "worst_slice": worst_slice,
+            "worst_slice_defect_area": int(defect_areas[worst_slice]) if worst_slice is not None else 0,
+            "slice_defect_areas": defect_areas.tolist(),
+        }
+
+
+class VolumeProcessor:
+    """CT 볼륨 슬라이스 배치 추론 및 3D 레이블 볼륨 생성 클래스"""
+
+    def __init__(self, vision_model, batch_size: Optional[int] = None):
+        self.vision_model = vision_model
+        self.batch_size = batch_size or VOLUME_CONFIG["batch_size"] or vision_model.batch_size
+
+    @staticmethod
+    def _to_uint8(slices: np.ndarray, window: Tuple[float, float]) -> np.ndarray:
+        """명암 창 적용 후 uint8 변환"""
+        if slices.dtype == np.uint8:
+            return slices
+        low, high = window
+        scaled = (slices.astype(np.float32) - low) * (255.0 / (high - low))
+        return np.clip(scaled, 0, 255).astype(np.uint8)
+
+    def process(self, reader: VolumeReader, label_path: str, voxel_spacing: Tuple[float, float, float] = (1.0, 1.0, 1.0),
+                progress_callback: Optional[Callable[[int, int], None]] = None) -> Dict:
+        """볼륨 전체를 배치 단위로 추론하여 label_path(.npy 메모리 매핑)에 저장하고 요약 반환"""
+        depth = len(reader)
+        height, width = reader.slice_shape
+        window = reader.estimate_window()
+        labels = np.lib.format.open_memmap(label_path, mode="w+", dtype=np.uint8, shape=(depth, height, width))
+        aggregator = DefectAggregator3D(self.vision_model.num_classes)
+
+        try:
+            for start in range(0, depth, self.batch_size):
+                stop = min(start + self.batch_size, depth)
+                slices = self._to_uint8(reader.read(start, stop), window)
+                masks = self.vision_model.predict_batch(list(slices))
+                for offset, mask in enumerate(masks):
+                    z = start + offset
+                    labels[z] = cv2.resize(mask, (width, height), interpolation=cv2.INTER_NEAREST)
+                    aggregator.update(z, labels[z])
+                labels.flush()
+                if progress_callback:
+                    progress_callback(stop, depth)
+        finally:
+            labels.flush()
+            del labels
+
+        summary = aggregator.finalize(float(np.prod(voxel_spacing)))
+        summary.update({
+            "label_path": label_path,
+            "shape": [depth, height, width],
+            "voxel_spacing": list(voxel_spacing),
+            "window": list(window),
+        })
+        return summary
+
+    @staticmethod
+    def load_slice(reader: VolumeReader, label_path: str, z: int,
+                   window: Tuple[float, float]) -> Tuple[np.ndarray, np.ndarray]:
+        """표시용 단일 슬라이스 (RGB uint8 이미지, 레이블 맵)"""
+        labels = np.load(label_path, mmap_mode="r")
+        image = VolumeProcessor._to_uint8(reader.read(z, z + 1)[0], window)
+        if image.ndim == 2:
+            image = cv2.cvtColor(image, cv2.COLOR_GRAY2RGB)
+        return image, np.array(labels[z])
+
+
+def main(argv: Optional[List[str]] = None):
+    """명령행 볼륨 처리"""
+    from .vision_model import VisionModel
+
+    parser = argparse.ArgumentParser(description="CT 볼륨 결함 분석")
+    parser.add_argument("volume", help="멀티 페이지 TIFF, .npy 또는 raw 볼륨 경로")
+    parser.add_argument("--labels", default=None, help="출력 레이블 볼륨 경로 (.npy)")
+    parser.add_argument("--shape", default=None, help="raw 볼륨 형태 D,H,W")
+    parser.add_argument("--dtype", default="uint8", help="raw 볼륨 자료형")
+    parser.add_argument("--spacing", default="1,1,1", help="복셀 간격 z,y,x")
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--model-path", default=MODEL_CONFIG["path"])
+    args = parser.parse_args(argv)
+
+    shape = tuple(int(v) for v in args.shape.split(",")) if args.shape else None
+    spacing = tuple(float(v) for v in args.spacing.split(","))
+    label_path = args.labels or f"{os.path.splitext(args.volume)[0]}_labels.npy"
+
+    vision_model = VisionModel(args.model_path, MODEL_CONFIG["num_classes"], MODEL_CONFIG["backbone"])
+    if not vision_model.load_model():
+        raise SystemExit("비전 모델을 로드할 수 없습니다.")
+
+    reader = VolumeReader(args.volume, shape, args.dtype)
+    try:
+        summary = VolumeProcessor(vision_model, args.batch_size).process(
+            reader, label_path, spacing,
+            progress_callback=lambda done, total: print(f"🧊 {done}/{total} 슬라이스 처리"),
+        )
+    finally:
+        reader.close()
+    summary.pop("slice_defect_areas")
+    print(json.dumps(summary, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
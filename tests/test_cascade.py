@@ -0,0 +1,58 @@
+"""계단식 세그멘테이션 타일 배치 테스트"""
+
+import numpy as np
+import pytest
+
+from src.battery_analyzer.cascade import CascadeSegmenter
+from src.battery_analyzer.config import MODEL_CONFIG
+
+TILE_WIDTH, TILE_HEIGHT = MODEL_CONFIG["input_size"]
+
+# 타일 크기와 같음 / 배수 / 배수가 아님 / 한 축만 긴 경우
+SIZES = [
+    (TILE_HEIGHT, TILE_WIDTH),
+    (TILE_HEIGHT * 2, TILE_WIDTH * 3),
+    (TILE_HEIGHT + 1, TILE_WIDTH + 77),
+    (1000, 1333),
+    (TILE_HEIGHT, 2049),
+]
+
+
+class EchoModel:
+    """창의 첫 채널 값을 그대로 마스크로 돌려주는 가짜 모델 (붙여넣기 위치 검증용)"""
+
+    batch_size = 4
+
+    def load_image(self, image_source):
+        return image_source
+
+    def predict_batch(self, windows, batch_size):
+        for window in windows:
+            assert window.shape[:2] == (TILE_HEIGHT, TILE_WIDTH)
+        return [window[..., 0].copy() for window in windows]
+
+
+@pytest.mark.parametrize("height,width", SIZES)
+def test_cores_cover_image_exactly_once(height, width):
+    coverage = np.zeros((height, width), dtype=np.int32)
+    for cy0, cy1, cx0, cx1, _, _ in CascadeSegmenter(None).tile_grid(height, width):
+        coverage[cy0:cy1, cx0:cx1] += 1
+    assert (coverage == 1).all()
+
+
+@pytest.mark.parametrize("height,width", SIZES)
+def test_windows_in_bounds_and_contain_core(height, width):
+    for cy0, cy1, cx0, cx1, wy, wx in CascadeSegmenter(None).tile_grid(height, width):
+        assert 0 <= wy <= height - TILE_HEIGHT
+        assert 0 <= wx <= width - TILE_WIDTH
+        assert wy <= cy0 < cy1 <= wy + TILE_HEIGHT
+        assert wx <= cx0 < cx1 <= wx + TILE_WIDTH
+
+
+@pytest.mark.parametrize("height,width", SIZES)
+def test_segment_full_pastes_cores_in_place(height, width):
+    ys, xs = np.mgrid[0:height, 0:width]
+    channel = ((ys * 7 + xs * 3) % 251).astype(np.uint8)
+    image = np.stack([channel] * 3, axis=-1)
+    labels = CascadeSegmenter(EchoModel()).segment_full(image)
+    np.testing.assert_array_equal(labels, channel)
@@ -0,0 +1,42 @@
+"""CPU 튜닝 설정 적용 테스트 (앱 모델 로드 시 스레드 수 변경 / 측정 금지)"""
+
+import torch
+
+from src.battery_analyzer import cpu_tuner
+from src.battery_analyzer.cpu_tuner import CPUAutoTuner
+
+
+class FakeVisionModel:
+    device = "cpu"
+    backbone = "fake-backbone"
+    tta_transforms = []
+    model = None
+
+    def __init__(self):
+        self.batch_size = 1
+
+
+def test_model_load_applies_cached_batch_size_only(tmp_path, monkeypatch):
+    tuner = CPUAutoTuner(str(tmp_path / "tuning.json"))
+    vision_model = FakeVisionModel()
+    tuner.save_cache({"num_threads": 3, "interop_threads": 1, "batch_size": 4}, vision_model)
+
+    calls = []
+    monkeypatch.setattr(torch, "set_num_threads", lambda n: calls.append(n))
+    monkeypatch.setattr(tuner, "tune", lambda *a, **k: calls.append("tune"))
+    monkeypatch.setattr(cpu_tuner, "_PROCESS_THREADS", {"num_threads": 2, "interop_threads": 1})
+
+    report = tuner.configure(vision_model, tune=False, apply_threads=False)
+    assert calls == []
+    assert vision_model.batch_size == 4
+    assert report["source"] == "cache"
+    assert report["num_threads"] == 2
+
+
+def test_missing_cache_never_tunes_in_app(tmp_path, monkeypatch):
+    tuner = CPUAutoTuner(str(tmp_path / "tuning.json"))
+    calls = []
+    monkeypatch.setattr(tuner, "tune", lambda *a, **k: calls.append("tune"))
+    report = tuner.configure(FakeVisionModel(), tune=False, apply_threads=False)
+    assert calls == []
+    assert report["source"] == "default (no tuning cache)"
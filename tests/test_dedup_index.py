@@ -0,0 +1,76 @@
+"""근사 중복 색인 테스트 (전수 비교 일치, 모델 버전 필터, 마스크 일치 판정)"""
+
+import numpy as np
+import pytest
+
+from src.battery_analyzer.dedup_index import NearDuplicateIndex
+from src.battery_analyzer.results_store import ResultsStore
+
+
+def brute_force(ids, hashes, phash, max_distance):
+    hits = [(int(i), NearDuplicateIndex.distance(int(h), phash)) for i, h in zip(ids, hashes)]
+    return sorted((hit for hit in hits if hit[1] <= max_distance), key=lambda hit: (hit[1], -hit[0]))
+
+
+def flip_bits(phash, count, rng):
+    for bit in rng.choice(64, size=count, replace=False):
+        phash ^= 1 << int(bit)
+    return phash
+
+
+@pytest.mark.parametrize("max_distance", [0, 3, 6, 10])
+def test_query_matches_brute_force(max_distance):
+    rng = np.random.default_rng(max_distance)
+    hashes = rng.integers(0, 2 ** 63, size=3000, dtype=np.int64).view(np.uint64) * np.uint64(2)
+    # 기준 해시 주변에 거리 0~12 인 이웃을 심어 둠
+    base = int(hashes[0])
+    neighbours = [flip_bits(base, count, rng) for count in range(13) for _ in range(5)]
+    hashes = np.concatenate([hashes, np.array(neighbours, dtype=np.uint64)])
+    ids = np.arange(1, len(hashes) + 1, dtype=np.int64)
+
+    index = NearDuplicateIndex(merge_threshold=1000)
+    index.add_many(ids[:-50], hashes[:-50])  # 정렬 색인으로 병합
+    for result_id, phash in zip(ids[-50:], hashes[-50:]):  # 꼬리에 남김
+        index.add(result_id, phash)
+    assert len(index) == len(ids)
+
+    for query in [base, flip_bits(base, 2, rng), int(hashes[100])]:
+        expected = brute_force(ids, hashes, query, max_distance)
+        assert index.query(query, max_distance, limit=len(index)) == expected
+
+
+def test_find_similar_filters_by_version_beyond_top_hits(tmp_path):
+    store = ResultsStore(str(tmp_path / "store"))
+    mask = np.zeros((8, 8), dtype=np.uint8)
+    phash = 0x0123456789ABCDEF
+    # 같은 해시의 다른 버전 결과 30개 뒤에 일치 버전 결과 1개 (거리 1, 더 오래됨)
+    target = store.append("target", mask, model_version="v2", phash=phash ^ 1)
+    for i in range(30):
+        store.append(f"other-{i}", mask, model_version="v1", phash=phash)
+
+    index = NearDuplicateIndex(store, max_distance=3)
+    record = index.find_similar(phash, model_version="v2")
+    assert record is not None and record["id"] == target
+    assert record["distance"] == 1
+    assert index.find_similar(phash, model_version="v3") is None
+    store.close()
+
+
+def test_masks_match():
+    mask = np.zeros((64, 64), dtype=np.uint8)
+    mask[10:30, 10:30] = 2
+    assert NearDuplicateIndex.masks_match(mask, mask.copy())
+    # 해상도가 달라도 같은 결함이면 일치
+    assert NearDuplicateIndex.masks_match(mask, mask[::2, ::2])
+
+    other_class = mask.copy()
+    other_class[10:30, 10:30] = 3
+    assert not NearDuplicateIndex.masks_match(mask, other_class)
+
+    shifted = np.zeros_like(mask)
+    shifted[20:40, 20:40] = 2
+    assert not NearDuplicateIndex.masks_match(mask, shifted)
+
+    # 결함 없음 / 배경·정상 영역 차이는 무시
+    clean = np.ones((64, 64), dtype=np.uint8)
+    assert NearDuplicateIndex.masks_match(clean, np.zeros_like(clean))
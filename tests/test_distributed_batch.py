@@ -0,0 +1,93 @@
+"""분산 배치 임대 만료 / 회수 테스트"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from src.battery_analyzer.distributed_batch import DistributedBatch
+
+# 첫 예측에서 프로세스를 강제 종료하는 작업자 (임대 파일만 남기고 heartbeat 중단)
+_CRASHING_WORKER = """
+import os, sys
+from src.battery_analyzer.distributed_batch import DistributedBatch
+
+class CrashingModel:
+    output_version = "fake"
+
+    def predict(self, image_path):
+        os._exit(3)
+
+DistributedBatch(sys.argv[1]).work(CrashingModel, worker_id="crasher", poll_interval=0.05)
+"""
+
+
+class FakeModel:
+    """모든 이미지에 작은 스웰링 영역을 예측하는 모델"""
+    output_version = "fake"
+
+    def predict(self, image_path):
+        mask = np.zeros((8, 8), dtype=np.int64)
+        mask[2:4, 2:4] = 2
+        return None, mask
+
+
+@pytest.fixture
+def job(tmp_path):
+    input_dir = tmp_path / "scans"
+    input_dir.mkdir()
+    for i in range(4):
+        cv2.imwrite(str(input_dir / f"cell_{i}.png"), np.full((16, 16), i * 40, dtype=np.uint8))
+    batch = DistributedBatch(str(tmp_path / "job"))
+    batch.plan(str(input_dir), shard_size=2, lease_ttl=0.5)
+    return batch
+
+
+def test_live_lease_is_not_reclaimed(job):
+    owner = {"worker": "a"}
+    shard, lease = job.claim_next("a", owner)
+    # 남은 샤드 하나는 점유 가능, 점유 중인 샤드는 만료 전이라 회수되지 않음
+    other = job.claim_next("b", {"worker": "b"})
+    assert other is not None and other[0] != shard
+    assert job.claim_next("c", {"worker": "c"}) is None
+    assert lease.is_owned()
+
+
+def test_expired_lease_is_reclaimed(job):
+    shard, lease = job.claim_next("a", {"worker": "a"})
+    _, other_lease = job.claim_next("b", {"worker": "b"})
+    other_lease.heartbeat()
+    time.sleep(0.6)
+    other_lease.heartbeat()
+
+    # a 의 임대만 만료 → c 가 회수하여 재점유, a 는 소유권을 잃음
+    reclaimed = job.claim_next("c", {"worker": "c"})
+    assert reclaimed is not None and reclaimed[0] == shard
+    assert not lease.is_owned()
+    assert not lease.heartbeat()
+    assert other_lease.is_owned()
+
+
+def test_crashed_worker_shard_is_finished_by_another_worker(job):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    crashed = subprocess.run([sys.executable, "-c", _CRASHING_WORKER, job.job_dir], cwd=root, timeout=120)
+    assert crashed.returncode == 3
+    leases = [name for name in os.listdir(job.lease_dir) if name.endswith(".lease")]
+    assert len(leases) == 1
+
+    processed = job.work(lambda: FakeModel(), worker_id="survivor", poll_interval=0.05)
+    assert processed == 2
+    assert job.pending_shards() == []
+    for shard in range(2):
+        with open(job._result_path(shard), encoding="utf-8") as f:
+            assert json.load(f)["worker"] == "survivor"
+
+    summary = job.merge()
+    assert summary["processed"] == 4
+    assert summary["errors"] == 0
+    assert summary["images_with_defect"]["Swelling"] == 4
@@ -0,0 +1,147 @@
+"""핫 폴더 감시: 기록 중인 파일 처리와 결과 기록 실패 시 작업자 유지 테스트"""
+
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from src.battery_analyzer.folder_watcher import FolderWatcher
+
+
+class FakeModel:
+    """이미지를 디코딩하여 밝은 픽셀을 스웰링으로 예측하는 모델 (디코딩 실패 시 ValueError)"""
+    output_version = "fake"
+
+    def __init__(self):
+        self.calls = 0
+
+    def predict(self, image_path):
+        self.calls += 1
+        image = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
+        if image is None:
+            raise ValueError("이미지를 읽을 수 없습니다.")
+        return image, np.where(image > 127, 2, 1)
+
+
+def _png_bytes(value: int = 200) -> bytes:
+    return cv2.imencode(".png", np.full((16, 16), value, dtype=np.uint8))[1].tobytes()
+
+
+def _poll_until(watcher: FolderWatcher, condition, timeout: float = 5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        with watcher._lock:
+            watcher.poll_once()
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+@pytest.fixture
+def watcher(tmp_path):
+    config = {"stable_seconds": 0.1, "poll_interval": 0.02, "full_scan_interval": 0.0, "max_wait": 60.0}
+    watcher = FolderWatcher(str(tmp_path), FakeModel(), config)
+    watcher.start()
+    yield watcher
+    for _ in watcher._workers:
+        watcher._queue.put(None)
+    for worker in watcher._workers:
+        worker.join(timeout=5)
+
+
+def test_partial_png_waits_for_end_marker(tmp_path, watcher):
+    data = _png_bytes()
+    path = tmp_path / "cell.png"
+    path.write_bytes(data[: len(data) // 2])
+
+    # 크기가 변하지 않아도 IEND 가 없으면 처리하지 않음
+    assert not _poll_until(watcher, lambda: not watcher._pending, timeout=0.5)
+    assert watcher.vision_model.calls == 0
+
+    path.write_bytes(data)
+    assert _poll_until(watcher, watcher.idle)
+    verdict = json.loads((tmp_path / "cell.verdict.json").read_text(encoding="utf-8"))
+    assert verdict["status"] == "ok"
+    assert verdict["verdict"] == "defect"
+    assert (tmp_path / "cell.mask.png").exists()
+
+
+def test_temp_name_is_ignored_until_rename(tmp_path, watcher):
+    (tmp_path / "cell.png.part").write_bytes(_png_bytes())
+    _poll_until(watcher, lambda: False, timeout=0.3)
+    assert watcher.vision_model.calls == 0
+
+    os.replace(tmp_path / "cell.png.part", tmp_path / "cell.png")
+    assert _poll_until(watcher, lambda: (tmp_path / "cell.verdict.json").exists())
+    assert watcher.stats["processed"] == 1
+
+
+def test_undecodable_file_is_retried_then_reported(tmp_path, watcher):
+    watcher.config["decode_retries"] = 1
+    (tmp_path / "broken.png").write_bytes(b"not a png" + b"IEND" + b"\x00" * 8)
+    assert _poll_until(watcher, lambda: (tmp_path / "broken.verdict.json").exists())
+    verdict = json.loads((tmp_path / "broken.verdict.json").read_text(encoding="utf-8"))
+    assert verdict["status"] == "error"
+    assert watcher.stats["retried"] == 1
+    assert watcher.stats["errors"] == 1
+    assert watcher.latency_summary()["count"] == 0  # 오류는 지연 시간에 포함하지 않음
+
+
+def test_output_write_failure_keeps_worker_alive(tmp_path, watcher, monkeypatch):
+    original = FolderWatcher._write_atomic
+    failures = {"cell_0.verdict.json", "cell_1.mask.png"}
+
+    def flaky_write(path, write):
+        if os.path.basename(path) in failures:
+            raise OSError("디스크 가득 참")
+        return original(path, write)
+
+    monkeypatch.setattr(FolderWatcher, "_write_atomic", staticmethod(flaky_write))
+    for i in range(3):
+        (tmp_path / f"cell_{i}.png").write_bytes(_png_bytes())
+
+    assert _poll_until(watcher, lambda: watcher.idle() and watcher.vision_model.calls == 3)
+    # 판정 기록 실패(cell_0)와 마스크 기록 실패(cell_1)는 오류로 집계, 작업자는 cell_2 까지 처리
+    assert watcher.stats["errors"] == 2
+    assert watcher.stats["processed"] == 1
+    assert all(worker.is_alive() for worker in watcher._workers)
+    assert json.loads((tmp_path / "cell_1.verdict.json").read_text(encoding="utf-8"))["status"] == "error"
+    assert json.loads((tmp_path / "cell_2.verdict.json").read_text(encoding="utf-8"))["status"] == "ok"
+    assert watcher.latency_summary()["count"] == 1
+    assert not [name for name in os.listdir(tmp_path) if name.startswith(".")]
+
+
+def test_rewritten_file_is_reprocessed_and_deleted_file_forgotten(tmp_path, watcher):
+    path = tmp_path / "cell.png"
+    path.write_bytes(_png_bytes(200))
+    assert _poll_until(watcher, lambda: watcher.idle() and watcher.stats["processed"] == 1)
+    _poll_until(watcher, lambda: False, timeout=0.3)
+    assert watcher.vision_model.calls == 1  # 바뀌지 않은 파일은 다시 처리하지 않음
+
+    # 같은 이름으로 다시 기록 (정상 셀)
+    path.write_bytes(_png_bytes(50))
+    assert _poll_until(watcher, lambda: watcher.idle() and watcher.stats["processed"] == 2)
+    verdict = json.loads((tmp_path / "cell.verdict.json").read_text(encoding="utf-8"))
+    assert verdict["verdict"] == "normal"
+
+    path.unlink()
+    assert _poll_until(watcher, lambda: str(path) not in watcher._known)
+
+
+def test_predict_error_with_failed_verdict_write_counts_once(tmp_path, watcher, monkeypatch):
+    watcher.config["decode_retries"] = 0
+    original = FolderWatcher._write_atomic
+
+    def failing_verdict(path, write):
+        if path.endswith(".verdict.json"):
+            raise OSError("디스크 가득 참")
+        return original(path, write)
+
+    monkeypatch.setattr(FolderWatcher, "_write_atomic", staticmethod(failing_verdict))
+    (tmp_path / "broken.png").write_bytes(b"not a png" + b"IEND" + b"\x00" * 8)
+    assert _poll_until(watcher, lambda: watcher.idle() and watcher.vision_model.calls == 1)
+    assert watcher.stats["errors"] == 1
@@ -0,0 +1,99 @@
+"""모델 레지스트리 메모리 예산 / LRU 축출 테스트"""
+
+import pytest
+import torch
+
+from src.battery_analyzer.model_registry import ModelRegistry
+
+MODEL_MB = 1
+
+
+class FakeVisionModel:
+    """정확히 MODEL_MB 크기의 버퍼만 가진 가짜 비전 모델"""
+
+    def __init__(self, name):
+        self.model = torch.nn.Module()
+        self.model.register_buffer("weights", torch.zeros(MODEL_MB * 1024 ** 2 // 4, dtype=torch.float32))
+        self.model_version = f"{name}-fake"
+
+
+def make_registry(names, budget_models):
+    specs = [{"name": name, "path": f"/nonexistent/{name}.pth", "backbone": "fake", "num_classes": 5}
+             for name in names]
+    loaded = []
+
+    def loader(spec):
+        loaded.append(spec["name"])
+        return FakeVisionModel(spec["name"])
+
+    registry = ModelRegistry(models=specs, memory_budget_mb=budget_models * MODEL_MB,
+                             watch_checkpoints=False, loader=loader)
+    return registry, loaded
+
+
+def test_leased_model_survives_budget_pressure():
+    registry, _ = make_registry(["a", "b", "c", "d"], budget_models=2)
+    lease = registry.acquire("a")
+    for name in ["b", "c", "d"]:
+        with registry.acquire(name):
+            pass
+
+    # "a" 는 가장 오래되었지만 대여 중이므로 유지, 나머지는 예산 안으로 축출
+    assert "a" in registry._residents
+    assert lease.vision_model.model is not None
+    assert list(registry._residents) == ["a", "d"]
+    assert registry.stats["evictions"] == 2
+    assert registry.resident_bytes <= registry.memory_budget
+
+    lease.release()
+    with registry.acquire("a") as vision_model:
+        assert vision_model is lease.vision_model
+    assert registry.stats["loads"] == 4
+
+
+def test_idle_models_evicted_in_lru_order():
+    registry, loaded = make_registry(["a", "b", "c"], budget_models=2)
+    for name in ["a", "b"]:
+        with registry.acquire(name):
+            pass
+    # "a" 를 다시 사용하면 "b" 가 가장 오래된 모델
+    with registry.acquire("a"):
+        pass
+    evicted = registry._residents["b"].vision_model
+    with registry.acquire("c"):
+        pass
+
+    assert list(registry._residents) == ["a", "c"]
+    assert evicted.model is None
+    assert registry.stats["evictions"] == 1
+    assert loaded == ["a", "b", "c"]
+
+
+def test_over_budget_while_all_leased_then_evicts_on_release():
+    registry, _ = make_registry(["a", "b"], budget_models=1)
+    lease_a = registry.acquire("a")
+    lease_b = registry.acquire("b")
+    # 둘 다 대여 중이면 예산을 넘더라도 축출하지 않음
+    assert set(registry._residents) == {"a", "b"}
+    assert registry.stats["evictions"] == 0
+
+    lease_a.release()
+    assert list(registry._residents) == ["b"]
+    assert registry.stats["evictions"] == 1
+    lease_b.release()
+    assert list(registry._residents) == ["b"]
+
+
+def test_failed_checkpoint_load_raises_once_without_streamlit_error(tmp_path, monkeypatch):
+    import streamlit as st
+
+    shown = []
+    monkeypatch.setattr(st, "error", lambda message: shown.append(message))
+    missing = str(tmp_path / "missing.pth")
+    registry = ModelRegistry(models=[{"name": "a", "path": missing, "backbone": "efficientnet-b0",
+                                      "num_classes": 5}], watch_checkpoints=False)
+    with pytest.raises(RuntimeError, match="missing.pth"):
+        registry.acquire("a")
+    # 오류 표시는 호출자(앱)가 한 번만
+    assert shown == []
+    assert registry.stats["loads"] == 0
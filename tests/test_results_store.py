@@ -0,0 +1,63 @@
+"""분석 결과 저장소 테스트 (세그먼트 경계, 재시작 후 조회, 조건 검색)"""
+
+import numpy as np
+
+from src.battery_analyzer.results_store import ResultsStore
+
+
+def make_mask(seed, shape=(40, 50)):
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 5, size=shape, dtype=np.uint8)
+
+
+def test_masks_round_trip_across_segments_and_reopen(tmp_path):
+    root = str(tmp_path / "store")
+    # 세그먼트 하나에 마스크 2개만 들어가도록 작게 설정
+    store = ResultsStore(root, segment_size=4096)
+    masks = [make_mask(seed) for seed in range(7)]
+    ids = store.append_many([{"image_hash": f"h{i}", "mask": mask, "model_version": "v1"}
+                             for i, mask in enumerate(masks)])
+    ids.append(store.append("h7", make_mask(7, (70, 60)), model_version="v1"))
+    masks.append(make_mask(7, (70, 60)))
+    assert store.count() == 8
+    assert len({store.get_record(result_id)["segment"] for result_id in ids}) > 1
+    store.close()
+
+    reopened = ResultsStore(root, segment_size=4096)
+    for result_id, mask in zip(ids, masks):
+        np.testing.assert_array_equal(reopened.get_mask(result_id), mask)
+    # 재시작 후 추가해도 기존 결과를 덮어쓰지 않음
+    extra = reopened.append("h8", make_mask(8), model_version="v1")
+    np.testing.assert_array_equal(reopened.get_mask(ids[-1]), masks[-1])
+    np.testing.assert_array_equal(reopened.get_mask(extra), make_mask(8))
+    reopened.close()
+
+
+def test_query_and_lookup(tmp_path):
+    store = ResultsStore(str(tmp_path / "store"))
+    porous = np.zeros((20, 20), dtype=np.uint8)
+    porous[:10, :10] = 3
+    clean = np.ones((20, 20), dtype=np.uint8)
+    first = store.append("a", porous, model_version="v1", phash=(1 << 63) | 5)
+    store.append("b", clean, model_version="v1")
+    store.append("a", clean, model_version="v2")
+    store.update_analysis(first, "분석 결과")
+
+    record = store.get_record(first)
+    assert record["llava_output"] == "분석 결과"
+    assert record["phash"] == (1 << 63) | 5
+    assert record["detected_defects"] == [3]
+
+    assert store.find_by_hash("a", model_version="v1")["id"] == first
+    assert store.find_by_hash("missing") is None
+    assert store.ids_with_version([1, 2, 3], "v1") == {1, 2}
+
+    areas = record["areas"]
+    porous_name = next(name for name, area in areas.items() if area == 100)
+    assert [r["id"] for r in store.query(min_areas={porous_name: 50})] == [first]
+    assert store.query(min_areas={porous_name: 100}) == []
+    assert len(store.query(model_version="v1")) == 2
+
+    ids, hashes = store.load_phashes()
+    assert ids.tolist() == [first] and int(hashes[0]) == (1 << 63) | 5
+    store.close()
@@ -0,0 +1,63 @@
+"""로컬 HTTP 추론 서비스 테스트 (잘못된 질의는 세그멘테이션 전에 거절)"""
+
+import asyncio
+import http.client
+import json
+
+import cv2
+import numpy as np
+import pytest
+
+from src.battery_analyzer.server import InferenceService
+
+
+class CountingModel:
+    """예측 횟수를 세는 가짜 모델 (밝은 픽셀을 스웰링으로 예측)"""
+    output_version = "fake"
+
+    def __init__(self):
+        self.calls = 0
+
+    def predict(self, source):
+        self.calls += 1
+        image = cv2.imdecode(np.frombuffer(source, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            raise ValueError("이미지를 읽을 수 없습니다.")
+        small = cv2.resize(image, (32, 32))
+        return small, np.where(small[..., 0] > 127, 2, 1)
+
+
+def _request(port, path, body):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    conn.request("POST", path, body=body)
+    response = conn.getresponse()
+    data = response.read()
+    conn.close()
+    return response.status, data
+
+
+@pytest.mark.parametrize("path,status", [
+    ("/predict?format=bogus", 400),
+    ("/predict?size=huge", 400),
+    ("/predict?format=raw&size=original", 200),
+    ("/predict", 200),
+])
+def test_predict_validates_query_before_segmentation(path, status):
+    model = CountingModel()
+    service = InferenceService(model, config={"max_concurrency": 1})
+    body = cv2.imencode(".png", np.full((64, 48, 3), 200, dtype=np.uint8))[1].tobytes()
+
+    async def scenario():
+        await service.start("127.0.0.1", 0)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(None, _request, service.port, path, body)
+        finally:
+            await service.stop()
+
+    result_status, data = asyncio.run(scenario())
+    assert result_status == status
+    assert model.calls == (1 if status == 200 else 0)
+    if path == "/predict":
+        assert json.loads(data)["image_size"] == [48, 64]
+    elif status == 200:
+        assert len(data) == 48 * 64
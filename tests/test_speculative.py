@@ -0,0 +1,60 @@
+"""LLaVA 선행 분석 테스트 (대기열 작업 우회, 대기 시간 제한)"""
+
+import threading
+
+import pytest
+
+from src.battery_analyzer.speculative import SpeculativeAnalyzer
+
+
+class BlockingAnalyzer:
+    """release 이벤트가 설정될 때까지 분석을 멈추는 가짜 분석기"""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.started = threading.Event()
+        self.calls = []
+
+    def analyze_image(self, image_path, mask_path, defect_info, analysis_type):
+        self.calls.append(defect_info)
+        self.started.set()
+        self.release.wait(5)
+        return f"분석: {defect_info}"
+
+
+@pytest.fixture
+def inputs(tmp_path):
+    image_path, mask_path = tmp_path / "image.png", tmp_path / "mask.png"
+    image_path.write_bytes(b"image")
+    mask_path.write_bytes(b"mask")
+    return str(image_path), str(mask_path)
+
+
+def test_queued_job_is_bypassed_and_running_job_wait_is_bounded(tmp_path, inputs):
+    analyzer = BlockingAnalyzer()
+    speculative = SpeculativeAnalyzer(analyzer, max_workers=1, work_root=str(tmp_path / "work"))
+    try:
+        other_session = speculative.submit("other", *inputs, "A", "standard")
+        assert analyzer.started.wait(5)
+        clicked = speculative.submit("clicked", *inputs, "B", "standard")
+
+        # 다른 세션 작업 뒤에서 대기 중 → 기다리지 않고 바로 직접 분석하도록 반환
+        assert speculative.result(clicked, timeout=5) == (None, 0.0)
+        assert clicked.cancelled and clicked.future.cancelled()
+        assert speculative.stats["bypassed"] == 1
+
+        # 실행 중이지만 제한 시간 안에 끝나지 않음 → 폐기
+        assert speculative.result(other_session, timeout=0.05) == (None, 0.0)
+        assert other_session.cancelled
+        assert speculative.stats["timed_out"] == 1
+
+        analyzer.release.set()
+        finished = speculative.submit("finished", *inputs, "C", "standard")
+        output, saved = speculative.result(finished, timeout=5)
+        assert output == "분석: C"
+        assert saved >= 0.0
+        assert speculative.stats["used"] == 1
+        assert analyzer.calls == ["A", "C"]
+    finally:
+        analyzer.release.set()
+        speculative.shutdown()
@@ -0,0 +1,65 @@
+"""CT 볼륨 3D 결함 집계 테스트 (전수 탐색 결과 일치, 진행 중인 요소만 유지)"""
+
+from collections import deque
+
+import numpy as np
+import pytest
+
+from src.battery_analyzer.volume_processor import DefectAggregator3D
+
+# 슬라이스 내 8방향 + 위아래 슬라이스의 같은 위치
+_NEIGHBOURS = [(0, dy, dx) for dy in (-1, 0, 1) for dx in (-1, 0, 1) if dy or dx] + [(-1, 0, 0), (1, 0, 0)]
+
+
+def brute_force_components(volume, defect_classes):
+    """BFS 로 구한 3D 연결 요소 (class_id, voxels, z/y/x 범위) 목록"""
+    seen = np.zeros(volume.shape, dtype=bool)
+    components = []
+    for start in zip(*np.nonzero(np.isin(volume, defect_classes))):
+        if seen[start]:
+            continue
+        class_id = volume[start]
+        seen[start] = True
+        queue, voxels = deque([start]), []
+        while queue:
+            z, y, x = queue.popleft()
+            voxels.append((z, y, x))
+            for dz, dy, dx in _NEIGHBOURS:
+                n = (z + dz, y + dy, x + dx)
+                if all(0 <= n[i] < volume.shape[i] for i in range(3)) and not seen[n] and volume[n] == class_id:
+                    seen[n] = True
+                    queue.append(n)
+        zs, ys, xs = np.array(voxels).T
+        components.append((int(class_id), len(voxels), int(zs.min()), int(zs.max()),
+                           int(ys.min()), int(ys.max()), int(xs.min()), int(xs.max())))
+    return sorted(components)
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_components_match_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    volume = rng.choice([0, 1, 2, 3, 4], size=(12, 24, 24), p=[0.3, 0.4, 0.1, 0.1, 0.1]).astype(np.uint8)
+    aggregator = DefectAggregator3D(num_classes=5)
+    for z, labels in enumerate(volume):
+        aggregator.update(z, labels)
+    summary = aggregator.finalize()
+
+    found = sorted((c["class_id"], c["voxels"], c["z_min"], c["z_max"], c["y_min"], c["y_max"],
+                    c["x_min"], c["x_max"]) for c in summary["components"])
+    assert found == brute_force_components(volume, [2, 3, 4])
+    assert summary["num_slices"] == len(volume)
+
+
+def test_only_components_touching_current_slice_are_kept():
+    aggregator = DefectAggregator3D(num_classes=5)
+    labels = np.ones((32, 32), dtype=np.uint8)
+    labels[2:6, 2:6] = 2
+    labels[20:24, 20:24] = 3
+    for z in range(200):
+        # 10 슬라이스마다 결함이 끊겨 새 3D 요소가 시작됨
+        aggregator.update(z, labels if z % 10 else np.ones_like(labels))
+        assert len(aggregator._active) <= 2
+        assert len(aggregator._parent) <= 4
+    summary = aggregator.finalize()
+    assert len(summary["components"]) == 40
+    assert {c["voxels"] for c in summary["components"]} == {16 * 9}